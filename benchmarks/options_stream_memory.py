@@ -0,0 +1,90 @@
+"""Peak RSS of get-historical-options with a buffered vs. streamed response.
+
+Serves one large options chain through an httpx mock transport and runs the
+tool once per mode, each in a fresh subprocess so peak RSS is not shared.
+
+    python benchmarks/options_stream_memory.py --contracts 20000
+    python benchmarks/options_stream_memory.py --payload recorded_chain.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+
+from standin import CHUNK_SIZE, options_chain
+
+
+def child(mode: str, payload_path: str, limit: int) -> None:
+    os.environ.setdefault("ALPHA_VANTAGE_API_KEY", "benchmark")
+    os.environ["ALPHA_VANTAGE_CACHE"] = "0"
+    os.environ["ALPHA_VANTAGE_CALLS_PER_MINUTE"] = "0"
+    os.environ["ALPHA_VANTAGE_STREAM_OPTIONS"] = "1" if mode == "streamed" else "0"
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+    import httpx
+    from alpha_vantage_mcp import server, tools
+
+    with open(payload_path, "rb") as f:
+        body = f.read()
+
+    async def chunks():
+        view = memoryview(body)
+        for start in range(0, len(view), CHUNK_SIZE):
+            yield bytes(view[start:start + CHUNK_SIZE])
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, content=chunks(), headers={"content-type": "application/json"})
+
+    server.http_client = tools.create_http_client(transport=httpx.MockTransport(handler))
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    result = asyncio.run(server.handle_call_tool(
+        "get-historical-options",
+        {"symbol": "AAPL", "date": "2024-02-20", "limit": limit, "sort_by": "volume", "sort_order": "desc"},
+    ))
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(json.dumps({"mode": mode, "peak_kb": peak, "delta_kb": peak - baseline, "chars": len(result[0].text)}))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--contracts", type=int, default=20000, help="size of the generated chain")
+    parser.add_argument("--payload", help="recorded HISTORICAL_OPTIONS response to use instead of a generated one")
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--child", choices=["buffered", "streamed"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.child, args.payload, args.limit)
+        return
+
+    payload_path = args.payload
+    if payload_path is None:
+        fd, payload_path = tempfile.mkstemp(suffix=".json")
+        with os.fdopen(fd, "w") as f:
+            json.dump(options_chain(args.contracts), f)
+
+    try:
+        print(f"payload: {os.path.getsize(payload_path) / 1e6:.1f} MB, limit={args.limit}")
+        results = {}
+        for mode in ("buffered", "streamed"):
+            out = subprocess.run(
+                [sys.executable, __file__, "--child", mode, "--payload", payload_path, "--limit", str(args.limit)],
+                check=True, capture_output=True, text=True,
+            )
+            results[mode] = json.loads(out.stdout.strip().splitlines()[-1])
+            print(f"{mode:>9}: peak RSS {results[mode]['peak_kb'] / 1024:.1f} MB "
+                  f"(+{results[mode]['delta_kb'] / 1024:.1f} MB over baseline)")
+        if results["streamed"]["delta_kb"]:
+            print(f"reduction: {results['buffered']['delta_kb'] / results['streamed']['delta_kb']:.1f}x")
+    finally:
+        if args.payload is None:
+            os.remove(payload_path)
+
+
+if __name__ == "__main__":
+    main()
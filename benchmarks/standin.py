@@ -0,0 +1,313 @@
+"""Local Alpha Vantage stand-in served through an httpx mock transport.
+
+Generates payloads shaped and sized like the real responses for every
+function the server uses, or serves recorded ones from a directory of
+``<FUNCTION>.json`` files, and can inject latency, 429s and "Note" throttles.
+
+    stand_in = StandIn(latency=0.05, error_rate=0.01)
+    server.http_client = tools.create_http_client(transport=stand_in.transport())
+"""
+import asyncio
+import json
+import os
+import random
+from datetime import date, timedelta
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import httpx
+
+CHUNK_SIZE = 64 * 1024
+
+# Rows per generated payload, roughly what Alpha Vantage returns
+DEFAULT_SIZES: Dict[str, int] = {
+    "TIME_SERIES_DAILY_COMPACT": 100,
+    "TIME_SERIES_DAILY_FULL": 6300,
+    "HISTORICAL_OPTIONS": 4000,
+    "DIGITAL_CURRENCY_DAILY": 2000,
+    "DIGITAL_CURRENCY_WEEKLY": 300,
+    "DIGITAL_CURRENCY_MONTHLY": 70,
+}
+
+NOTE = (
+    "Thank you for using Alpha Vantage! Our standard API call frequency is 5 calls per minute "
+    "and 25 calls per day. Please visit https://www.alphavantage.co/premium/ if you would like "
+    "to target a higher API call frequency."
+)
+
+_CRYPTO_SERIES_KEYS = {
+    "DIGITAL_CURRENCY_DAILY": ("Daily Prices and Volumes for Digital Currency", "Time Series (Digital Currency Daily)", 1),
+    "DIGITAL_CURRENCY_WEEKLY": ("Weekly Prices and Volumes for Digital Currency", "Time Series (Digital Currency Weekly)", 7),
+    "DIGITAL_CURRENCY_MONTHLY": ("Monthly Prices and Volumes for Digital Currency", "Time Series (Digital Currency Monthly)", 30),
+}
+
+
+def _trading_days(count: int, end: date, step: int = 1, weekdays_only: bool = True):
+    day = end
+    produced = 0
+    while produced < count:
+        if not weekdays_only or day.weekday() < 5:
+            yield day
+            produced += 1
+        day -= timedelta(days=step)
+
+
+def _bars(rng: random.Random, days, start: float, decimals: int, volume: Callable[[], str]) -> Dict[str, Dict[str, str]]:
+    series = {}
+    price = start
+    for day in days:
+        price = max(price * (1 + rng.gauss(0, 0.015)), 0.01)
+        high = price * (1 + abs(rng.gauss(0, 0.01)))
+        low = price * (1 - abs(rng.gauss(0, 0.01)))
+        series[day.isoformat()] = {
+            "1. open": f"{price:.{decimals}f}",
+            "2. high": f"{high:.{decimals}f}",
+            "3. low": f"{low:.{decimals}f}",
+            "4. close": f"{(low + high) / 2:.{decimals}f}",
+            "5. volume": volume(),
+        }
+    return series
+
+
+def global_quote(symbol: str, seed: int = 7) -> Dict[str, Any]:
+    rng = random.Random(f"{seed}:{symbol}")
+    price = rng.uniform(10, 500)
+    change = rng.uniform(-5, 5)
+    return {"Global Quote": {
+        "01. symbol": symbol,
+        "02. open": f"{price - change:.4f}",
+        "03. high": f"{price * 1.01:.4f}",
+        "04. low": f"{price * 0.99:.4f}",
+        "05. price": f"{price:.4f}",
+        "06. volume": str(rng.randint(10_000, 50_000_000)),
+        "07. latest trading day": "2024-12-17",
+        "08. previous close": f"{price - change:.4f}",
+        "09. change": f"{change:.4f}",
+        "10. change percent": f"{change / price * 100:.4f}%",
+    }}
+
+
+def company_overview(symbol: str, seed: int = 7) -> Dict[str, Any]:
+    rng = random.Random(f"{seed}:{symbol}")
+    overview = {
+        "Symbol": symbol,
+        "AssetType": "Common Stock",
+        "Name": f"{symbol} Corporation",
+        "Description": " ".join(rng.choice(["market", "products", "services", "global", "software", "hardware", "cloud", "platform"]) for _ in range(250)),
+        "CIK": str(rng.randint(1000, 999999)),
+        "Exchange": "NYSE",
+        "Currency": "USD",
+        "Country": "USA",
+        "Sector": "TECHNOLOGY",
+        "Industry": "COMPUTER & OFFICE EQUIPMENT",
+        "Address": "1 NEW ORCHARD ROAD, ARMONK, NY, US",
+        "FiscalYearEnd": "December",
+        "LatestQuarter": "2024-09-30",
+        "MarketCapitalization": str(rng.randint(10**9, 3 * 10**12)),
+    }
+    # The real response carries about fifty numeric fundamentals
+    for field in ("EBITDA", "PERatio", "PEGRatio", "BookValue", "DividendPerShare", "DividendYield", "EPS",
+                  "RevenuePerShareTTM", "ProfitMargin", "OperatingMarginTTM", "ReturnOnAssetsTTM",
+                  "ReturnOnEquityTTM", "RevenueTTM", "GrossProfitTTM", "DilutedEPSTTM",
+                  "QuarterlyEarningsGrowthYOY", "QuarterlyRevenueGrowthYOY", "AnalystTargetPrice",
+                  "AnalystRatingStrongBuy", "AnalystRatingBuy", "AnalystRatingHold", "AnalystRatingSell",
+                  "AnalystRatingStrongSell", "TrailingPE", "ForwardPE", "PriceToSalesRatioTTM",
+                  "PriceToBookRatio", "EVToRevenue", "EVToEBITDA", "Beta", "52WeekHigh", "52WeekLow",
+                  "50DayMovingAverage", "200DayMovingAverage", "SharesOutstanding"):
+        overview[field] = f"{rng.uniform(0, 1000):.4f}"
+    overview["DividendDate"] = "2024-12-10"
+    overview["ExDividendDate"] = "2024-11-12"
+    return overview
+
+
+def daily_series(symbol: str, rows: int, seed: int = 7) -> Dict[str, Any]:
+    rng = random.Random(f"{seed}:{symbol}")
+    end = date(2024, 12, 17)
+    return {
+        "Meta Data": {
+            "1. Information": "Daily Prices (open, high, low, close) and Volumes",
+            "2. Symbol": symbol,
+            "3. Last Refreshed": end.isoformat(),
+            "4. Output Size": "Compact" if rows <= DEFAULT_SIZES["TIME_SERIES_DAILY_COMPACT"] else "Full size",
+            "5. Time Zone": "US/Eastern",
+        },
+        "Time Series (Daily)": _bars(rng, _trading_days(rows, end), rng.uniform(20, 300), 4,
+                                     lambda: str(rng.randint(100_000, 20_000_000))),
+    }
+
+
+def crypto_series(function: str, symbol: str, market: str, rows: int, seed: int = 7) -> Dict[str, Any]:
+    rng = random.Random(f"{seed}:{function}:{symbol}")
+    information, series_key, step = _CRYPTO_SERIES_KEYS[function]
+    end = date(2025, 4, 17)
+    return {
+        "Meta Data": {
+            "1. Information": information,
+            "2. Digital Currency Code": symbol,
+            "3. Digital Currency Name": symbol.title(),
+            "4. Market Code": market,
+            "5. Market Name": market,
+            "6. Last Refreshed": end.isoformat(),
+            "7. Time Zone": "UTC",
+        },
+        series_key: _bars(rng, _trading_days(rows, end, step, weekdays_only=False), rng.uniform(1, 60000), 8,
+                          lambda: f"{rng.uniform(100, 100000):.8f}"),
+    }
+
+
+def exchange_rate(from_currency: str, to_currency: str, seed: int = 7) -> Dict[str, Any]:
+    rng = random.Random(f"{seed}:{from_currency}:{to_currency}")
+    rate = rng.uniform(1, 60000)
+    return {"Realtime Currency Exchange Rate": {
+        "1. From_Currency Code": from_currency,
+        "2. From_Currency Name": from_currency.title(),
+        "3. To_Currency Code": to_currency,
+        "4. To_Currency Name": to_currency,
+        "5. Exchange Rate": f"{rate:.8f}",
+        "6. Last Refreshed": "2025-04-17 10:31:02",
+        "7. Time Zone": "UTC",
+        "8. Bid Price": f"{rate * 0.9999:.8f}",
+        "9. Ask Price": f"{rate * 1.0001:.8f}",
+    }}
+
+
+def options_chain(contracts: int, symbol: str = "AAPL", trading_date: str = "2024-02-20", seed: int = 7) -> Dict[str, Any]:
+    rng = random.Random(seed)
+    expirations = ["2024-03-15", "2024-03-22", "2024-04-19", "2024-05-17", "2024-06-21", "2024-09-20", "2025-01-17"]
+    data = []
+    for i in range(contracts):
+        strike = 50 + (i // 2) % 300
+        kind = "call" if i % 2 == 0 else "put"
+        expiration = expirations[i % len(expirations)]
+        data.append({
+            "contractID": f"{symbol}{expiration.replace('-', '')[2:]}{kind[0].upper()}{strike * 1000:08d}",
+            "symbol": symbol,
+            "expiration": expiration,
+            "strike": f"{strike:.2f}",
+            "type": kind,
+            "last": f"{rng.uniform(0, 60):.2f}",
+            "mark": f"{rng.uniform(0, 60):.2f}",
+            "bid": f"{rng.uniform(0, 60):.2f}",
+            "bid_size": str(rng.randint(0, 500)),
+            "ask": f"{rng.uniform(0, 60):.2f}",
+            "ask_size": str(rng.randint(0, 500)),
+            "volume": str(rng.randint(0, 20000)),
+            "open_interest": str(rng.randint(0, 50000)),
+            "date": trading_date,
+            "implied_volatility": f"{rng.uniform(0.1, 1.5):.5f}",
+            "delta": f"{rng.uniform(-1, 1):.5f}",
+            "gamma": f"{rng.uniform(0, 0.1):.5f}",
+            "theta": f"{rng.uniform(-0.5, 0):.5f}",
+            "vega": f"{rng.uniform(0, 0.5):.5f}",
+            "rho": f"{rng.uniform(-0.2, 0.2):.5f}",
+        })
+    return {"endpoint": "Historical Options", "message": "success", "data": data}
+
+
+def realtime_bulk_quotes(symbols: str, seed: int = 7) -> Dict[str, Any]:
+    data = []
+    for symbol in symbols.split(","):
+        quote = global_quote(symbol, seed)["Global Quote"]
+        data.append({
+            "symbol": symbol,
+            "timestamp": "2024-12-17 16:00:00.000",
+            "open": quote["02. open"],
+            "high": quote["03. high"],
+            "low": quote["04. low"],
+            "close": quote["05. price"],
+            "volume": quote["06. volume"],
+            "previous_close": quote["08. previous close"],
+            "change": quote["09. change"],
+            "change_percent": quote["10. change percent"].rstrip("%"),
+        })
+    return {"endpoint": "Realtime Bulk Quotes", "message": "", "data": data}
+
+
+class StandIn:
+    """Answers Alpha Vantage requests locally with optional latency and throttling.
+
+    Encoded bodies are memoized per request, so serving a payload costs the
+    same as reading a recorded response off the wire.
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        note_rate: float = 0.0,
+        sizes: Optional[Dict[str, int]] = None,
+        payload_dir: Optional[str] = None,
+        seed: int = 7,
+    ):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.note_rate = note_rate
+        self.sizes = {**DEFAULT_SIZES, **(sizes or {})}
+        self.payload_dir = payload_dir
+        self.seed = seed
+        self._rng = random.Random(seed)
+        self._bodies: Dict[Tuple[Tuple[str, str], ...], bytes] = {}
+        self.requests = 0
+        self.throttled = 0
+        self.notes = 0
+        self.bytes_sent = 0
+
+    def transport(self) -> httpx.MockTransport:
+        return httpx.MockTransport(self.handle)
+
+    def stats(self) -> Dict[str, int]:
+        return {"requests": self.requests, "throttled": self.throttled, "notes": self.notes, "bytes_sent": self.bytes_sent}
+
+    async def handle(self, request: httpx.Request) -> httpx.Response:
+        self.requests += 1
+        if self.latency or self.jitter:
+            await asyncio.sleep(max(self.latency + self._rng.gauss(0, self.jitter), 0.0))
+
+        if self.error_rate and self._rng.random() < self.error_rate:
+            self.throttled += 1
+            return httpx.Response(429, json={"Information": "Too many requests"})
+        if self.note_rate and self._rng.random() < self.note_rate:
+            self.notes += 1
+            return httpx.Response(200, json={"Note": NOTE})
+
+        params = dict(request.url.params)
+        params.pop("apikey", None)
+        key = tuple(sorted(params.items()))
+        body = self._bodies.get(key)
+        if body is None:
+            body = json.dumps(self.payload(params)).encode()
+            self._bodies[key] = body
+        self.bytes_sent += len(body)
+        return httpx.Response(200, content=self._chunks(body), headers={"content-type": "application/json"})
+
+    async def _chunks(self, body: bytes):
+        view = memoryview(body)
+        for start in range(0, len(view), CHUNK_SIZE):
+            yield bytes(view[start:start + CHUNK_SIZE])
+
+    def payload(self, params: Dict[str, str]) -> Dict[str, Any]:
+        function = params.get("function", "")
+        if self.payload_dir:
+            path = os.path.join(self.payload_dir, f"{function}.json")
+            if os.path.exists(path):
+                with open(path) as f:
+                    return json.load(f)
+
+        symbol = params.get("symbol", "IBM")
+        if function == "GLOBAL_QUOTE":
+            return global_quote(symbol, self.seed)
+        if function == "REALTIME_BULK_QUOTES":
+            return realtime_bulk_quotes(symbol, self.seed)
+        if function == "OVERVIEW":
+            return company_overview(symbol, self.seed)
+        if function == "TIME_SERIES_DAILY":
+            size = "TIME_SERIES_DAILY_FULL" if params.get("outputsize") == "full" else "TIME_SERIES_DAILY_COMPACT"
+            return daily_series(symbol, self.sizes[size], self.seed)
+        if function == "HISTORICAL_OPTIONS":
+            return options_chain(self.sizes["HISTORICAL_OPTIONS"], symbol, params.get("date", "2024-02-20"), self.seed)
+        if function == "CURRENCY_EXCHANGE_RATE":
+            return exchange_rate(params.get("from_currency", "BTC"), params.get("to_currency", "USD"), self.seed)
+        if function in _CRYPTO_SERIES_KEYS:
+            return crypto_series(function, symbol, params.get("market", "USD"), self.sizes[function], self.seed)
+        return {"Error Message": f"Invalid API call. Unknown function {function}."}
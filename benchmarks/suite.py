@@ -0,0 +1,236 @@
+"""Offline latency, throughput and memory benchmarks for every tool.
+
+Runs handle_call_tool against the local Alpha Vantage stand-in (standin.py)
+and reports p50/p99 latency, throughput at the given concurrency and the
+peak traced memory of one call, per scenario. Results are compared with a
+stored baseline so regressions fail the run. Each combination of --cache
+and --store has its own baseline file.
+
+    python benchmarks/suite.py                       # compare with baseline.json
+    python benchmarks/suite.py --update-baseline     # record a new baseline
+    python benchmarks/suite.py --cache --store       # warm calls, compare with baseline-cache-store.json
+    python benchmarks/suite.py --latency 0.05 --error-rate 0.02 --note-rate 0.02 --no-check
+    python benchmarks/suite.py --scenario options-filtered --iterations 200 --concurrency 16
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Tuple
+
+BASELINE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+Arguments = Callable[[int], Dict[str, Any]]
+
+
+def _symbol(i: int) -> str:
+    # Distinct symbols keep the coalescer from merging concurrent calls
+    return f"S{i % 64:03d}"
+
+
+SCENARIOS: Dict[str, Tuple[str, Arguments]] = {
+    "quote": ("get-stock-quote", lambda i: {"symbol": _symbol(i)}),
+    "quotes-batch": ("get-stock-quotes", lambda i: {"symbols": [_symbol(i + n) for n in range(20)]}),
+    "company-info": ("get-company-info", lambda i: {"symbol": _symbol(i)}),
+    "time-series-compact": ("get-time-series", lambda i: {"symbol": _symbol(i)}),
+    "time-series-full": ("get-time-series", lambda i: {"symbol": _symbol(i), "outputsize": "full"}),
+    "indicators": ("get-technical-indicators", lambda i: {"symbol": _symbol(i)}),
+    "options": ("get-historical-options", lambda i: {
+        "symbol": _symbol(i), "date": "2024-02-20", "sort_by": "volume", "sort_order": "desc"}),
+    "options-filtered": ("get-historical-options", lambda i: {
+        "symbol": _symbol(i), "date": "2024-02-20", "contract_type": "call", "min_volume": 1000,
+        "delta_min": 0.3, "delta_max": 0.7, "limit": 25}),
+    "crypto-rate": ("get-crypto-exchange-rate", lambda i: {"crypto_symbol": f"C{i % 64:02d}"}),
+    "crypto-daily": ("get-crypto-daily", lambda i: {"symbol": f"C{i % 64:02d}"}),
+    "crypto-weekly": ("get-crypto-weekly", lambda i: {"symbol": f"C{i % 64:02d}"}),
+    "crypto-monthly": ("get-crypto-monthly", lambda i: {"symbol": f"C{i % 64:02d}"}),
+}
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(int(round(fraction * len(sorted_values) + 0.5)) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+
+async def run_scenario(server: Any, tool: str, arguments: Arguments, iterations: int, concurrency: int) -> Dict[str, Any]:
+    latencies: List[float] = []
+    errors = 0
+    next_call = 0
+
+    async def worker() -> None:
+        nonlocal next_call, errors
+        while next_call < iterations:
+            i = next_call
+            next_call += 1
+            started = time.perf_counter()
+            result = await server.handle_call_tool(tool, arguments(i))
+            latencies.append(time.perf_counter() - started)
+            if "Error:" in result[0].text:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 3),
+        "throughput_rps": round(iterations / elapsed, 1),
+        "errors": errors,
+    }
+
+
+async def peak_memory(server: Any, tool: str, arguments: Arguments) -> int:
+    """Peak Python heap allocated while serving one call, in KB."""
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        baseline, _ = tracemalloc.get_traced_memory()
+        await server.handle_call_tool(tool, arguments(10_000))
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return (peak - baseline) // 1024
+
+
+def configure_environment(args: argparse.Namespace) -> None:
+    # Read at import time by the server modules, so this runs before importing them
+    os.environ.setdefault("ALPHA_VANTAGE_API_KEY", "benchmark")
+    os.environ["ALPHA_VANTAGE_CALLS_PER_MINUTE"] = "0"
+    os.environ["ALPHA_VANTAGE_CACHE"] = "1" if args.cache else "0"
+    os.environ["ALPHA_VANTAGE_STORE"] = "1" if args.store else "0"
+    os.environ["ALPHA_VANTAGE_DATA_DIR"] = tempfile.mkdtemp(prefix="alpha_vantage_bench_")
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+
+def baseline_path(cache: bool, store: bool) -> str:
+    suffix = ("-cache" if cache else "") + ("-store" if store else "")
+    return os.path.join(BASELINE_DIR, f"baseline{suffix}.json")
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], tolerance: float, min_delta_ms: float) -> List[str]:
+    regressions = []
+    for name, current in results["scenarios"].items():
+        previous = baseline["scenarios"].get(name)
+        if previous is None:
+            continue
+        for metric in ("p50_ms", "p99_ms"):
+            limit = previous[metric] * (1 + tolerance)
+            if current[metric] > limit and current[metric] - previous[metric] > min_delta_ms:
+                regressions.append(f"{name}: {metric} {current[metric]:.3f} > {previous[metric]:.3f}")
+        if current["throughput_rps"] < previous["throughput_rps"] / (1 + tolerance):
+            regressions.append(f"{name}: throughput_rps {current['throughput_rps']} < {previous['throughput_rps']}")
+        if current["peak_kb"] > previous["peak_kb"] * (1 + tolerance) and current["peak_kb"] - previous["peak_kb"] > 64:
+            regressions.append(f"{name}: peak_kb {current['peak_kb']} > {previous['peak_kb']}")
+    return regressions
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    configure_environment(args)
+    from alpha_vantage_mcp import server, tools
+    from standin import StandIn
+
+    stand_in = StandIn(
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        note_rate=args.note_rate,
+        payload_dir=args.payloads,
+    )
+    server.http_client = tools.create_http_client(transport=stand_in.transport())
+
+    names = args.scenario or list(SCENARIOS)
+    results: Dict[str, Any] = {}
+    print(f"{'scenario':<20} {'p50 ms':>9} {'p99 ms':>9} {'req/s':>9} {'peak KB':>9} {'errors':>7}")
+    try:
+        for name in names:
+            tool, arguments = SCENARIOS[name]
+            # One untimed pass builds the memoized payloads and warms imports
+            await run_scenario(server, tool, arguments, min(args.iterations, 64), args.concurrency)
+            result = await run_scenario(server, tool, arguments, args.iterations, args.concurrency)
+            result["peak_kb"] = await peak_memory(server, tool, arguments)
+            results[name] = result
+            print(f"{name:<20} {result['p50_ms']:>9.3f} {result['p99_ms']:>9.3f} {result['throughput_rps']:>9.1f} "
+                  f"{result['peak_kb']:>9} {result['errors']:>7}")
+    finally:
+        await server.http_client.aclose()
+        server.http_client = None
+
+    return {
+        "settings": {
+            "iterations": args.iterations,
+            "concurrency": args.concurrency,
+            "latency": args.latency,
+            "jitter": args.jitter,
+            "error_rate": args.error_rate,
+            "note_rate": args.note_rate,
+            "cache": args.cache,
+            "store": args.store,
+        },
+        "python": platform.python_version(),
+        "stand_in": stand_in.stats(),
+        "scenarios": results,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenario", action="append", choices=list(SCENARIOS), help="run only this scenario (repeatable)")
+    parser.add_argument("--iterations", type=int, default=100, help="timed calls per scenario")
+    parser.add_argument("--concurrency", type=int, default=8, help="calls in flight at once")
+    parser.add_argument("--latency", type=float, default=0.0, help="stand-in response latency in seconds")
+    parser.add_argument("--jitter", type=float, default=0.0, help="standard deviation of the latency in seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered with a 429")
+    parser.add_argument("--note-rate", type=float, default=0.0, help="fraction of requests answered with a throttle Note")
+    parser.add_argument("--payloads", help="directory of recorded <FUNCTION>.json responses to serve")
+    parser.add_argument("--cache", action="store_true", help="keep the response cache on")
+    parser.add_argument("--store", action="store_true", help="keep the SQLite daily store on")
+    parser.add_argument("--output", help="write the results as JSON to this path")
+    parser.add_argument("--baseline", help="baseline results to compare against, by default the one for --cache and --store")
+    parser.add_argument("--update-baseline", action="store_true", help="overwrite the baseline with these results")
+    parser.add_argument("--no-check", action="store_true", help="report only, don't compare with the baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed relative slowdown before failing")
+    parser.add_argument("--min-delta-ms", type=float, default=1.0, help="ignore latency changes smaller than this")
+    args = parser.parse_args()
+
+    if args.baseline is None:
+        args.baseline = baseline_path(args.cache, args.store)
+    results = asyncio.run(run(args))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.update_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent=2)
+            f.write("\n")
+        print(f"baseline written to {args.baseline}")
+        return
+    if args.no_check or not os.path.exists(args.baseline):
+        return
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    if baseline["settings"] != results["settings"]:
+        print("baseline was recorded with different settings, skipping the comparison")
+        return
+    regressions = compare(results, baseline, args.tolerance, args.min_delta_ms)
+    if regressions:
+        print("regressions against the baseline:")
+        for regression in regressions:
+            print(f"  {regression}")
+        sys.exit(1)
+    print("no regressions against the baseline")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,16 @@
 from . import server
+import argparse
 import asyncio
 
 def main():
     """Main entry point for the package."""
-    asyncio.run(server.main())
+    parser = argparse.ArgumentParser(prog="alpha-vantage-mcp", description="Alpha Vantage MCP server")
+    parser.add_argument("--transport", choices=["stdio", "sse"], default=server.TRANSPORT,
+                        help="stdio for a single client, sse to serve many clients over HTTP")
+    parser.add_argument("--host", default=server.HTTP_HOST, help="address to listen on with --transport sse")
+    parser.add_argument("--port", type=int, default=server.HTTP_PORT, help="port to listen on with --transport sse")
+    args = parser.parse_args()
+    asyncio.run(server.main(args.transport, args.host, args.port))
 
 # Optionally expose other important items at package level
-__all__ = ['main', 'server']
\ No newline at end of file
+__all__ = ['main', 'server']
@@ -0,0 +1,231 @@
+from collections import OrderedDict
+from contextvars import ContextVar
+from datetime import date, datetime, time as dt_time, timedelta
+from typing import Any, Dict, Hashable, List, Optional, Set, Tuple
+from zoneinfo import ZoneInfo
+import os
+import time
+
+CACHE_ENABLED = os.getenv('ALPHA_VANTAGE_CACHE', '1').lower() not in ('0', 'false', 'no')
+CACHE_MAX_ENTRIES = int(os.getenv('ALPHA_VANTAGE_CACHE_MAX_ENTRIES', '1024'))
+CACHE_MAX_BYTES = int(os.getenv('ALPHA_VANTAGE_CACHE_MAX_BYTES', str(256 * 1024 * 1024)))
+OPTIONS_CACHE_MAX_ENTRIES = int(os.getenv('ALPHA_VANTAGE_OPTIONS_CACHE_MAX_ENTRIES', '256'))
+OPTIONS_CACHE_MAX_BYTES = int(os.getenv('ALPHA_VANTAGE_OPTIONS_CACHE_MAX_BYTES', str(128 * 1024 * 1024)))
+
+MARKET_TZ = ZoneInfo("America/New_York")
+MARKET_OPEN = dt_time(9, 30)
+MARKET_CLOSE = dt_time(16, 0)
+
+DEFAULT_TTL = 60.0
+DEFAULT_MAX_STALENESS = 3600.0
+
+# Set while the watchlist refreshes: lookups skip the cache, and the keys
+# fetched are pinned and collected here
+refreshing_keys: ContextVar[Optional[Set[Hashable]]] = ContextVar("refreshing_keys", default=None)
+# Per tool call: whether expired data may be served, and notes on the expired data that was
+allow_stale: ContextVar[bool] = ContextVar("allow_stale", default=True)
+stale_notes: ContextVar[Optional[List[str]]] = ContextVar("stale_notes", default=None)
+
+# Seconds a response stays fresh. Functions missing here use DEFAULT_TTL unless
+# ttl_for() has a calendar-based policy for them.
+FUNCTION_TTLS: Dict[str, float] = {
+    "GLOBAL_QUOTE": 15.0,
+    "CURRENCY_EXCHANGE_RATE": 15.0,
+    "OVERVIEW": 6 * 3600.0,
+    "DIGITAL_CURRENCY_DAILY": 3600.0,
+    "DIGITAL_CURRENCY_WEEKLY": 3600.0,
+    "DIGITAL_CURRENCY_MONTHLY": 3600.0,
+}
+
+
+# Oldest a response may be, counted from when it was fetched, to be served
+# after it expired: while it is refreshed, or when the upstream fails
+FUNCTION_MAX_STALENESS: Dict[str, float] = {
+    "GLOBAL_QUOTE": 300.0,
+    "CURRENCY_EXCHANGE_RATE": 300.0,
+    "OVERVIEW": 7 * 86400.0,
+    "TIME_SERIES_DAILY": 3 * 86400.0,
+    "DIGITAL_CURRENCY_DAILY": 86400.0,
+    "DIGITAL_CURRENCY_WEEKLY": 86400.0,
+    "DIGITAL_CURRENCY_MONTHLY": 86400.0,
+    "HISTORICAL_OPTIONS": 3 * 86400.0,
+}
+
+
+def _load_overrides(variable: str, target: Dict[str, float]) -> None:
+    # e.g. ALPHA_VANTAGE_CACHE_TTLS="GLOBAL_QUOTE=30,OVERVIEW=3600"
+    for item in os.getenv(variable, '').split(','):
+        function, _, seconds = item.partition('=')
+        if function.strip() and seconds.strip():
+            target[function.strip().upper()] = float(seconds)
+
+
+_load_overrides('ALPHA_VANTAGE_CACHE_TTLS', FUNCTION_TTLS)
+_load_overrides('ALPHA_VANTAGE_MAX_STALENESS', FUNCTION_MAX_STALENESS)
+
+
+def seconds_until_market_close(now: Optional[datetime] = None) -> float:
+    """Seconds until the next US equity market close (16:00 New York time, weekdays)."""
+    now = now or datetime.now(MARKET_TZ)
+    close = datetime.combine(now.date(), MARKET_CLOSE, tzinfo=MARKET_TZ)
+    if now >= close:
+        close += timedelta(days=1)
+    while close.weekday() >= 5:
+        close += timedelta(days=1)
+    return (close - now).total_seconds()
+
+
+def market_is_open(now: Optional[datetime] = None) -> bool:
+    """Whether the US equity market is in its regular session (holidays are not known)."""
+    now = now or datetime.now(MARKET_TZ)
+    return now.weekday() < 5 and MARKET_OPEN <= now.time() < MARKET_CLOSE
+
+
+def seconds_until_market_open(now: Optional[datetime] = None) -> float:
+    """Seconds until the next regular session opens (09:30 New York time, weekdays)."""
+    now = now or datetime.now(MARKET_TZ)
+    opening = datetime.combine(now.date(), MARKET_OPEN, tzinfo=MARKET_TZ)
+    if now >= opening:
+        opening += timedelta(days=1)
+    while opening.weekday() >= 5:
+        opening += timedelta(days=1)
+    return (opening - now).total_seconds()
+
+
+def ttl_for(function: str, params: Dict[str, Any]) -> Optional[float]:
+    """Freshness policy for an upstream function. None means the response never expires."""
+    if function == "HISTORICAL_OPTIONS":
+        requested = params.get("date")
+        if requested:
+            try:
+                if date.fromisoformat(requested) < datetime.now(MARKET_TZ).date():
+                    return None
+            except ValueError:
+                pass
+        return seconds_until_market_close()
+    if function == "TIME_SERIES_DAILY":
+        return seconds_until_market_close()
+    return FUNCTION_TTLS.get(function, DEFAULT_TTL)
+
+
+def max_staleness_for(function: str) -> float:
+    return FUNCTION_MAX_STALENESS.get(function, DEFAULT_MAX_STALENESS)
+
+
+def make_cache_key(params: Dict[str, Any]) -> Tuple[Tuple[str, str], ...]:
+    return tuple(sorted((k, str(v)) for k, v in params.items() if k != "apikey"))
+
+
+class Stale:
+    """An expired cached value standing in for a failed upstream request."""
+
+    __slots__ = ("value", "age", "error")
+
+    def __init__(self, value: Any, age: float, error: str):
+        self.value = value
+        self.age = age
+        self.error = error
+
+
+class CacheEntry:
+    __slots__ = ("value", "size", "stored_at", "expires_at")
+
+    def __init__(self, value: Any, size: int, stored_at: float, expires_at: Optional[float]):
+        self.value = value
+        self.size = size
+        self.stored_at = stored_at
+        self.expires_at = expires_at
+
+
+class ResponseCache:
+    """Bounded LRU cache with per-entry expiry and a memory cap.
+
+    Pinned keys are never evicted, but expire like any other entry; an expired
+    pinned value is only served through get_stale(), within the caller's
+    staleness limit. Whoever pins a key is responsible for refreshing it.
+    """
+
+    def __init__(self, max_entries: int = CACHE_MAX_ENTRIES, max_bytes: int = CACHE_MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Hashable, CacheEntry]" = OrderedDict()
+        self._bytes = 0
+        self._pinned: Set[Hashable] = set()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.stale_hits = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Any:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        if entry.expires_at is not None and entry.expires_at <= time.monotonic():
+            # Expired entries stay until evicted so get_stale() can fall back on them
+            self.expirations += 1
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry.value
+
+    def get_stale(self, key: Hashable, max_age: Optional[float] = None) -> Optional[Tuple[Any, float]]:
+        """The cached value and its age in seconds, even if it has expired, unless it is older than max_age."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        age = time.monotonic() - entry.stored_at
+        if max_age is not None and age > max_age:
+            return None
+        self._entries.move_to_end(key)
+        self.stale_hits += 1
+        return entry.value, age
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float], size: int) -> None:
+        if size > self.max_bytes or (ttl is not None and ttl <= 0):
+            return
+        if key in self._entries:
+            self._remove(key)
+        now = time.monotonic()
+        self._entries[key] = CacheEntry(value, size, now, None if ttl is None else now + ttl)
+        self._bytes += size
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            oldest = next((key for key in self._entries if key not in self._pinned), None)
+            if oldest is None:
+                break
+            self._remove(oldest)
+            self.evictions += 1
+
+    def pin(self, key: Hashable) -> None:
+        self._pinned.add(key)
+
+    def unpin(self, key: Hashable) -> None:
+        self._pinned.discard(key)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "stale_hits": self.stale_hits,
+            "pinned": len(self._pinned),
+        }
+
+    def _remove(self, key: Hashable) -> None:
+        entry = self._entries.pop(key)
+        self._bytes -= entry.size
+
+
+response_cache = ResponseCache()
+# Parsed options chains, kept apart so large chains don't evict everything else
+options_chain_cache = ResponseCache(OPTIONS_CACHE_MAX_ENTRIES, OPTIONS_CACHE_MAX_BYTES)
@@ -0,0 +1,207 @@
+from datetime import date
+from itertools import accumulate
+from math import isnan
+from typing import Dict, List, Optional, Tuple
+
+from .options import NAN, OptionsChain
+
+# Dollar gamma per 1% move in the underlying, for contracts on 100 shares
+CONTRACT_SIZE = 100
+
+# Per-strike accumulator slots: IV, price, open interest and gamma for the call, then for the put
+_IV, _PRICE, _OI, _GAMMA = range(4)
+_PUT = 4
+
+
+class ExpirationStats:
+    """One expiration's activity, at-the-money IV and max-pain strike."""
+
+    __slots__ = ("expiration", "days", "contracts", "call_volume", "put_volume", "call_oi", "put_oi", "atm_strike", "atm_iv", "max_pain")
+
+    def __init__(self, expiration: str, days: Optional[int]):
+        self.expiration = expiration
+        self.days = days
+        self.contracts = 0
+        self.call_volume = 0.0
+        self.put_volume = 0.0
+        self.call_oi = 0.0
+        self.put_oi = 0.0
+        self.atm_strike = NAN
+        self.atm_iv = NAN
+        self.max_pain = NAN
+
+
+class ChainAnalytics:
+    """Chain-level statistics computed from an OptionsChain.
+
+    `smiles` maps the nearest expirations to (strike, call IV, put IV) rows
+    around the money; `gamma_exposure` maps strikes to net dealer gamma in
+    dollars per 1% move, calls long and puts short.
+    """
+
+    __slots__ = ("message", "date", "spot", "spot_source", "contracts", "call_volume", "put_volume", "call_oi", "put_oi", "expirations", "smiles", "gamma_exposure")
+
+    def __init__(self, message: str, chain_date: str, spot: float, spot_source: str):
+        self.message = message
+        self.date = chain_date
+        self.spot = spot
+        self.spot_source = spot_source
+        self.contracts = 0
+        self.call_volume = 0.0
+        self.put_volume = 0.0
+        self.call_oi = 0.0
+        self.put_oi = 0.0
+        self.expirations: List[ExpirationStats] = []
+        self.smiles: Dict[str, List[Tuple[float, float, float]]] = {}
+        self.gamma_exposure: Dict[float, float] = {}
+
+    @property
+    def total_gamma_exposure(self) -> float:
+        return sum(self.gamma_exposure.values())
+
+    def top_gamma_strikes(self, count: int = 10) -> List[Tuple[float, float]]:
+        """The `count` strikes with the largest gamma exposure either way, by strike."""
+        largest = sorted(self.gamma_exposure.items(), key=lambda item: abs(item[1]), reverse=True)[:count]
+        return sorted(largest)
+
+
+def ratio(numerator: float, denominator: float) -> float:
+    return numerator / denominator if denominator else NAN
+
+
+def _price(mark: float, bid: float, ask: float, last: float) -> float:
+    if not isnan(mark):
+        return mark
+    if not (isnan(bid) or isnan(ask)):
+        return (bid + ask) / 2
+    return last
+
+
+def _zero(value: float) -> float:
+    return 0.0 if isnan(value) else value
+
+
+def _days_between(start: str, end: str) -> Optional[int]:
+    try:
+        return (date.fromisoformat(end) - date.fromisoformat(start)).days
+    except ValueError:
+        return None
+
+
+def _implied_spot(strikes: Dict[float, List[float]]) -> float:
+    """Put-call parity, S = K + C - P, at the strike where the call and put prices are closest."""
+    best = None
+    for strike, row in strikes.items():
+        call, put = row[_PRICE], row[_PUT + _PRICE]
+        if isnan(call) or isnan(put):
+            continue
+        if best is None or abs(call - put) < best[0]:
+            best = (abs(call - put), strike + call - put)
+    return NAN if best is None else best[1]
+
+
+def _max_pain(strikes: List[float], call_oi: List[float], put_oi: List[float]) -> float:
+    """The strike where expiring options pay their holders least in total.
+
+    With strikes sorted, the call payout at strike K is K * (call OI below K)
+    minus the OI-weighted sum of those strikes, and likewise for puts above
+    K, so prefix sums give every strike's payout in one pass.
+    """
+    call_count = list(accumulate(call_oi, initial=0.0))
+    call_weighted = list(accumulate((oi * k for oi, k in zip(call_oi, strikes)), initial=0.0))
+    put_count = list(accumulate(put_oi, initial=0.0))
+    put_weighted = list(accumulate((oi * k for oi, k in zip(put_oi, strikes)), initial=0.0))
+    best_strike, best_payout = NAN, None
+    for j, strike in enumerate(strikes):
+        calls = strike * call_count[j] - call_weighted[j]
+        puts = (put_weighted[-1] - put_weighted[j + 1]) - strike * (put_count[-1] - put_count[j + 1])
+        if best_payout is None or calls + puts < best_payout:
+            best_strike, best_payout = strike, calls + puts
+    return best_strike
+
+
+def analyze_chain(chain: OptionsChain, spot: Optional[float] = None, expirations: int = 4, strikes: int = 5) -> ChainAnalytics | str:
+    """Statistics for a whole chain from one pass over its columns.
+
+    The pass groups contracts by expiration and strike; every statistic is then
+    computed from those groups, which are far smaller than the chain. Without
+    `spot`, the underlying price is implied from the nearest expiration.
+    """
+    columns = chain.columns
+    types, expiration_column = columns["type"], columns["expiration"]
+    strike_column, volumes, open_interest = columns["strike"], columns["volume"], columns["open_interest"]
+    ivs, gammas = columns["implied_volatility"], columns["gamma"]
+    marks, bids, asks, lasts = columns["mark"], columns["bid"], columns["ask"], columns["last"]
+    # Types are interned, so this is a handful of lookups rather than one per contract
+    is_put = {value: value.lower() == "put" for value in set(types)}
+
+    chain_date = next((value for value in columns["date"] if value), "")
+    by_expiration: Dict[str, ExpirationStats] = {}
+    groups: Dict[str, Dict[float, List[float]]] = {}
+    for i in range(len(chain)):
+        strike = strike_column[i]
+        expiration = expiration_column[i]
+        if isnan(strike) or not expiration:
+            continue
+        stats = by_expiration.get(expiration)
+        if stats is None:
+            stats = by_expiration[expiration] = ExpirationStats(expiration, _days_between(chain_date, expiration))
+            groups[expiration] = {}
+        row = groups[expiration].get(strike)
+        if row is None:
+            row = groups[expiration][strike] = [NAN, NAN, 0.0, NAN] * 2
+        side = _PUT if is_put[types[i]] else 0
+        oi = _zero(open_interest[i])
+        row[side + _IV] = ivs[i]
+        row[side + _PRICE] = _price(marks[i], bids[i], asks[i], lasts[i])
+        row[side + _OI] += oi
+        row[side + _GAMMA] = gammas[i]
+        stats.contracts += 1
+        if side:
+            stats.put_volume += _zero(volumes[i])
+            stats.put_oi += oi
+        else:
+            stats.call_volume += _zero(volumes[i])
+            stats.call_oi += oi
+
+    if not groups:
+        return "No contracts with a strike and expiration in the chain"
+
+    ordered = sorted(groups)
+    spot_source = "given"
+    if spot is None:
+        spot_source = "implied by put-call parity"
+        spot = next((implied for implied in map(_implied_spot, (groups[e] for e in ordered)) if not isnan(implied)), NAN)
+        if isnan(spot):
+            return "Could not infer the underlying price from the chain; pass spot"
+
+    result = ChainAnalytics(chain.message, chain_date, spot, spot_source)
+    dollar_gamma = CONTRACT_SIZE * spot * spot * 0.01
+    for expiration in ordered:
+        stats = by_expiration[expiration]
+        rows = groups[expiration]
+        strike_list = sorted(rows)
+        result.contracts += stats.contracts
+        result.call_volume += stats.call_volume
+        result.put_volume += stats.put_volume
+        result.call_oi += stats.call_oi
+        result.put_oi += stats.put_oi
+
+        atm = min(strike_list, key=lambda strike: abs(strike - spot))
+        atm_ivs = [iv for iv in (rows[atm][_IV], rows[atm][_PUT + _IV]) if not isnan(iv)]
+        stats.atm_strike = atm
+        stats.atm_iv = sum(atm_ivs) / len(atm_ivs) if atm_ivs else NAN
+        stats.max_pain = _max_pain(strike_list, [rows[k][_OI] for k in strike_list], [rows[k][_PUT + _OI] for k in strike_list])
+        result.expirations.append(stats)
+
+        if len(result.smiles) < expirations:
+            middle = strike_list.index(atm)
+            result.smiles[expiration] = [
+                (strike, rows[strike][_IV], rows[strike][_PUT + _IV])
+                for strike in strike_list[max(0, middle - strikes):middle + strikes + 1]
+            ]
+
+        for strike, row in rows.items():
+            exposure = _zero(row[_GAMMA]) * row[_OI] - _zero(row[_PUT + _GAMMA]) * row[_PUT + _OI]
+            result.gamma_exposure[strike] = result.gamma_exposure.get(strike, 0.0) + exposure * dollar_gamma
+    return result
@@ -0,0 +1,147 @@
+from datetime import date
+from math import isnan
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+import csv
+import io
+import json
+
+from .chainstats import ChainAnalytics, ratio
+from .options import NUMERIC_FIELDS, TEXT_FIELDS, OptionsSelection
+from .portfolio import PortfolioAnalytics
+from .series import PriceSeries
+
+OUTPUT_FORMATS = ("text", "json", "csv")
+SERIES_COLUMNS = ("date", "open", "high", "low", "close", "volume")
+OPTIONS_COLUMNS = TEXT_FIELDS + tuple(NUMERIC_FIELDS)
+
+
+class Table:
+    """Rows under named columns plus a few descriptive fields.
+
+    Rendered as one CSV header and one line per row, or as JSON with the
+    fields, the column names once and the rows as arrays.
+    """
+
+    __slots__ = ("columns", "rows", "meta")
+
+    def __init__(self, columns: Sequence[str], rows: List[List[Any]], meta: Optional[Dict[str, Any]] = None):
+        self.columns = columns
+        self.rows = rows
+        self.meta = meta or {}
+
+
+def _number(value: float) -> Optional[float]:
+    # JSON has no NaN
+    return None if isnan(value) else value
+
+
+def series_table(series: PriceSeries, rows: Optional[int] = None, **meta: Any) -> Table:
+    """Newest bars first, like the text output."""
+    opens, highs, lows, closes, volumes = series.open, series.high, series.low, series.close, series.volume
+    return Table(SERIES_COLUMNS, [
+        [series.date_at(i), opens[i], highs[i], lows[i], closes[i], volumes[i]]
+        for i in series.newest_first(rows)
+    ], {"symbol": series.symbol, **meta})
+
+
+def indicators_table(series: PriceSeries, indicator_values: Dict[str, Any], rows: int = 5) -> Table:
+    labels = list(indicator_values)
+    columns = [indicator_values[label] for label in labels]
+    return Table(["date", "close"] + labels, [
+        [series.date_at(i), series.close[i]] + [_number(column[i]) for column in columns]
+        for i in series.newest_first(rows)
+    ], {"symbol": series.symbol, "bars": len(series)})
+
+
+def options_table(selection: OptionsSelection, **meta: Any) -> Table:
+    return Table(OPTIONS_COLUMNS, [
+        [contract.get(field) for field in OPTIONS_COLUMNS] for contract in selection.contracts
+    ], {"message": selection.message, "total": selection.total, **meta})
+
+
+def portfolio_table(analytics: PortfolioAnalytics) -> Table:
+    """One row per symbol: its statistics, then its correlation with each symbol."""
+    symbols = analytics.symbols
+    return Table(
+        ["symbol", "total_return", "annualized_return", "annualized_volatility", "max_drawdown", "current_drawdown", "beta"]
+        + [f"correlation_{symbol}" for symbol in symbols],
+        [
+            [symbol] + [_number(statistic[symbol]) for statistic in (
+                analytics.total_return, analytics.annualized_return, analytics.volatility,
+                analytics.max_drawdown, analytics.current_drawdown, analytics.beta,
+            )] + [_number(value) for value in correlations]
+            for symbol, correlations in zip(symbols, analytics.correlation)
+        ],
+        {
+            "start": date.fromordinal(analytics.dates[0]).isoformat(),
+            "end": date.fromordinal(analytics.dates[-1]).isoformat(),
+            "returns": analytics.bars - 1,
+            "benchmark": analytics.benchmark,
+            "errors": analytics.errors,
+        },
+    )
+
+
+def options_analytics_record(analytics: ChainAnalytics, gamma_strikes: int = 10) -> Dict[str, Any]:
+    """The chain summary as nested JSON-friendly fields; in CSV each becomes one field,value line."""
+    return {
+        "date": analytics.date,
+        "spot": analytics.spot,
+        "spot_source": analytics.spot_source,
+        "contracts": analytics.contracts,
+        "put_call_volume_ratio": _number(ratio(analytics.put_volume, analytics.call_volume)),
+        "put_call_open_interest_ratio": _number(ratio(analytics.put_oi, analytics.call_oi)),
+        "net_gamma_exposure": analytics.total_gamma_exposure,
+        "term_structure": {
+            stats.expiration: {
+                "days": stats.days,
+                "atm_strike": _number(stats.atm_strike),
+                "atm_iv": _number(stats.atm_iv),
+                "max_pain": _number(stats.max_pain),
+                "put_call_volume_ratio": _number(ratio(stats.put_volume, stats.call_volume)),
+                "put_call_open_interest_ratio": _number(ratio(stats.put_oi, stats.call_oi)),
+            }
+            for stats in analytics.expirations
+        },
+        "smiles": {
+            expiration: [[strike, _number(call_iv), _number(put_iv)] for strike, call_iv, put_iv in smile]
+            for expiration, smile in analytics.smiles.items()
+        },
+        "gamma_exposure": [[strike, exposure] for strike, exposure in analytics.top_gamma_strikes(gamma_strikes)],
+    }
+
+
+def _leaves(value: Any, path: Tuple[str, ...] = ()) -> Iterator[Tuple[str, Any]]:
+    if isinstance(value, dict):
+        for key, child in value.items():
+            yield from _leaves(child, path + (str(key),))
+    elif isinstance(value, list):
+        yield "/".join(path), json.dumps(value, separators=(",", ":"))
+    else:
+        yield "/".join(path), value
+
+
+def to_json(value: Table | Dict[str, Any]) -> str:
+    if isinstance(value, Table):
+        value = {**value.meta, "columns": list(value.columns), "rows": value.rows}
+    return json.dumps(value, separators=(",", ":"), default=str)
+
+
+def to_csv(value: Table | Dict[str, Any]) -> str:
+    """A table as one line per row; anything else as field,value lines with nested keys joined by '/'."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    if isinstance(value, Table):
+        writer.writerow(value.columns)
+        writer.writerows(value.rows)
+    else:
+        # Drop wrappers such as {"Global Quote": {...}} so field names stay short
+        while len(value) == 1 and isinstance(next(iter(value.values())), dict):
+            value = next(iter(value.values()))
+        writer.writerow(("field", "value"))
+        writer.writerows(_leaves(value))
+    return buffer.getvalue()
+
+
+def render(value: Table | Dict[str, Any], output_format: str) -> str:
+    return to_csv(value) if output_format == "csv" else to_json(value)
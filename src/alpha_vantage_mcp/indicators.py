@@ -0,0 +1,152 @@
+from array import array
+from math import sqrt
+from typing import Dict, Tuple
+
+NAN = float("nan")
+
+INDICATORS = ("sma", "ema", "rsi", "macd", "bbands")
+
+DEFAULT_PERIODS: Dict[str, float] = {
+    "sma_period": 20,
+    "ema_period": 20,
+    "rsi_period": 14,
+    "macd_fast": 12,
+    "macd_slow": 26,
+    "macd_signal": 9,
+    "bbands_period": 20,
+    "bbands_stddev": 2.0,
+}
+
+
+def _nan_array(length: int) -> array:
+    return array("d", [NAN]) * length
+
+
+def sma(values: array, period: int) -> array:
+    """Simple moving average; NaN until `period` values are available."""
+    result = _nan_array(len(values))
+    total = 0.0
+    for i, value in enumerate(values):
+        total += value
+        if i >= period:
+            total -= values[i - period]
+        if i >= period - 1:
+            result[i] = total / period
+    return result
+
+
+def ema(values: array, period: int) -> array:
+    """Exponential moving average seeded with the SMA of the first `period` values."""
+    result = _nan_array(len(values))
+    if len(values) < period:
+        return result
+    alpha = 2.0 / (period + 1)
+    current = sum(values[:period]) / period
+    result[period - 1] = current
+    for i in range(period, len(values)):
+        current += alpha * (values[i] - current)
+        result[i] = current
+    return result
+
+
+def rsi(values: array, period: int = 14) -> array:
+    """Relative strength index with Wilder's smoothing."""
+    result = _nan_array(len(values))
+    if len(values) <= period:
+        return result
+    gain = loss = 0.0
+    for i in range(1, period + 1):
+        change = values[i] - values[i - 1]
+        gain += max(change, 0.0)
+        loss += max(-change, 0.0)
+    gain /= period
+    loss /= period
+    result[period] = 100.0 if loss == 0 else 100.0 - 100.0 / (1.0 + gain / loss)
+    for i in range(period + 1, len(values)):
+        change = values[i] - values[i - 1]
+        gain = (gain * (period - 1) + max(change, 0.0)) / period
+        loss = (loss * (period - 1) + max(-change, 0.0)) / period
+        result[i] = 100.0 if loss == 0 else 100.0 - 100.0 / (1.0 + gain / loss)
+    return result
+
+
+def macd(values: array, fast: int = 12, slow: int = 26, signal: int = 9) -> Tuple[array, array, array]:
+    """MACD line, signal line and histogram."""
+    fast_ema = ema(values, fast)
+    slow_ema = ema(values, slow)
+    line = array("d", (f - s for f, s in zip(fast_ema, slow_ema)))
+
+    signal_line = _nan_array(len(values))
+    start = slow - 1
+    if len(values) > start:
+        signal_values = ema(line[start:], signal)
+        signal_line[start:] = signal_values
+    histogram = array("d", (m - s for m, s in zip(line, signal_line)))
+    return line, signal_line, histogram
+
+
+def bollinger_bands(values: array, period: int = 20, stddev: float = 2.0) -> Tuple[array, array, array]:
+    """Middle (SMA), upper and lower bands using the population standard deviation."""
+    middle = _nan_array(len(values))
+    upper = _nan_array(len(values))
+    lower = _nan_array(len(values))
+    total = total_sq = 0.0
+    for i, value in enumerate(values):
+        total += value
+        total_sq += value * value
+        if i >= period:
+            old = values[i - period]
+            total -= old
+            total_sq -= old * old
+        if i >= period - 1:
+            mean = total / period
+            deviation = sqrt(max(total_sq / period - mean * mean, 0.0))
+            middle[i] = mean
+            upper[i] = mean + stddev * deviation
+            lower[i] = mean - stddev * deviation
+    return middle, upper, lower
+
+
+def lookback(indicators: Tuple[str, ...], periods: Dict[str, float]) -> int:
+    """Number of bars needed before every requested indicator has a value."""
+    needed = 1
+    if "sma" in indicators:
+        needed = max(needed, int(periods["sma_period"]))
+    if "ema" in indicators:
+        needed = max(needed, int(periods["ema_period"]))
+    if "rsi" in indicators:
+        needed = max(needed, int(periods["rsi_period"]) + 1)
+    if "macd" in indicators:
+        needed = max(needed, int(periods["macd_slow"]) + int(periods["macd_signal"]) - 1)
+    if "bbands" in indicators:
+        needed = max(needed, int(periods["bbands_period"]))
+    return needed
+
+
+def compute_indicators(closes: array, indicators: Tuple[str, ...], periods: Dict[str, float]) -> Dict[str, array]:
+    """Compute the requested indicators over a close series, keyed by display label."""
+    results: Dict[str, array] = {}
+    if "sma" in indicators:
+        period = int(periods["sma_period"])
+        results[f"SMA({period})"] = sma(closes, period)
+    if "ema" in indicators:
+        period = int(periods["ema_period"])
+        results[f"EMA({period})"] = ema(closes, period)
+    if "rsi" in indicators:
+        period = int(periods["rsi_period"])
+        results[f"RSI({period})"] = rsi(closes, period)
+    if "macd" in indicators:
+        fast, slow, signal = int(periods["macd_fast"]), int(periods["macd_slow"]), int(periods["macd_signal"])
+        line, signal_line, histogram = macd(closes, fast, slow, signal)
+        label = f"({fast},{slow},{signal})"
+        results[f"MACD{label}"] = line
+        results[f"MACD Signal{label}"] = signal_line
+        results[f"MACD Histogram{label}"] = histogram
+    if "bbands" in indicators:
+        period, stddev = int(periods["bbands_period"]), float(periods["bbands_stddev"])
+        middle, upper, lower = bollinger_bands(closes, period, stddev)
+        label = f"({period},{stddev:g})"
+        results[f"Bollinger Upper{label}"] = upper
+        results[f"Bollinger Middle{label}"] = middle
+        results[f"Bollinger Lower{label}"] = lower
+    return results
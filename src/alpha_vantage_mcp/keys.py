@@ -0,0 +1,137 @@
+from collections import deque
+from datetime import datetime, timezone
+from typing import Any, Deque, Dict, List, Optional
+import os
+import time
+
+# Keys come from ALPHA_VANTAGE_API_KEY, a comma-separated ALPHA_VANTAGE_API_KEYS
+# and a file with one key per line (blank lines and # comments are skipped)
+API_KEYS_FILE = os.getenv('ALPHA_VANTAGE_API_KEYS_FILE', '')
+KEY_COOLDOWN = float(os.getenv('ALPHA_VANTAGE_KEY_COOLDOWN', '60'))
+# Per-key quota, the same settings the rate scheduler multiplies by the pool size
+KEY_CALLS_PER_MINUTE = float(os.getenv('ALPHA_VANTAGE_CALLS_PER_MINUTE', '0'))
+KEY_CALLS_PER_DAY = int(os.getenv('ALPHA_VANTAGE_CALLS_PER_DAY', '0'))
+
+
+def load_api_keys() -> List[str]:
+    keys = [os.getenv('ALPHA_VANTAGE_API_KEY', '')]
+    keys.extend(os.getenv('ALPHA_VANTAGE_API_KEYS', '').split(','))
+    if API_KEYS_FILE:
+        with open(os.path.expanduser(API_KEYS_FILE)) as keys_file:
+            keys.extend(line.split('#', 1)[0] for line in keys_file)
+    # Keep the first occurrence of each key, in order
+    return list(dict.fromkeys(key.strip() for key in keys if key.strip()))
+
+
+class ApiKey:
+    """Usage and health of one API key."""
+
+    __slots__ = ("key", "label", "recent", "day", "used_today", "requests", "rate_limited", "cooldown_until")
+
+    def __init__(self, key: str, label: str):
+        self.key = key
+        self.label = label
+        # Send times within the last minute
+        self.recent: Deque[float] = deque()
+        self.day = datetime.now(timezone.utc).date()
+        self.used_today = 0
+        self.requests = 0
+        self.rate_limited = 0
+        self.cooldown_until = 0.0
+
+    def calls_last_minute(self, now: float) -> int:
+        while self.recent and self.recent[0] <= now - 60.0:
+            self.recent.popleft()
+        return len(self.recent)
+
+    def cooling_for(self, now: float) -> float:
+        return max(0.0, self.cooldown_until - now)
+
+    def roll_day(self) -> None:
+        today = datetime.now(timezone.utc).date()
+        if today != self.day:
+            self.day = today
+            self.used_today = 0
+
+
+class KeyPool:
+    """API keys with per-key accounting and least-loaded selection.
+
+    A key that receives a 429 or a quota notice cools down for `cooldown`
+    seconds and is skipped while other keys are available.
+    """
+
+    def __init__(self, keys: List[str], per_minute: float = KEY_CALLS_PER_MINUTE, per_day: int = KEY_CALLS_PER_DAY, cooldown: float = KEY_COOLDOWN):
+        # Labels are by position only, so stats never reveal any part of a key
+        self.keys = [ApiKey(key, f"key-{i + 1}") for i, key in enumerate(keys)]
+        self._by_key = {api_key.key: api_key for api_key in self.keys}
+        self.per_minute = per_minute
+        self.per_day = per_day
+        self.cooldown = cooldown
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def _usable(self, now: float) -> List[ApiKey]:
+        usable = []
+        for api_key in self.keys:
+            api_key.roll_day()
+            if api_key.cooling_for(now) == 0.0 and not (self.per_day and api_key.used_today >= self.per_day):
+                usable.append(api_key)
+        return usable
+
+    def available(self) -> int:
+        return len(self._usable(time.monotonic()))
+
+    def acquire(self) -> Optional[ApiKey]:
+        """Pick the key with the fewest calls in the last minute and record one call on it.
+
+        When every key is cooling down or spent for the day, the one that
+        recovers first is used rather than failing the request.
+        """
+        if not self.keys:
+            return None
+        now = time.monotonic()
+        candidates = self._usable(now) or sorted(self.keys, key=lambda api_key: api_key.cooldown_until)[:1]
+        api_key = min(candidates, key=lambda candidate: (candidate.calls_last_minute(now), candidate.used_today))
+        api_key.recent.append(now)
+        api_key.used_today += 1
+        api_key.requests += 1
+        return api_key
+
+    def cool_down(self, key: Optional[str]) -> None:
+        """Rest a key after the upstream said it is over quota."""
+        api_key = self._by_key.get(key or "")
+        if api_key is not None:
+            api_key.rate_limited += 1
+            api_key.cooldown_until = time.monotonic() + self.cooldown
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        usable = self._usable(now)
+        details = []
+        for api_key in self.keys:
+            if api_key.cooling_for(now):
+                state = "cooling"
+            elif api_key in usable:
+                state = "healthy"
+            else:
+                state = "exhausted"
+            details.append({
+                "label": api_key.label,
+                "state": state,
+                "calls_last_minute": api_key.calls_last_minute(now),
+                "used_today": api_key.used_today,
+                "requests": api_key.requests,
+                "rate_limited": api_key.rate_limited,
+                "cooldown_remaining": round(api_key.cooling_for(now), 1),
+            })
+        return {
+            "keys": len(self.keys),
+            "available": len(usable),
+            "rate_limited": sum(api_key.rate_limited for api_key in self.keys),
+            "details": details,
+        }
+
+
+key_pool = KeyPool(load_api_keys())
@@ -0,0 +1,202 @@
+from bisect import bisect_left
+from typing import Any, Dict, List, Optional, Tuple
+import os
+import time
+
+import httpx
+
+METRICS_ENABLED = os.getenv('ALPHA_VANTAGE_METRICS', '1').lower() not in ('0', 'false', 'no')
+
+# Upper bounds in seconds, as in a Prometheus histogram; the last bucket is +Inf
+LATENCY_BUCKETS: Tuple[float, ...] = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0,
+)
+
+# Stages timed for every tool call and every upstream function
+TOOL_STAGES = ("total", "fetch", "format")
+UPSTREAM_STAGES = ("queue_wait", "upstream", "decode")
+
+
+def error_class(e: Exception) -> str:
+    if isinstance(e, httpx.TimeoutException):
+        return "timeout"
+    if isinstance(e, httpx.ConnectError):
+        return "connect"
+    if isinstance(e, httpx.HTTPStatusError):
+        return "http_error"
+    return "other"
+
+
+class Histogram:
+    """Fixed-bucket latency histogram; observing is a bisect and two additions."""
+
+    __slots__ = ("counts", "count", "sum", "max")
+
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds: float) -> None:
+        self.counts[bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def quantile(self, q: float) -> float:
+        """Estimate a quantile by interpolating inside the bucket that holds it."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, bucket_count in enumerate(self.counts):
+            if bucket_count and seen + bucket_count >= rank:
+                lower = LATENCY_BUCKETS[i - 1] if i > 0 else 0.0
+                upper = LATENCY_BUCKETS[i] if i < len(LATENCY_BUCKETS) else LATENCY_BUCKETS[-1]
+                # Never report more than was actually observed
+                return min(lower + (upper - lower) * (rank - seen) / bucket_count, self.max)
+            seen += bucket_count
+        return self.max
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "mean_ms": round(self.sum / self.count * 1000, 3) if self.count else 0.0,
+            "p50_ms": round(self.quantile(0.50) * 1000, 3),
+            "p99_ms": round(self.quantile(0.99) * 1000, 3),
+            "max_ms": round(self.max * 1000, 3),
+        }
+
+
+class Series:
+    """Histograms and counters for one tool or one upstream function."""
+
+    __slots__ = ("stages", "counters")
+
+    def __init__(self, stages: Tuple[str, ...]):
+        self.stages = {stage: Histogram() for stage in stages}
+        self.counters: Dict[str, int] = {}
+
+
+class Metrics:
+    """Hot-path timings and error counters per tool name and per Alpha Vantage function."""
+
+    def __init__(self, enabled: bool = METRICS_ENABLED):
+        self.enabled = enabled
+        self.started = time.time()
+        self.tools: Dict[str, Series] = {}
+        self.functions: Dict[str, Series] = {}
+
+    def _tool(self, name: str) -> Series:
+        series = self.tools.get(name)
+        if series is None:
+            series = self.tools[name] = Series(TOOL_STAGES)
+        return series
+
+    def _function(self, function: str) -> Series:
+        series = self.functions.get(function)
+        if series is None:
+            series = self.functions[function] = Series(UPSTREAM_STAGES)
+        return series
+
+    def observe_tool(self, name: str, stage: str, seconds: float) -> None:
+        if self.enabled:
+            self._tool(name).stages[stage].observe(seconds)
+
+    def count_tool(self, name: str, counter: str, amount: int = 1) -> None:
+        if self.enabled:
+            counters = self._tool(name).counters
+            counters[counter] = counters.get(counter, 0) + amount
+
+    def observe_upstream(self, function: str, stage: str, seconds: float) -> None:
+        if self.enabled:
+            self._function(function).stages[stage].observe(seconds)
+
+    def count_upstream(self, function: str, counter: str, amount: int = 1) -> None:
+        if self.enabled:
+            counters = self._function(function).counters
+            counters[counter] = counters.get(counter, 0) + amount
+
+    def upstream_quantile(self, function: str, q: float, min_samples: int = 1) -> Optional[float]:
+        """Round-trip quantile for a function, or None until enough requests were timed."""
+        series = self.functions.get(function)
+        if series is None or series.stages["upstream"].count < min_samples:
+            return None
+        return series.stages["upstream"].quantile(q)
+
+    def snapshot(self) -> Dict[str, Any]:
+        def describe(group: Dict[str, Series]) -> Dict[str, Any]:
+            return {
+                name: {
+                    "counters": dict(series.counters),
+                    **{stage: histogram.summary() for stage, histogram in series.stages.items() if histogram.count},
+                }
+                for name, series in sorted(group.items())
+            }
+
+        return {
+            "uptime_seconds": round(time.time() - self.started, 1),
+            "tools": describe(self.tools),
+            "functions": describe(self.functions),
+        }
+
+    def prometheus(self, gauges: Optional[Dict[str, Dict[str, Any]]] = None) -> str:
+        """Render everything in the Prometheus text exposition format.
+
+        `gauges` maps a component name (e.g. "response_cache") to a flat dict of
+        numeric stats, exported as alpha_vantage_<component>_<stat>.
+        """
+        lines: List[str] = []
+        self._render_histograms(lines, "alpha_vantage_tool_seconds", "Tool call latency by stage", "tool", self.tools)
+        self._render_counters(lines, "alpha_vantage_tool", "tool", self.tools)
+        self._render_histograms(lines, "alpha_vantage_upstream_seconds", "Upstream request latency by stage", "function", self.functions)
+        self._render_counters(lines, "alpha_vantage_upstream", "function", self.functions)
+        for component, stats in (gauges or {}).items():
+            for stat, value in stats.items():
+                if isinstance(value, bool) or not isinstance(value, (int, float)):
+                    continue
+                metric = f"alpha_vantage_{component}_{stat}"
+                lines.append(f"# TYPE {metric} gauge")
+                lines.append(f"{metric} {value}")
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def _render_histograms(lines: List[str], metric: str, help_text: str, label: str, group: Dict[str, Series]) -> None:
+        lines.append(f"# HELP {metric} {help_text}")
+        lines.append(f"# TYPE {metric} histogram")
+        for name, series in sorted(group.items()):
+            for stage, histogram in series.stages.items():
+                if not histogram.count:
+                    continue
+                labels = f'{label}="{name}",stage="{stage}"'
+                cumulative = 0
+                for bound, bucket_count in zip(LATENCY_BUCKETS, histogram.counts):
+                    cumulative += bucket_count
+                    lines.append(f'{metric}_bucket{{{labels},le="{bound:g}"}} {cumulative}')
+                lines.append(f'{metric}_bucket{{{labels},le="+Inf"}} {histogram.count}')
+                lines.append(f"{metric}_sum{{{labels}}} {histogram.sum:.6f}")
+                lines.append(f"{metric}_count{{{labels}}} {histogram.count}")
+
+    @staticmethod
+    def _render_counters(lines: List[str], prefix: str, label: str, group: Dict[str, Series]) -> None:
+        names = sorted({counter for series in group.values() for counter in series.counters})
+        plain = [counter for counter in names if not counter.startswith("error_")]
+        for counter in plain:
+            metric = f"{prefix}_{counter}_total"
+            lines.append(f"# TYPE {metric} counter")
+            for name, series in sorted(group.items()):
+                if counter in series.counters:
+                    lines.append(f'{metric}{{{label}="{name}"}} {series.counters[counter]}')
+        # Error classes become a label of one counter rather than separate metrics
+        if len(plain) < len(names):
+            metric = f"{prefix}_failures_total"
+            lines.append(f"# TYPE {metric} counter")
+            for name, series in sorted(group.items()):
+                for counter, value in sorted(series.counters.items()):
+                    if counter.startswith("error_"):
+                        lines.append(f'{metric}{{{label}="{name}",error="{counter[len("error_"):]}"}} {value}')
+
+
+metrics = Metrics()
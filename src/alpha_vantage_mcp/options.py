@@ -0,0 +1,237 @@
+from array import array
+from math import isnan
+from typing import Any, Dict, List, Optional, Tuple
+import sys
+
+NAN = float("nan")
+
+# Display format per numeric field, matching how Alpha Vantage writes them
+NUMERIC_FIELDS: Dict[str, str] = {
+    "strike": "{:.2f}",
+    "last": "{:.2f}",
+    "mark": "{:.2f}",
+    "bid": "{:.2f}",
+    "bid_size": "{:.0f}",
+    "ask": "{:.2f}",
+    "ask_size": "{:.0f}",
+    "volume": "{:.0f}",
+    "open_interest": "{:.0f}",
+    "implied_volatility": "{:.5f}",
+    "delta": "{:.5f}",
+    "gamma": "{:.5f}",
+    "theta": "{:.5f}",
+    "vega": "{:.5f}",
+    "rho": "{:.5f}",
+}
+TEXT_FIELDS = ("contractID", "symbol", "expiration", "type", "date")
+# Low-cardinality text columns share one string object per distinct value
+_INTERNED_FIELDS = ("symbol", "expiration", "type", "date")
+
+
+def _to_float(value: Any) -> float:
+    if value is None:
+        return NAN
+    try:
+        if isinstance(value, str):
+            value = value.replace('$', '').replace('%', '')
+        return float(value)
+    except (ValueError, TypeError):
+        return NAN
+
+
+class ContractFilter:
+    """Server-side contract filters, applied before sorting and the limit.
+
+    A contract whose field is missing or not numeric fails any numeric bound
+    on that field.
+    """
+
+    __slots__ = (
+        "contract_type", "expiration_from", "expiration_to", "strike_min", "strike_max",
+        "min_volume", "min_open_interest", "delta_min", "delta_max",
+    )
+
+    def __init__(
+        self,
+        contract_type: Optional[str] = None,
+        expiration_from: Optional[str] = None,
+        expiration_to: Optional[str] = None,
+        strike_min: Optional[float] = None,
+        strike_max: Optional[float] = None,
+        min_volume: Optional[float] = None,
+        min_open_interest: Optional[float] = None,
+        delta_min: Optional[float] = None,
+        delta_max: Optional[float] = None,
+    ):
+        self.contract_type = contract_type.lower() if contract_type else None
+        self.expiration_from = expiration_from
+        self.expiration_to = expiration_to
+        self.strike_min = strike_min
+        self.strike_max = strike_max
+        self.min_volume = min_volume
+        self.min_open_interest = min_open_interest
+        self.delta_min = delta_min
+        self.delta_max = delta_max
+
+    @property
+    def active(self) -> bool:
+        return any(getattr(self, name) is not None for name in self.__slots__)
+
+    def describe(self) -> str:
+        return ", ".join(
+            f"{name}={getattr(self, name)}" for name in self.__slots__ if getattr(self, name) is not None
+        )
+
+    def mask(self, chain: "OptionsChain") -> bytearray:
+        """One byte per contract, 1 where the contract passes every filter."""
+        result = bytearray(b"\x01") * len(chain)
+        columns = chain.columns
+
+        if self.contract_type is not None:
+            types = columns["type"]
+            for i in range(len(result)):
+                if types[i].lower() != self.contract_type:
+                    result[i] = 0
+
+        if self.expiration_from is not None or self.expiration_to is not None:
+            low = self.expiration_from or ""
+            high = self.expiration_to or "\uffff"
+            expirations = columns["expiration"]
+            for i in range(len(result)):
+                if not (expirations[i] and low <= expirations[i] <= high):
+                    result[i] = 0
+
+        for field, low, high in (
+            ("strike", self.strike_min, self.strike_max),
+            ("volume", self.min_volume, None),
+            ("open_interest", self.min_open_interest, None),
+            ("delta", self.delta_min, self.delta_max),
+        ):
+            if low is None and high is None:
+                continue
+            low = float("-inf") if low is None else low
+            high = float("inf") if high is None else high
+            values = columns[field]
+            for i in range(len(result)):
+                # NaN fails both comparisons, so missing values are filtered out
+                if not (low <= values[i] <= high):
+                    result[i] = 0
+
+        return result
+
+
+class OptionsSelection:
+    """The contracts of an options chain that survived selection, already in display order."""
+
+    __slots__ = ("message", "total", "contracts")
+
+    def __init__(self, message: str, total: int, contracts: List[Dict[str, Any]]):
+        self.message = message
+        self.total = total
+        self.contracts = contracts
+
+
+class OptionsChain:
+    """Struct-of-arrays options chain with lazily built, reusable sort indexes.
+
+    Numeric fields are float64 arrays (NaN when missing); text fields are
+    lists of strings. A sort index per (field, order) is built on first use
+    and kept, so later queries with any sort, limit or filter only walk the
+    first matching entries of an existing index.
+    """
+
+    __slots__ = ("message", "columns", "_interned", "_text_bytes", "_indexes", "_masks")
+
+    def __init__(self, message: str = "N/A"):
+        self.message = message
+        self.columns: Dict[str, Any] = {field: array("d") for field in NUMERIC_FIELDS}
+        self.columns.update({field: [] for field in TEXT_FIELDS})
+        self._interned: Dict[str, str] = {}
+        self._text_bytes = 0
+        self._indexes: Dict[Tuple[str, bool], array] = {}
+        self._masks: Dict[str, bytearray] = {}
+
+    @classmethod
+    def from_contracts(cls, contracts: List[Dict[str, Any]], message: str = "N/A") -> "OptionsChain":
+        chain = cls(message)
+        for contract in contracts:
+            chain.add(contract)
+        return chain
+
+    def __len__(self) -> int:
+        return len(self.columns["contractID"])
+
+    def add(self, contract: Dict[str, Any], size: int = 0) -> None:
+        columns = self.columns
+        for field in NUMERIC_FIELDS:
+            columns[field].append(_to_float(contract.get(field)))
+        for field in TEXT_FIELDS:
+            value = str(contract.get(field, ""))
+            if field in _INTERNED_FIELDS:
+                value = self._interned.setdefault(value, value)
+            else:
+                self._text_bytes += sys.getsizeof(value)
+            columns[field].append(value)
+        self._indexes.clear()
+        self._masks.clear()
+
+    @property
+    def nbytes(self) -> int:
+        numeric = sum(self.columns[field].itemsize * len(self.columns[field]) for field in NUMERIC_FIELDS)
+        pointers = 8 * len(TEXT_FIELDS) * len(self)
+        index_bytes = sum(index.itemsize * len(index) for index in self._indexes.values())
+        return numeric + pointers + self._text_bytes + index_bytes
+
+    def contract(self, i: int) -> Dict[str, Any]:
+        columns = self.columns
+        contract = {field: columns[field][i] for field in TEXT_FIELDS}
+        for field, fmt in NUMERIC_FIELDS.items():
+            value = columns[field][i]
+            if not isnan(value):
+                contract[field] = fmt.format(value)
+        return contract
+
+    def sort_index(self, sort_by: str, descending: bool = False) -> array:
+        key = (sort_by, descending)
+        index = self._indexes.get(key)
+        if index is None:
+            column = self.columns.get(sort_by)
+            if column is None:
+                # Unknown fields sort as 0 for every contract, keeping input order
+                index = array("l", range(len(self)))
+            elif sort_by in NUMERIC_FIELDS:
+                # Missing values sort as 0, as the chain used to be sorted
+                values = [0.0 if isnan(v) else v for v in column]
+                index = array("l", sorted(range(len(values)), key=values.__getitem__, reverse=descending))
+            else:
+                index = array("l", sorted(range(len(column)), key=column.__getitem__, reverse=descending))
+            self._indexes[key] = index
+        return index
+
+    def filter_mask(self, contract_filter: Optional[ContractFilter]) -> Optional[bytearray]:
+        if contract_filter is None or not contract_filter.active:
+            return None
+        key = contract_filter.describe()
+        mask = self._masks.get(key)
+        if mask is None:
+            mask = contract_filter.mask(self)
+            self._masks[key] = mask
+        return mask
+
+    def select(self, limit: int = 10, sort_by: str = "strike", sort_order: str = "asc", contract_filter: Optional[ContractFilter] = None) -> OptionsSelection:
+        index = self.sort_index(sort_by, sort_order == "desc")
+        mask = self.filter_mask(contract_filter)
+        total = len(self) if mask is None else sum(mask)
+        wanted = total if limit == -1 else min(limit, total)
+
+        rows: List[int] = []
+        if mask is None:
+            rows = list(index[:wanted])
+        else:
+            for i in index:
+                if len(rows) >= wanted:
+                    break
+                if mask[i]:
+                    rows.append(i)
+
+        return OptionsSelection(self.message, total, [self.contract(i) for i in rows])
@@ -0,0 +1,117 @@
+from array import array
+from math import sqrt, sumprod
+from operator import truediv
+from typing import Dict, List, Optional, Tuple
+
+from .series import PriceSeries
+
+NAN = float("nan")
+TRADING_DAYS_PER_YEAR = 252
+
+
+class PortfolioAnalytics:
+    """Return and risk statistics for several symbols over the same trading days.
+
+    Per-symbol statistics are keyed by symbol; `correlation` is a matrix in
+    the order of `symbols`. Beta is NaN without a benchmark. `errors` holds
+    the symbols that could not be included and why.
+    """
+
+    __slots__ = (
+        "symbols", "benchmark", "dates", "total_return", "annualized_return", "volatility",
+        "max_drawdown", "current_drawdown", "beta", "correlation", "errors",
+    )
+
+    def __init__(self, symbols: List[str], benchmark: Optional[str], dates: array):
+        self.symbols = symbols
+        self.benchmark = benchmark
+        self.dates = dates
+        self.total_return: Dict[str, float] = {}
+        self.annualized_return: Dict[str, float] = {}
+        self.volatility: Dict[str, float] = {}
+        self.max_drawdown: Dict[str, float] = {}
+        self.current_drawdown: Dict[str, float] = {}
+        self.beta: Dict[str, float] = {}
+        self.correlation: List[List[float]] = []
+        self.errors: Dict[str, str] = {}
+
+    @property
+    def bars(self) -> int:
+        return len(self.dates)
+
+
+def align(series: Dict[str, PriceSeries], window: int) -> Dict[str, array]:
+    """Closes of every series on the last `window` dates they all have, oldest first."""
+    common = None
+    for prices in series.values():
+        common = set(prices.dates) if common is None else common.intersection(prices.dates)
+    dates = array("l", sorted(common or ())[-window:])
+    aligned = {"": dates}
+    for symbol, prices in series.items():
+        close_by_date = dict(zip(prices.dates, prices.close))
+        aligned[symbol] = array("d", map(close_by_date.__getitem__, dates))
+    return aligned
+
+
+def _drawdowns(closes: array) -> Tuple[float, float]:
+    """The deepest fall from a running peak and the current distance below the peak."""
+    peak = closes[0]
+    worst = 0.0
+    for close in closes:
+        if close > peak:
+            peak = close
+        elif peak and close / peak - 1.0 < worst:
+            worst = close / peak - 1.0
+    return worst, closes[-1] / peak - 1.0 if peak else NAN
+
+
+def analyze(series: Dict[str, PriceSeries], symbols: List[str], window: int, benchmark: Optional[str] = None) -> PortfolioAnalytics | str:
+    """Statistics over the last `window` daily returns on dates shared by `symbols` and the benchmark.
+
+    Daily returns are computed once per symbol and demeaned; volatility, beta
+    and every correlation are then dot products of those arrays.
+    """
+    names = list(dict.fromkeys(symbols + ([benchmark] if benchmark else [])))
+    aligned = align({name: series[name] for name in names}, window + 1)
+    dates = aligned.pop("")
+    if len(dates) < 3:
+        return "Not enough trading days shared by all symbols to compute returns"
+
+    result = PortfolioAnalytics(symbols, benchmark, dates)
+    deviations: Dict[str, array] = {}
+    squares: Dict[str, float] = {}
+    periods = len(dates) - 1
+    for name in names:
+        closes = aligned[name]
+        # Gross returns; the constant 1 drops out once they are demeaned
+        returns = array("d", map(truediv, closes[1:], closes[:-1]))
+        mean = sum(returns) / periods
+        deviation = array("d", (value - mean for value in returns))
+        deviations[name] = deviation
+        squares[name] = sumprod(deviation, deviation)
+
+        total = closes[-1] / closes[0] - 1.0
+        result.total_return[name] = total
+        result.annualized_return[name] = (1.0 + total) ** (TRADING_DAYS_PER_YEAR / periods) - 1.0 if total > -1.0 else -1.0
+        result.volatility[name] = sqrt(squares[name] / (periods - 1) * TRADING_DAYS_PER_YEAR)
+        result.max_drawdown[name], result.current_drawdown[name] = _drawdowns(closes)
+
+    for name in names:
+        if benchmark and squares[benchmark]:
+            result.beta[name] = sumprod(deviations[name], deviations[benchmark]) / squares[benchmark]
+        else:
+            result.beta[name] = NAN
+
+    for row, first in enumerate(symbols):
+        cells = []
+        for column, second in enumerate(symbols):
+            if column < row:
+                # The matrix is symmetric
+                cells.append(result.correlation[column][row])
+            elif first == second:
+                cells.append(1.0 if squares[first] else NAN)
+            else:
+                scale = sqrt(squares[first] * squares[second])
+                cells.append(sumprod(deviations[first], deviations[second]) / scale if scale else NAN)
+        result.correlation.append(cells)
+    return result
@@ -0,0 +1,240 @@
+from contextvars import ContextVar
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+import asyncio
+import heapq
+import itertools
+import os
+import time
+
+from .keys import key_pool
+
+# Per API key; the scheduler allows this much for every key in the pool.
+# Off (0) unless set, since the right values depend on the key's plan
+CALLS_PER_MINUTE = float(os.getenv('ALPHA_VANTAGE_CALLS_PER_MINUTE', '0'))
+CALLS_PER_DAY = int(os.getenv('ALPHA_VANTAGE_CALLS_PER_DAY', '0'))
+MAX_QUEUE_DEPTH = int(os.getenv('ALPHA_VANTAGE_MAX_QUEUE_DEPTH', '100'))
+MAX_QUEUE_WAIT = float(os.getenv('ALPHA_VANTAGE_MAX_QUEUE_WAIT', '60'))
+
+# Lower values are served first
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BULK = 10
+# Watchlist refreshes, paid for from the reserved slice of the daily budget
+PRIORITY_BACKGROUND = 20
+
+# Set while the watchlist refreshes, so its requests queue behind everything else
+background_requests: ContextVar[bool] = ContextVar("background_requests", default=False)
+
+
+def request_priority(function: str, params: Dict[str, Any]) -> int:
+    if background_requests.get():
+        return PRIORITY_BACKGROUND
+    if params.get("outputsize") == "full":
+        return PRIORITY_BULK
+    return PRIORITY_INTERACTIVE
+
+
+def seconds_until_utc_midnight(now: Optional[datetime] = None) -> float:
+    now = now or datetime.now(timezone.utc)
+    midnight = datetime.combine(now.date() + timedelta(days=1), datetime.min.time(), tzinfo=timezone.utc)
+    return (midnight - now).total_seconds()
+
+
+class RateLimitExceeded(Exception):
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class RateScheduler:
+    """Token-bucket scheduler for upstream calls.
+
+    A per-minute bucket refills continuously and a per-day counter resets at
+    UTC midnight. Callers that cannot be served immediately wait in a priority
+    queue; requests are rejected up front when the queue is full, the daily
+    budget is spent, or the estimated wait exceeds max_wait.
+
+    Part of the daily budget can be reserved for background requests: they
+    may only spend the reserved calls, and other requests may not touch them.
+    """
+
+    def __init__(
+        self,
+        per_minute: float = CALLS_PER_MINUTE,
+        per_day: int = CALLS_PER_DAY,
+        max_queue_depth: int = MAX_QUEUE_DEPTH,
+        max_wait: float = MAX_QUEUE_WAIT,
+    ):
+        self.per_minute = per_minute
+        self.per_day = per_day
+        self.max_queue_depth = max_queue_depth
+        self.max_wait = max_wait
+        self._tokens = float(per_minute)
+        self._updated = time.monotonic()
+        self._day = datetime.now(timezone.utc).date()
+        self._day_used = 0
+        self._background_used = 0
+        self.reserved = 0
+        self._queue: List[list] = []
+        self._counter = itertools.count()
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self.granted = 0
+        self.rejected = 0
+        self.total_wait = 0.0
+
+    @property
+    def enabled(self) -> bool:
+        return self.per_minute > 0
+
+    def estimate_wait(self, priority: int = PRIORITY_INTERACTIVE) -> float:
+        """Seconds until a new request with the given priority would be sent."""
+        if not self.enabled:
+            return 0.0
+        self._refill()
+        ahead = sum(1 for entry in self._queue if entry[0] <= priority and not entry[2].done())
+        deficit = ahead + 1 - self._tokens
+        return max(0.0, deficit) * 60.0 / self.per_minute
+
+    async def acquire(self, priority: int = PRIORITY_INTERACTIVE) -> float:
+        """Wait for permission to send one upstream request. Returns the time spent queued."""
+        if not self.enabled:
+            return 0.0
+        self._refill()
+        self._roll_day()
+
+        budget = self._spent_daily_budget(priority, len(self._queue))
+        if budget is not None:
+            self.rejected += 1
+            retry_after = seconds_until_utc_midnight()
+            raise RateLimitExceeded(
+                f"Daily budget of {budget} API calls is used up. Estimated wait: {retry_after:.0f} seconds.",
+                retry_after
+            )
+
+        if not self._queue and self._tokens >= 1:
+            self._take(priority)
+            return 0.0
+
+        estimate = self.estimate_wait(priority)
+        if len(self._queue) >= self.max_queue_depth:
+            self.rejected += 1
+            raise RateLimitExceeded(
+                f"Request queue is full ({len(self._queue)} waiting). Estimated wait: {estimate:.1f} seconds.",
+                estimate
+            )
+        if self.max_wait and estimate > self.max_wait:
+            self.rejected += 1
+            raise RateLimitExceeded(
+                f"Estimated wait of {estimate:.1f} seconds exceeds the {self.max_wait:g} second limit.",
+                estimate
+            )
+
+        future = asyncio.get_running_loop().create_future()
+        entry = [priority, next(self._counter), future]
+        heapq.heappush(self._queue, entry)
+        self._schedule()
+
+        started = time.monotonic()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if entry in self._queue:
+                self._queue.remove(entry)
+                heapq.heapify(self._queue)
+            raise
+        waited = time.monotonic() - started
+        self.total_wait += waited
+        return waited
+
+    def try_acquire(self) -> bool:
+        """Take a token only if one is free right now, without queueing."""
+        if not self.enabled:
+            return True
+        self._refill()
+        self._roll_day()
+        if self._queue or self._tokens < 1 or self._spent_daily_budget(PRIORITY_INTERACTIVE, 0) is not None:
+            return False
+        self._take(PRIORITY_INTERACTIVE)
+        return True
+
+    def reserve(self, calls: int) -> None:
+        """Set aside this many of the daily calls for background requests."""
+        self.reserved = max(0, min(calls, self.per_day)) if self.per_day else 0
+
+    def penalize(self, tokens: Optional[float] = None) -> None:
+        """Drain the bucket, or take `tokens` out of it, after the upstream reported we are over quota."""
+        self._refill()
+        if tokens is None:
+            self._tokens = min(self._tokens, 0.0)
+        else:
+            self._tokens -= tokens
+
+    def stats(self) -> Dict[str, Any]:
+        self._refill()
+        self._roll_day()
+        return {
+            "enabled": self.enabled,
+            "per_minute": self.per_minute,
+            "per_day": self.per_day,
+            "tokens": round(self._tokens, 3),
+            "used_today": self._day_used,
+            "reserved": self.reserved,
+            "background_used_today": self._background_used,
+            "queue_depth": len(self._queue),
+            "estimated_wait": round(self.estimate_wait(), 3),
+            "granted": self.granted,
+            "rejected": self.rejected,
+            "total_wait": round(self.total_wait, 3),
+        }
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(float(self.per_minute), self._tokens + (now - self._updated) * self.per_minute / 60.0)
+        self._updated = now
+
+    def _roll_day(self) -> None:
+        today = datetime.now(timezone.utc).date()
+        if today != self._day:
+            self._day = today
+            self._day_used = 0
+            self._background_used = 0
+
+    def _spent_daily_budget(self, priority: int, queued: int) -> Optional[int]:
+        """The daily budget a request with this priority would exceed, or None if it fits."""
+        if not self.per_day:
+            return None
+        if self._day_used + queued >= self.per_day:
+            return self.per_day
+        if not self.reserved:
+            return None
+        if priority >= PRIORITY_BACKGROUND:
+            return self.reserved if self._background_used >= self.reserved else None
+        budget = self.per_day - self.reserved
+        return budget if self._day_used - self._background_used + queued >= budget else None
+
+    def _take(self, priority: int) -> None:
+        self._tokens -= 1
+        self._day_used += 1
+        if priority >= PRIORITY_BACKGROUND:
+            self._background_used += 1
+        self.granted += 1
+
+    def _schedule(self) -> None:
+        if self._timer is not None or not self._queue:
+            return
+        delay = max(0.0, (1 - self._tokens) * 60.0 / self.per_minute)
+        self._timer = asyncio.get_running_loop().call_later(delay, self._drain)
+
+    def _drain(self) -> None:
+        self._timer = None
+        self._refill()
+        while self._queue and self._tokens >= 1:
+            priority, _, future = heapq.heappop(self._queue)
+            if future.done():
+                continue
+            self._take(priority)
+            future.set_result(None)
+        self._schedule()
+
+
+rate_scheduler = RateScheduler(CALLS_PER_MINUTE * max(1, len(key_pool)), CALLS_PER_DAY * max(1, len(key_pool)))
@@ -0,0 +1,183 @@
+from typing import Any, BinaryIO, Dict, List, Optional, Tuple
+import asyncio
+import json
+import os
+import threading
+import time
+import zlib
+
+import httpx
+
+from .cache import make_cache_key
+
+# Capture every upstream exchange into an archive, or answer from one
+# without touching the network
+RECORD_PATH = os.getenv('ALPHA_VANTAGE_RECORD', '')
+REPLAY_PATH = os.getenv('ALPHA_VANTAGE_REPLAY', '')
+# Replay each response after as long as it originally took
+REPLAY_TIMING = os.getenv('ALPHA_VANTAGE_REPLAY_TIMING', '').lower() in ('1', 'true', 'yes')
+
+ARCHIVE_FORMAT = "alpha_vantage_mcp recording"
+ARCHIVE_VERSION = 2
+_REDACTED = b"REDACTED"
+# The body handed back is already decoded, so these no longer describe it
+_BODY_HEADERS = ("content-encoding", "content-length", "transfer-encoding")
+
+
+def request_id(request: httpx.Request) -> str:
+    """The query string without the API key, in a stable order."""
+    return "&".join(f"{name}={value}" for name, value in make_cache_key(dict(request.url.params)))
+
+
+class RecordingTransport(httpx.AsyncBaseTransport):
+    """Passes requests to `inner` and appends each exchange to an archive.
+
+    The archive is a header line followed by one record per exchange: a JSON
+    line describing it, then its zlib-compressed body. Records are only ever
+    appended and are flushed as they are written, so a server that is killed
+    instead of shut down keeps everything it recorded. API keys are dropped
+    from the recorded query and blanked out of response bodies.
+    """
+
+    def __init__(self, inner: httpx.AsyncBaseTransport, path: str):
+        self.inner = inner
+        self.path = path
+        self.exchanges = 0
+        self._file: Optional[BinaryIO] = None
+        self._lock = threading.Lock()
+
+    def _open(self) -> BinaryIO:
+        if self._file is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            self._file = open(self.path, "wb")
+            self._file.write(json.dumps({"format": ARCHIVE_FORMAT, "version": ARCHIVE_VERSION}).encode() + b"\n")
+        return self._file
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        started = time.perf_counter()
+        response = await self.inner.handle_async_request(request)
+        # Streamed responses are buffered here so the body can be kept
+        body = await response.aread()
+        await response.aclose()
+        elapsed = time.perf_counter() - started
+
+        api_key = request.url.params.get("apikey")
+        stored = body.replace(api_key.encode(), _REDACTED) if api_key else body
+        await asyncio.to_thread(self._write, {
+            "key": request_id(request),
+            "function": request.url.params.get("function"),
+            "status": response.status_code,
+            "content_type": response.headers.get("content-type"),
+            "elapsed": round(elapsed, 6),
+            "recorded_at": time.time(),
+        }, stored)
+        headers = [(name, value) for name, value in response.headers.items() if name.lower() not in _BODY_HEADERS]
+        return httpx.Response(response.status_code, headers=headers, content=body, extensions=response.extensions)
+
+    def _write(self, exchange: Dict[str, Any], body: bytes) -> None:
+        compressed = zlib.compress(body)
+        with self._lock:
+            archive = self._open()
+            self.exchanges += 1
+            exchange["id"] = self.exchanges
+            exchange["size"] = len(compressed)
+            archive.write(json.dumps(exchange).encode() + b"\n" + compressed)
+            archive.flush()
+
+    async def aclose(self) -> None:
+        await self.inner.aclose()
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+def read_index(archive: BinaryIO) -> List[Tuple[Dict[str, Any], int]]:
+    """Every complete record in an archive, with the offset of its body.
+
+    A record cut short, as the last one is when the recorder was killed while
+    writing it, ends the index.
+    """
+    try:
+        header = json.loads(archive.readline())
+    except ValueError:
+        header = {}
+    if not isinstance(header, dict) or header.get("format") != ARCHIVE_FORMAT:
+        raise ValueError(f"{getattr(archive, 'name', 'archive')} is not a recording made by this server")
+    start = archive.tell()
+    end = archive.seek(0, os.SEEK_END)
+    archive.seek(start)
+    index = []
+    while True:
+        line = archive.readline()
+        if not line.endswith(b"\n"):
+            break
+        try:
+            exchange = json.loads(line)
+        except ValueError:
+            break
+        offset = archive.tell()
+        if offset + exchange["size"] > end:
+            break
+        index.append((exchange, offset))
+        archive.seek(offset + exchange["size"])
+    return index
+
+
+class ReplayTransport(httpx.AsyncBaseTransport):
+    """Answers requests from an archive made by RecordingTransport.
+
+    Requests are matched on their query without the API key. Repeated
+    requests get the recorded responses in order, then the last one again,
+    so a short recording can drive any number of calls. Unknown requests
+    get a 404.
+    """
+
+    def __init__(self, path: str, timing: bool = REPLAY_TIMING):
+        self.path = path
+        self.timing = timing
+        self._archive = open(path, "rb")
+        self._exchanges: Dict[str, List[Dict[str, Any]]] = {}
+        self._offsets: Dict[int, int] = {}
+        self._served: Dict[str, int] = {}
+        # Decompressed once, then served from memory
+        self._bodies: Dict[int, bytes] = {}
+        self.hits = 0
+        self.misses = 0
+        for exchange, offset in read_index(self._archive):
+            self._exchanges.setdefault(exchange["key"], []).append(exchange)
+            self._offsets[exchange["id"]] = offset
+
+    def _body(self, exchange: Dict[str, Any]) -> bytes:
+        body = self._bodies.get(exchange["id"])
+        if body is None:
+            self._archive.seek(self._offsets[exchange["id"]])
+            body = self._bodies[exchange["id"]] = zlib.decompress(self._archive.read(exchange["size"]))
+        return body
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        key = request_id(request)
+        exchanges = self._exchanges.get(key)
+        if not exchanges:
+            self.misses += 1
+            return httpx.Response(404, text=f"No recorded response for {key}", request=request)
+        self.hits += 1
+        served = self._served.get(key, 0)
+        self._served[key] = served + 1
+        exchange = exchanges[min(served, len(exchanges) - 1)]
+        if self.timing:
+            await asyncio.sleep(exchange["elapsed"])
+        headers = {"content-type": exchange["content_type"]} if exchange.get("content_type") else {}
+        return httpx.Response(exchange["status"], headers=headers, content=self._body(exchange), request=request)
+
+    async def aclose(self) -> None:
+        self._archive.close()
+
+
+def recording_transport(inner: httpx.AsyncBaseTransport) -> httpx.AsyncBaseTransport:
+    """The transport ALPHA_VANTAGE_RECORD or ALPHA_VANTAGE_REPLAY asks for, else `inner` itself."""
+    if REPLAY_PATH:
+        return ReplayTransport(os.path.expanduser(REPLAY_PATH))
+    if RECORD_PATH:
+        return RecordingTransport(inner, os.path.expanduser(RECORD_PATH))
+    return inner
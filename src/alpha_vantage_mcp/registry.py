@@ -0,0 +1,260 @@
+from datetime import date
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional
+import re
+import time
+
+import httpx
+import mcp.types as types
+
+from .export import OUTPUT_FORMATS, render
+from .cache import allow_stale, stale_notes
+from .metrics import metrics
+from .tools import make_alpha_request
+
+Arguments = Dict[str, Any]
+FetchFn = Callable[[httpx.AsyncClient, Arguments], Awaitable[Any]]
+FormatFn = Callable[[Any, Arguments], str]
+# Returns a Table or JSON-serializable data for the json and csv output formats
+ExportFn = Callable[[Any, Arguments], Any]
+# Returns the arguments, or an error string when they turn out to be unusable
+NormalizeFn = Callable[[Arguments], Arguments | str]
+Check = Callable[[Any], Optional[str]]
+
+OUTPUT_FORMAT = {
+    "type": "string",
+    "description": "Optional: text (default), json or csv; json and csv are compact and machine-readable",
+    "enum": list(OUTPUT_FORMATS),
+    "default": "text"
+}
+
+FRESH = {
+    "type": "boolean",
+    "description": "Optional: true to never be answered with expired cached data",
+    "default": False
+}
+
+_TYPE_CHECKS: Dict[str, Callable[[Any], bool]] = {
+    "string": lambda value: isinstance(value, str),
+    "integer": lambda value: isinstance(value, int) and not isinstance(value, bool),
+    "number": lambda value: isinstance(value, (int, float)) and not isinstance(value, bool),
+    "boolean": lambda value: isinstance(value, bool),
+    "array": lambda value: isinstance(value, list),
+    "object": lambda value: isinstance(value, dict),
+}
+
+
+def _is_date(value: str) -> bool:
+    try:
+        date.fromisoformat(value)
+    except ValueError:
+        return False
+    return True
+
+
+def _compile_value(label: str, schema: Dict[str, Any]) -> Check:
+    """Turn one property schema into a list of checks, built once per schema."""
+    checks: List[Check] = []
+
+    expected = schema.get("type")
+    if expected in _TYPE_CHECKS:
+        is_type = _TYPE_CHECKS[expected]
+        checks.append(lambda value: None if is_type(value) else f"Invalid {label} parameter: expected {expected}")
+
+    if "enum" in schema:
+        allowed = frozenset(schema["enum"])
+        choices = ", ".join(str(choice) for choice in schema["enum"])
+        checks.append(lambda value: None if value in allowed else f"Invalid {label} parameter: must be one of {choices}")
+
+    if "pattern" in schema:
+        pattern = re.compile(schema["pattern"])
+        checks.append(lambda value: None if pattern.search(value) else f"Invalid {label} parameter: does not match {pattern.pattern}")
+    if schema.get("format") == "date":
+        checks.append(lambda value: None if _is_date(value) else f"Invalid {label} parameter: {value} is not a calendar date")
+
+    if "minimum" in schema:
+        minimum = schema["minimum"]
+        checks.append(lambda value: None if value >= minimum else f"Invalid {label} parameter: must be at least {minimum}")
+    if "maximum" in schema:
+        maximum = schema["maximum"]
+        checks.append(lambda value: None if value <= maximum else f"Invalid {label} parameter: must be at most {maximum}")
+    if "exclusiveMinimum" in schema:
+        bound = schema["exclusiveMinimum"]
+        checks.append(lambda value: None if value > bound else f"Invalid {label} parameter: must be greater than {bound}")
+
+    if "minItems" in schema:
+        min_items = schema["minItems"]
+        checks.append(lambda value: None if len(value) >= min_items else f"Invalid {label} parameter: needs at least {min_items} items")
+    if "maxItems" in schema:
+        max_items = schema["maxItems"]
+        checks.append(lambda value: None if len(value) <= max_items else f"Invalid {label} parameter: allows at most {max_items} items")
+    if "items" in schema:
+        check_item = _compile_value(f"{label} item", schema["items"])
+
+        def check_items(value: List[Any]) -> Optional[str]:
+            for item in value:
+                error = check_item(item)
+                if error:
+                    return error
+            return None
+
+        checks.append(check_items)
+
+    def check(value: Any) -> Optional[str]:
+        # Checks run in order, so later ones can rely on the type check
+        for single in checks:
+            error = single(value)
+            if error:
+                return error
+        return None
+
+    return check
+
+
+def compile_schema(schema: Dict[str, Any]) -> Callable[[Arguments], Optional[str]]:
+    """Compile an object schema into a validator.
+
+    The validator fills in defaults for absent arguments and returns an error
+    message, or None when the arguments are valid.
+    """
+    required = tuple(schema.get("required", ()))
+    properties = schema.get("properties", {})
+    checks = {name: _compile_value(name, prop) for name, prop in properties.items()}
+    defaults = {name: prop["default"] for name, prop in properties.items() if "default" in prop}
+
+    def validate(arguments: Arguments) -> Optional[str]:
+        for name in required:
+            if arguments.get(name) in (None, "", []):
+                return f"Missing {name} parameter"
+        for name, check in checks.items():
+            value = arguments.get(name)
+            if value is None:
+                if name in defaults:
+                    arguments[name] = defaults[name]
+                continue
+            error = check(value)
+            if error:
+                return error
+        return None
+
+    return validate
+
+
+def upstream(function: str, symbol_arg: Optional[str] = "symbol", params: Optional[Callable[[Arguments], Dict[str, Any]]] = None, parse: Optional[Callable[[Dict[str, Any]], Any]] = None) -> FetchFn:
+    """Fetch step for tools that map directly onto one Alpha Vantage function."""
+
+    async def fetch(client: httpx.AsyncClient, arguments: Arguments) -> Any:
+        return await make_alpha_request(
+            client,
+            function,
+            arguments.get(symbol_arg) if symbol_arg else None,
+            params(arguments) if params else None,
+            parse=parse
+        )
+
+    return fetch
+
+
+def upper_case(*names: str) -> NormalizeFn:
+    """Normalization step that upper-cases the given string arguments."""
+
+    def normalize(arguments: Arguments) -> Arguments:
+        for name in names:
+            if isinstance(arguments.get(name), str):
+                arguments[name] = arguments[name].strip().upper()
+        return arguments
+
+    return normalize
+
+
+class ToolSpec:
+    """Declarative description of one MCP tool: schema, normalization, fetch and formatting.
+
+    Every tool accepts `output_format`. Without an `export` step, json and csv
+    output is built from the fetched data as it is, which suits tools whose
+    data is the raw Alpha Vantage payload. Tools backed by cached upstream
+    data also accept `fresh`; pass `cacheable=False` for those that are not.
+    """
+
+    __slots__ = ("name", "description", "input_schema", "fetch", "format", "export", "normalize", "validate", "tool")
+
+    def __init__(self, name: str, description: str, input_schema: Dict[str, Any], fetch: FetchFn, format: FormatFn, normalize: Optional[NormalizeFn] = None, export: Optional[ExportFn] = None, cacheable: bool = True):
+        properties = {**input_schema.get("properties", {}), "output_format": OUTPUT_FORMAT}
+        if cacheable:
+            properties["fresh"] = FRESH
+        input_schema = {**input_schema, "properties": properties}
+        self.name = name
+        self.description = description
+        self.input_schema = input_schema
+        self.fetch = fetch
+        self.format = format
+        self.export = export
+        self.normalize = normalize
+        self.validate = compile_schema(input_schema)
+        self.tool = types.Tool(name=name, description=description, inputSchema=input_schema)
+
+
+class ToolRegistry:
+    """Name-indexed tool specs with the MCP tool listing built once."""
+
+    def __init__(self, specs: Iterable[ToolSpec] = ()):
+        self._specs: Dict[str, ToolSpec] = {spec.name: spec for spec in specs}
+        self._tools = [spec.tool for spec in self._specs.values()]
+
+    def tools(self) -> List[types.Tool]:
+        return self._tools
+
+    async def call(self, client: httpx.AsyncClient, name: str, arguments: Optional[Arguments]) -> List[str]:
+        """The tool's output, followed by a note for each piece of expired data it was built from."""
+        spec = self._specs.get(name)
+        if spec is None:
+            return [f"Unknown tool: {name}"]
+        if not arguments and spec.input_schema.get("required"):
+            return ["Missing arguments for the request"]
+
+        started = time.perf_counter()
+        metrics.count_tool(name, "calls")
+        arguments = dict(arguments or {})
+        error = spec.validate(arguments)
+        if error:
+            metrics.count_tool(name, "invalid")
+            return [error]
+        if spec.normalize is not None:
+            arguments = spec.normalize(arguments)
+            if isinstance(arguments, str):
+                metrics.count_tool(name, "invalid")
+                return [arguments]
+
+        notes: List[str] = []
+        allow_token = allow_stale.set(not arguments.get("fresh"))
+        notes_token = stale_notes.set(notes)
+        try:
+            data = await spec.fetch(client, arguments)
+        finally:
+            allow_stale.reset(allow_token)
+            stale_notes.reset(notes_token)
+        fetched = time.perf_counter()
+        metrics.observe_tool(name, "fetch", fetched - started)
+        if isinstance(data, str):
+            metrics.count_tool(name, "errors")
+            text = f"Error: {data}"
+        else:
+            if arguments["output_format"] == "text":
+                text = spec.format(data, arguments)
+            else:
+                text = render(spec.export(data, arguments) if spec.export else data, arguments["output_format"])
+            metrics.observe_tool(name, "format", time.perf_counter() - fetched)
+        metrics.observe_tool(name, "total", time.perf_counter() - started)
+        return [text] + notes
+
+    async def prefetch(self, client: httpx.AsyncClient, name: str, arguments: Arguments) -> Any:
+        """Run only a tool's fetch step, e.g. to warm the cache. Returns the data or an error string."""
+        spec = self._specs[name]
+        arguments = dict(arguments)
+        error = spec.validate(arguments)
+        if error:
+            return error
+        if spec.normalize is not None:
+            arguments = spec.normalize(arguments)
+            if isinstance(arguments, str):
+                return arguments
+        return await spec.fetch(client, arguments)
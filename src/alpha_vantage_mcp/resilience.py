@@ -0,0 +1,116 @@
+from typing import Any, Dict
+import os
+import random
+import time
+
+import httpx
+
+MAX_RETRIES = int(os.getenv('ALPHA_VANTAGE_RETRIES', '2'))
+RETRY_BASE_DELAY = float(os.getenv('ALPHA_VANTAGE_RETRY_BASE_DELAY', '0.5'))
+RETRY_MAX_DELAY = float(os.getenv('ALPHA_VANTAGE_RETRY_MAX_DELAY', '8'))
+# No new attempt is started once this many seconds have passed since the first one
+RETRY_DEADLINE = float(os.getenv('ALPHA_VANTAGE_RETRY_DEADLINE', '45'))
+
+HEDGE_ENABLED = os.getenv('ALPHA_VANTAGE_HEDGE', '').lower() in ('1', 'true', 'yes')
+HEDGE_PERCENTILE = float(os.getenv('ALPHA_VANTAGE_HEDGE_PERCENTILE', '0.95'))
+HEDGE_MIN_DELAY = float(os.getenv('ALPHA_VANTAGE_HEDGE_MIN_DELAY', '0.5'))
+# Round trips observed for a function before its percentile is trusted
+HEDGE_MIN_SAMPLES = 20
+
+BREAKER_FAILURES = int(os.getenv('ALPHA_VANTAGE_BREAKER_FAILURES', '5'))
+BREAKER_COOLDOWN = float(os.getenv('ALPHA_VANTAGE_BREAKER_COOLDOWN', '30'))
+SERVE_STALE = os.getenv('ALPHA_VANTAGE_SERVE_STALE', '1').lower() not in ('0', 'false', 'no')
+
+RETRYABLE_STATUS_CODES = frozenset((500, 502, 503, 504))
+
+
+def is_retryable_error(e: Exception) -> bool:
+    """Transport failures where the request may simply be sent again."""
+    return isinstance(e, (httpx.TimeoutException, httpx.NetworkError, httpx.RemoteProtocolError))
+
+
+def backoff_delay(attempt: int, base: float = RETRY_BASE_DELAY, cap: float = RETRY_MAX_DELAY) -> float:
+    """Exponential backoff with full jitter for the given retry (1 for the first retry)."""
+    return random.uniform(0, min(cap, base * 2 ** (attempt - 1)))
+
+
+class CircuitBreaker:
+    """Stops sending requests after repeated upstream failures.
+
+    After `failure_threshold` consecutive failures the breaker opens and
+    requests fail fast. Once `cooldown` seconds have passed, a single probe
+    request is let through: success closes the breaker, failure reopens it.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = BREAKER_FAILURES, cooldown: float = BREAKER_COOLDOWN):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self.trips = 0
+        self.short_circuited = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.failure_threshold > 0
+
+    @property
+    def is_open(self) -> bool:
+        return self.state != self.CLOSED
+
+    def retry_after(self) -> float:
+        if self.state != self.OPEN:
+            return 0.0
+        return max(0.0, self._opened_at + self.cooldown - time.monotonic())
+
+    def allow(self) -> bool:
+        """Whether a request may be sent now. In the half-open state only one probe is allowed."""
+        if not self.enabled or self.state == self.CLOSED:
+            return True
+        if self.state == self.OPEN and self.retry_after() == 0.0:
+            self.state = self.HALF_OPEN
+            self._probe_in_flight = False
+        if self.state == self.HALF_OPEN and not self._probe_in_flight:
+            self._probe_in_flight = True
+            return True
+        self.short_circuited += 1
+        return False
+
+    def record_success(self) -> None:
+        self.consecutive_failures = 0
+        self.state = self.CLOSED
+        self._probe_in_flight = False
+
+    def abandon(self) -> None:
+        """The probe ended without an answer either way (e.g. it was cancelled)."""
+        self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        self.consecutive_failures += 1
+        if not self.enabled:
+            return
+        if self.state == self.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                self.trips += 1
+            self.state = self.OPEN
+            self._opened_at = time.monotonic()
+            self._probe_in_flight = False
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "open": int(self.is_open),
+            "consecutive_failures": self.consecutive_failures,
+            "retry_after": round(self.retry_after(), 1),
+            "trips": self.trips,
+            "short_circuited": self.short_circuited,
+        }
+
+
+upstream_breaker = CircuitBreaker()
@@ -0,0 +1,187 @@
+import math
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import date, timedelta
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+DAILY_SERIES_KEY = "Time Series (Daily)"
+CRYPTO_SERIES_KEYS = {
+    "daily": "Time Series (Digital Currency Daily)",
+    "weekly": "Time Series (Digital Currency Weekly)",
+    "monthly": "Time Series (Digital Currency Monthly)",
+}
+
+RESAMPLE_INTERVALS = ("daily", "weekly", "monthly", "quarterly")
+
+
+class PriceSeries:
+    """Columnar OHLCV series, oldest bar first.
+
+    Dates are stored as proleptic Gregorian ordinals and prices as float64
+    arrays, which takes a fraction of the memory of the raw
+    dict-of-dict-of-strings payload and needs no re-parsing by consumers.
+    """
+
+    __slots__ = ("symbol", "metadata", "dates", "open", "high", "low", "close", "volume")
+
+    def __init__(self, symbol: str, metadata: Dict[str, Any], dates: array, open: array, high: array, low: array, close: array, volume: array):
+        self.symbol = symbol
+        self.metadata = metadata
+        self.dates = dates
+        self.open = open
+        self.high = high
+        self.low = low
+        self.close = close
+        self.volume = volume
+
+    def __len__(self) -> int:
+        return len(self.dates)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(
+            column.itemsize * len(column)
+            for column in (self.dates, self.open, self.high, self.low, self.close, self.volume)
+        )
+
+    def date_at(self, index: int) -> str:
+        return date.fromordinal(self.dates[index]).isoformat()
+
+    def newest_first(self, count: Optional[int] = None) -> Iterator[int]:
+        """Row indexes from the newest bar backwards."""
+        stop = -1 if count is None else max(-1, len(self.dates) - 1 - count)
+        return iter(range(len(self.dates) - 1, stop, -1))
+
+    def rows(self, start: int, stop: int) -> "PriceSeries":
+        """A copy of rows [start, stop), leaving this series untouched."""
+        return PriceSeries(
+            self.symbol, self.metadata, self.dates[start:stop], self.open[start:stop], self.high[start:stop],
+            self.low[start:stop], self.close[start:stop], self.volume[start:stop]
+        )
+
+    def between(self, start: Optional[date] = None, end: Optional[date] = None) -> "PriceSeries":
+        """Bars dated from start to end inclusive, found by binary search over the dates."""
+        lo = bisect_left(self.dates, start.toordinal()) if start else 0
+        hi = bisect_right(self.dates, end.toordinal()) if end else len(self.dates)
+        if lo == 0 and hi == len(self.dates):
+            return self
+        return self.rows(lo, hi)
+
+
+def _next_period(day: date, interval: str) -> date:
+    """First day of the period after the one holding `day`."""
+    if interval == "weekly":
+        return day + timedelta(days=7 - day.weekday())
+    months = 3 if interval == "quarterly" else 1
+    month = (day.month - 1) // months * months + months
+    return date(day.year + month // 12, month % 12 + 1, 1)
+
+
+def resample(series: PriceSeries, interval: str) -> PriceSeries:
+    """Aggregate daily bars into weekly, monthly or quarterly ones.
+
+    Period boundaries are found by binary search over the dates, so the work
+    per period is one bisect plus C-level min/max/sum over column slices; no
+    per-bar Python code runs. Each bar is dated with its period's last
+    trading day, as Alpha Vantage does.
+    """
+    if interval == "daily" or not len(series):
+        return series
+
+    bounds: List[int] = [0]
+    last = series.dates[-1]
+    boundary = _next_period(date.fromordinal(series.dates[0]), interval)
+    while boundary.toordinal() <= last:
+        bounds.append(bisect_left(series.dates, boundary.toordinal(), bounds[-1]))
+        boundary = _next_period(boundary, interval)
+    bounds.append(len(series))
+
+    dates = array(series.dates.typecode)
+    opens = array("d")
+    highs = array("d")
+    lows = array("d")
+    closes = array("d")
+    volumes = array(series.volume.typecode)
+    for lo, hi in zip(bounds, bounds[1:]):
+        if lo == hi:
+            continue
+        dates.append(series.dates[hi - 1])
+        opens.append(series.open[lo])
+        highs.append(max(series.high[lo:hi]))
+        lows.append(min(series.low[lo:hi]))
+        closes.append(series.close[hi - 1])
+        volumes.append(sum(series.volume[lo:hi]))
+    return PriceSeries(series.symbol, series.metadata, dates, opens, highs, lows, closes, volumes)
+
+
+_BAR_FIELDS = ("1. open", "2. high", "3. low", "4. close", "5. volume")
+
+
+def _parse_bar(day: str, values: Any) -> Optional[Tuple[int, float, float, float, float, float]]:
+    """Return one bar as (ordinal, open, high, low, close, volume), or None if a field is missing or malformed."""
+    try:
+        ordinal = date.fromisoformat(day[:10]).toordinal()
+        fields = [float(values[field]) for field in _BAR_FIELDS]
+    except (KeyError, TypeError, ValueError):
+        return None
+    if not all(math.isfinite(value) for value in fields):
+        return None
+    return (ordinal, *fields)
+
+
+def _parse_columns(symbol: str, metadata: Dict[str, Any], time_series: Dict[str, Dict[str, str]], volume_type: str) -> Optional[PriceSeries]:
+    dates = array("l")
+    opens = array("d")
+    highs = array("d")
+    lows = array("d")
+    closes = array("d")
+    volumes = array(volume_type)
+    to_volume = int if volume_type == "q" else float
+
+    # ISO dates sort chronologically as strings
+    for day in sorted(time_series):
+        bar = _parse_bar(day, time_series[day])
+        if bar is None:
+            # Skip bars Alpha Vantage sent without a usable value rather than failing the whole series
+            continue
+        ordinal, open_, high, low, close, volume = bar
+        dates.append(ordinal)
+        opens.append(open_)
+        highs.append(high)
+        lows.append(low)
+        closes.append(close)
+        volumes.append(to_volume(volume))
+
+    if not dates:
+        return None
+    return PriceSeries(symbol, metadata, dates, opens, highs, lows, closes, volumes)
+
+
+def parse_daily_series(time_series_data: Dict[str, Any]) -> Optional[PriceSeries]:
+    """Parse a TIME_SERIES_DAILY payload, or return None if it holds no series."""
+    time_series = time_series_data.get(DAILY_SERIES_KEY)
+    if not time_series:
+        return None
+    metadata = time_series_data.get("Meta Data", {})
+    return _parse_columns(metadata.get("2. Symbol", "Unknown"), metadata, time_series, "q")
+
+
+def parse_crypto_series(time_series_data: Dict[str, Any], series_type: str) -> Optional[PriceSeries]:
+    """Parse a DIGITAL_CURRENCY_* payload, or return None if it holds no series."""
+    time_series = time_series_data.get(CRYPTO_SERIES_KEYS.get(series_type, ""))
+    if not time_series:
+        return None
+    metadata = time_series_data.get("Meta Data", {})
+    return _parse_columns(metadata.get("2. Digital Currency Code", "Unknown"), metadata, time_series, "d")
+
+
+def parse_crypto_daily(time_series_data: Dict[str, Any]) -> Optional[PriceSeries]:
+    return parse_crypto_series(time_series_data, "daily")
+
+
+def parse_crypto_weekly(time_series_data: Dict[str, Any]) -> Optional[PriceSeries]:
+    return parse_crypto_series(time_series_data, "weekly")
+
+
+def parse_crypto_monthly(time_series_data: Dict[str, Any]) -> Optional[PriceSeries]:
+    return parse_crypto_series(time_series_data, "monthly")
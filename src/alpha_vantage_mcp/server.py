@@ -1,441 +1,716 @@
-from typing import Any, List, Dict, Optional
+from datetime import date
+from typing import Any, List, Dict, Optional, Tuple
 import asyncio
+import contextlib
 import httpx
 from mcp.server.models import InitializationOptions
 import mcp.types as types
 from mcp.server import NotificationOptions, Server
 import mcp.server.stdio
 import os
+import shutil
 
 from .tools import (
-    make_alpha_request,
+    create_http_client,
+    fetch_daily_series,
+    fetch_daily_series_many,
+    fetch_quotes,
+    fetch_historical_options,
+    fetch_options_chain,
+    COMPACT_SIZE,
     format_quote,
     format_company_info,
     format_time_series,
     format_historical_options,
+    format_options_analytics,
+    format_indicators,
+    format_portfolio_analytics,
     format_crypto_rate,
     format_crypto_time_series,
-    ALPHA_VANTAGE_BASE,
-    API_KEY
+    collect_server_stats,
+    format_server_stats,
+    format_prometheus_stats,
 )
-
-if not API_KEY:
-    raise ValueError("Missing ALPHA_VANTAGE_API_KEY environment variable")
+from .chainstats import analyze_chain
+from .export import Table, indicators_table, options_analytics_record, options_table, portfolio_table, series_table
+from .indicators import DEFAULT_PERIODS, INDICATORS, compute_indicators, lookback
+from .keys import key_pool
+from .options import ContractFilter, OptionsChain, OptionsSelection
+from .portfolio import PortfolioAnalytics, analyze
+from .recording import REPLAY_PATH
+from .registry import ToolRegistry, ToolSpec, upper_case, upstream
+from .series import RESAMPLE_INTERVALS, PriceSeries, parse_crypto_daily, parse_crypto_weekly, parse_crypto_monthly, resample
+from .sharedcache import shared_cache
+from .store import DATA_DIR, daily_store
+from .watchlist import watchlist
+
+# Replayed traffic needs no key
+if not len(key_pool) and not REPLAY_PATH:
+    raise ValueError("Missing ALPHA_VANTAGE_API_KEY environment variable (or ALPHA_VANTAGE_API_KEYS / ALPHA_VANTAGE_API_KEYS_FILE)")
 
 server = Server("alpha_vantage_finance")
 
-@server.list_tools()
-async def handle_list_tools() -> list[types.Tool]:
-    
-    return [
-        types.Tool(
-            name="get-stock-quote",
-            description="Get current stock quote information",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "symbol": {
-                        "type": "string",
-                        "description": "Stock symbol (e.g., AAPL, MSFT)",
-                    },
-                },
-                "required": ["symbol"],
-            },
+# Shared across all tool calls so connections are kept alive between requests
+http_client: Optional[httpx.AsyncClient] = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    global http_client
+    if http_client is None:
+        http_client = create_http_client()
+    return http_client
+
+
+STOCK_SYMBOL = {
+    "type": "string",
+    "description": "Stock symbol (e.g., AAPL, MSFT)",
+}
+CRYPTO_SYMBOL = {
+    "type": "string",
+    "description": "Cryptocurrency symbol (e.g., BTC, ETH)",
+}
+MARKET = {
+    "type": "string",
+    "description": "Market currency (e.g., USD, EUR)",
+    "default": "USD"
+}
+DATE_PATTERN = "^20[0-9]{2}-(?:0[1-9]|1[0-2])-(?:0[1-9]|[12][0-9]|3[01])$"
+OPTIONS_SORT_FIELDS = [
+    "strike",
+    "expiration",
+    "volume",
+    "open_interest",
+    "implied_volatility",
+    "delta",
+    "gamma",
+    "theta",
+    "vega",
+    "rho",
+    "last",
+    "bid",
+    "ask"
+]
+# Trading days in one bar of each interval, to tell whether compact history is enough
+INTERVAL_TRADING_DAYS = {"daily": 1, "weekly": 5, "monthly": 21, "quarterly": 63}
+# Calendar days covered by the compact series (100 trading days)
+COMPACT_CALENDAR_DAYS = COMPACT_SIZE * 7 // 5
+# Bars shown for a date range unless last_n asks for more
+RANGE_ROWS = 100
+QUOTE_FIELDS = (
+    "01. symbol", "02. open", "03. high", "04. low", "05. price", "06. volume",
+    "07. latest trading day", "08. previous close", "09. change", "10. change percent",
+)
+
+
+def _symbol_schema(symbol: Dict[str, Any], **properties: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "type": "object",
+        "properties": {"symbol": symbol, **properties},
+        "required": ["symbol"],
+    }
+
+
+def _normalize_symbols(arguments: Dict[str, Any]) -> Dict[str, Any] | str:
+    symbols = (symbol.strip().upper() for symbol in arguments["symbols"])
+    arguments["symbols"] = list(dict.fromkeys(symbol for symbol in symbols if symbol))
+    if not arguments["symbols"]:
+        return "Missing symbols parameter"
+    return arguments
+
+
+def _format_quotes(quotes: Dict[str, Any], arguments: Dict[str, Any]) -> str:
+    sections = []
+    for symbol, quote_data in quotes.items():
+        if isinstance(quote_data, str):
+            sections.append(f"{symbol}:\nError: {quote_data}")
+        else:
+            sections.append(f"{symbol}:\n{format_quote(quote_data)}")
+    return f"Stock quotes for {len(quotes)} symbols:\n\n" + "\n\n".join(sections)
+
+
+def _export_quotes(quotes: Dict[str, Any], arguments: Dict[str, Any]) -> Table:
+    rows = []
+    for symbol, quote_data in quotes.items():
+        if isinstance(quote_data, str):
+            rows.append([symbol] + [None] * (len(QUOTE_FIELDS) - 1) + [quote_data])
+        else:
+            global_quote = quote_data.get("Global Quote", {})
+            rows.append([global_quote.get(field) for field in QUOTE_FIELDS] + [None])
+    return Table([field.split(". ", 1)[1] for field in QUOTE_FIELDS] + ["error"], rows)
+
+
+def _normalize_time_series(arguments: Dict[str, Any]) -> Dict[str, Any]:
+    arguments["symbol"] = arguments["symbol"].strip().upper()
+    # Validation has checked these are calendar dates
+    for name in ("start", "end"):
+        if arguments.get(name):
+            arguments[name] = date.fromisoformat(arguments[name])
+    return arguments
+
+
+async def _fetch_time_series(client: httpx.AsyncClient, arguments: Dict[str, Any]) -> Any:
+    start, end = arguments.get("start"), arguments.get("end")
+    if start and end and start > end:
+        return "start must not be after end"
+    outputsize = arguments["outputsize"]
+    # Fetch the full history only when the requested window reaches past the compact one
+    if start:
+        needs_full = (date.today() - start).days > COMPACT_CALENDAR_DAYS
+    else:
+        bars = (arguments.get("last_n") or (0 if end else 5)) * INTERVAL_TRADING_DAYS[arguments["interval"]]
+        if end:
+            # The bars shown end at `end`, so the compact window must reach back past it too
+            bars += (date.today() - end).days * 5 // 7
+        needs_full = bars > COMPACT_SIZE
+    if needs_full:
+        outputsize = "full"
+    return await fetch_daily_series(client, arguments["symbol"], outputsize)
+
+
+def _time_series_window(series: Any, arguments: Dict[str, Any]) -> Tuple[Any, Optional[int]]:
+    """The requested range at the requested interval, and how many bars of it to show."""
+    start, end = arguments.get("start"), arguments.get("end")
+    rows = arguments.get("last_n") or (RANGE_ROWS if start or end else 5)
+    if isinstance(series, PriceSeries):
+        series = resample(series.between(start, end), arguments["interval"])
+    return series, rows
+
+
+def _format_time_series(series: Any, arguments: Dict[str, Any]) -> str:
+    series, rows = _time_series_window(series, arguments)
+    text = f"Time series data for {arguments['symbol']}:\n\n{format_time_series(series, rows, arguments['interval'])}"
+    ranged = arguments.get("start") or arguments.get("end")
+    if ranged and not arguments.get("last_n") and isinstance(series, PriceSeries) and len(series) > rows:
+        text += f"\nShowing the latest {rows} of {len(series)} bars in the range; pass last_n to see more."
+    return text
+
+
+def _export_time_series(series: Any, arguments: Dict[str, Any]) -> Any:
+    series, rows = _time_series_window(series, arguments)
+    if not isinstance(series, PriceSeries):
+        return series
+    return series_table(series, rows, interval=arguments["interval"], last_refreshed=series.metadata.get("3. Last Refreshed"), bars=len(series))
+
+
+async def _fetch_indicator_series(client: httpx.AsyncClient, arguments: Dict[str, Any]) -> Any:
+    # Compact history is enough unless a period needs more bars than it holds
+    needed = lookback(tuple(arguments["indicators"]), arguments)
+    outputsize = "full" if needed > COMPACT_SIZE else "compact"
+    return await fetch_daily_series(client, arguments["symbol"], outputsize)
+
+
+def _format_indicators(series: Any, arguments: Dict[str, Any]) -> str:
+    if not isinstance(series, PriceSeries):
+        return "No time series data available in the response"
+    indicator_values = compute_indicators(series.close, tuple(arguments["indicators"]), arguments)
+    return format_indicators(series, indicator_values, arguments["rows"])
+
+
+def _export_indicators(series: Any, arguments: Dict[str, Any]) -> Any:
+    if not isinstance(series, PriceSeries):
+        return series
+    indicator_values = compute_indicators(series.close, tuple(arguments["indicators"]), arguments)
+    return indicators_table(series, indicator_values, arguments["rows"])
+
+
+def _normalize_portfolio(arguments: Dict[str, Any]) -> Dict[str, Any] | str:
+    arguments["benchmark"] = arguments["benchmark"].strip().upper()
+    return _normalize_symbols(arguments)
+
+
+async def _fetch_portfolio(client: httpx.AsyncClient, arguments: Dict[str, Any]) -> PortfolioAnalytics | str:
+    symbols, benchmark = arguments["symbols"], arguments["benchmark"] or None
+    outputsize = "full" if arguments["window"] + 1 > COMPACT_SIZE else "compact"
+    fetched = await fetch_daily_series_many(client, list(dict.fromkeys(symbols + ([benchmark] if benchmark else []))), outputsize)
+    errors = {
+        symbol: data if isinstance(data, str) else "No time series data available in the response"
+        for symbol, data in fetched.items() if not isinstance(data, PriceSeries)
+    }
+    included = [symbol for symbol in symbols if symbol not in errors]
+    if not included:
+        return "No time series data for any symbol: " + "; ".join(f"{symbol}: {error}" for symbol, error in errors.items())
+    # Without the benchmark, the other statistics are still worth returning
+    if benchmark in errors:
+        benchmark = None
+    analytics = analyze(fetched, included, arguments["window"], benchmark)
+    if isinstance(analytics, PortfolioAnalytics):
+        analytics.errors = errors
+    return analytics
+
+
+def _contract_filter(arguments: Dict[str, Any]) -> ContractFilter:
+    return ContractFilter(**{name: arguments.get(name) for name in ContractFilter.__slots__})
+
+
+async def _fetch_options(client: httpx.AsyncClient, arguments: Dict[str, Any]) -> Any:
+    return await fetch_historical_options(
+        client,
+        arguments["symbol"],
+        arguments.get("date"),
+        arguments["limit"],
+        arguments["sort_by"],
+        arguments["sort_order"],
+        _contract_filter(arguments)
+    )
+
+
+def _format_options(options_data: Any, arguments: Dict[str, Any]) -> str:
+    formatted_options = format_historical_options(
+        options_data,
+        arguments["limit"],
+        arguments["sort_by"],
+        arguments["sort_order"],
+        _contract_filter(arguments)
+    )
+    options_text = f"Historical options data for {arguments['symbol']}"
+    if arguments.get("date"):
+        options_text += f" on {arguments['date']}"
+    return options_text + f":\n\n{formatted_options}"
+
+
+def _export_options(selection: Any, arguments: Dict[str, Any]) -> Any:
+    if not isinstance(selection, OptionsSelection):
+        return selection
+    return options_table(selection, symbol=arguments["symbol"], sort_by=arguments["sort_by"], sort_order=arguments["sort_order"])
+
+
+async def _fetch_options_analytics(client: httpx.AsyncClient, arguments: Dict[str, Any]) -> Any:
+    chain = await fetch_options_chain(client, arguments["symbol"], arguments.get("date"))
+    if isinstance(chain, dict):
+        return f"No options contracts in the response: {chain.get('message', chain.get('Error Message', 'N/A'))}"
+    if not isinstance(chain, OptionsChain):
+        return chain
+    return analyze_chain(chain, arguments.get("spot"), arguments["expirations"], arguments["strikes"])
+
+
+def _format_options_analytics(analytics: Any, arguments: Dict[str, Any]) -> str:
+    options_text = f"Options analytics for {arguments['symbol']}"
+    if arguments.get("date"):
+        options_text += f" on {arguments['date']}"
+    return options_text + f":\n\n{format_options_analytics(analytics, arguments['gamma_strikes'])}"
+
+
+async def _fetch_server_stats(client: httpx.AsyncClient, arguments: Dict[str, Any]) -> Dict[str, Any]:
+    return collect_server_stats()
+
+
+def _format_server_stats(stats: Dict[str, Any], arguments: Dict[str, Any]) -> str:
+    if arguments["format"] == "prometheus":
+        return format_prometheus_stats(stats)
+    return f"Server statistics:\n\n{format_server_stats(stats)}"
+
+
+def _crypto_series_tool(series_type: str, function: str, parse: Any) -> ToolSpec:
+    return ToolSpec(
+        name=f"get-crypto-{series_type}",
+        description=f"Get {series_type} time series data for a cryptocurrency",
+        input_schema=_symbol_schema(CRYPTO_SYMBOL, market=MARKET),
+        normalize=upper_case("symbol", "market"),
+        fetch=upstream(function, params=lambda args: {"market": args["market"]}, parse=parse),
+        format=lambda data, args: (
+            f"{series_type.capitalize()} cryptocurrency time series for {args['symbol']} in {args['market']}:\n\n"
+            f"{format_crypto_time_series(data, series_type)}"
         ),
-        types.Tool(
-            name="get-company-info",
-            description="Get detailed company information",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "symbol": {
-                        "type": "string",
-                        "description": "Stock symbol (e.g., AAPL, MSFT)",
-                    },
-                },
-                "required": ["symbol"],
-            },
+        export=lambda data, args: (
+            series_table(data, 5, market=args["market"], last_refreshed=data.metadata.get("6. Last Refreshed"))
+            if isinstance(data, PriceSeries) else data
         ),
-        types.Tool(
-            name="get-time-series",
-            description="Get daily time series data for a stock",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "symbol": {
-                        "type": "string",
-                        "description": "Stock symbol (e.g., AAPL, MSFT)",
-                    },
-                    "outputsize": {
-                        "type": "string",
-                        "description": "compact (latest 100 data points) or full (up to 20 years of data)",
-                        "enum": ["compact", "full"],
-                        "default": "compact"
-                    }
+    )
+
+
+registry = ToolRegistry([
+    ToolSpec(
+        name="get-stock-quote",
+        description="Get current stock quote information",
+        input_schema=_symbol_schema(STOCK_SYMBOL),
+        normalize=upper_case("symbol"),
+        fetch=upstream("GLOBAL_QUOTE"),
+        format=lambda data, args: f"Stock quote for {args['symbol']}:\n\n{format_quote(data)}",
+    ),
+    ToolSpec(
+        name="get-stock-quotes",
+        description="Get current stock quotes for several symbols in one call",
+        input_schema={
+            "type": "object",
+            "properties": {
+                "symbols": {
+                    "type": "array",
+                    "description": "Stock symbols (e.g., [\"AAPL\", \"MSFT\"])",
+                    "items": {"type": "string"},
+                    "minItems": 1,
+                    "maxItems": 100
                 },
-                "required": ["symbol"],
+            },
+            "required": ["symbols"],
+        },
+        normalize=_normalize_symbols,
+        fetch=lambda client, args: fetch_quotes(client, args["symbols"]),
+        format=_format_quotes,
+        export=_export_quotes,
+    ),
+    ToolSpec(
+        name="get-company-info",
+        description="Get detailed company information",
+        input_schema=_symbol_schema(STOCK_SYMBOL),
+        normalize=upper_case("symbol"),
+        fetch=upstream("OVERVIEW"),
+        format=lambda data, args: f"Company information for {args['symbol']}:\n\n{format_company_info(data)}",
+    ),
+    ToolSpec(
+        name="get-time-series",
+        description="Get daily time series data for a stock",
+        input_schema=_symbol_schema(
+            STOCK_SYMBOL,
+            outputsize={
+                "type": "string",
+                "description": "compact (latest 100 data points) or full (up to 20 years of data)",
+                "enum": ["compact", "full"],
+                "default": "compact"
+            },
+            start={
+                "type": "string",
+                "description": "Optional: First date to include, in YYYY-MM-DD format",
+                "pattern": DATE_PATTERN,
+                "format": "date"
+            },
+            end={
+                "type": "string",
+                "description": "Optional: Last date to include, in YYYY-MM-DD format",
+                "pattern": DATE_PATTERN,
+                "format": "date"
+            },
+            last_n={
+                "type": "integer",
+                "description": "Optional: Number of most recent bars to show (default: 5, or the latest 100 bars in the range when start or end is given)",
+                "minimum": 1
+            },
+            interval={
+                "type": "string",
+                "description": "Optional: Bar size; weekly, monthly and quarterly bars are built from the daily ones",
+                "enum": list(RESAMPLE_INTERVALS),
+                "default": "daily"
             },
         ),
-        types.Tool(
-            name="get-historical-options",
-            description="get historical options chain data for a stock with sorting capabilities",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "symbol": {
-                        "type": "string",
-                        "description": "Stock symbol (e.g., AAPL, MSFT)",
-                    },
-                    "date":{
-                        "type": "string",
-                        "description": "Optional: Trading date in YYYY-MM-DD format (defaults to previous trading day, must be after 2008-01-01)",
-                        "pattern": "^20[0-9]{2}-(?:0[1-9]|1[0-2])-(?:0[1-9]|[12][0-9]|3[01])$"
-                    },
-                    "limit": {
-                        "type": "integer",
-                        "description": "Optional: Number of contracts to return (default: 10, use -1 for all contracts)",
-                        "default": 10,
-                        "minimum": -1
-                    },
-                    "sort_by": {
-                        "type": "string",
-                        "description": "Optional: Field to sort by",
-                        "enum": [
-                            "strike",
-                            "expiration",
-                            "volume",
-                            "open_interest",
-                            "implied_volatility",
-                            "delta",
-                            "gamma",
-                            "theta",
-                            "vega"
-                            "rho",
-                            "last",
-                            "bid",
-                            "ask"
-                        ],
-                        "default": "strike"
-                    },
-                    "sort_order": {
-                        "type": "string",
-                        "description": "Optional: Sort order",
-                        "enum": ["asc", "desc"],
-                        "default": "asc"
-                    }
-                },
-                "required": ["symbol"]
+        normalize=_normalize_time_series,
+        fetch=_fetch_time_series,
+        format=_format_time_series,
+        export=_export_time_series,
+    ),
+    ToolSpec(
+        name="get-technical-indicators",
+        description="Compute technical indicators (SMA, EMA, RSI, MACD, Bollinger Bands) locally from daily closes",
+        input_schema=_symbol_schema(
+            STOCK_SYMBOL,
+            indicators={
+                "type": "array",
+                "description": "Optional: Indicators to compute (default: all)",
+                "items": {"type": "string", "enum": list(INDICATORS)},
+                "default": list(INDICATORS)
             },
+            rows={
+                "type": "integer",
+                "description": "Optional: Number of most recent days to show",
+                "default": 5,
+                "minimum": 1
+            },
+            **{
+                name: {"type": "integer", "minimum": 1, "default": default}
+                for name, default in DEFAULT_PERIODS.items() if name != "bbands_stddev"
+            },
+            bbands_stddev={"type": "number", "exclusiveMinimum": 0, "default": DEFAULT_PERIODS["bbands_stddev"]},
         ),
-        types.Tool(
-            name="get-crypto-exchange-rate",
-            description="Get current cryptocurrency exchange rate",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "crypto_symbol": {
-                        "type": "string",
-                        "description": "Cryptocurrency symbol (e.g., BTC, ETH)",
-                    },
-                    "market": {
-                        "type": "string",
-                        "description": "Market currency (e.g., USD, EUR)",
-                        "default": "USD"
-                    }
+        normalize=upper_case("symbol"),
+        fetch=_fetch_indicator_series,
+        format=_format_indicators,
+        export=_export_indicators,
+    ),
+    ToolSpec(
+        name="get-portfolio-analytics",
+        description="Compare several stocks over the same trading days: return, annualized volatility, drawdown, beta and the correlation matrix of daily returns",
+        input_schema={
+            "type": "object",
+            "properties": {
+                "symbols": {
+                    "type": "array",
+                    "description": "Stock symbols (e.g., [\"AAPL\", \"MSFT\"])",
+                    "items": {"type": "string"},
+                    "minItems": 1,
+                    "maxItems": 25
+                },
+                "window": {
+                    "type": "integer",
+                    "description": f"Optional: Number of most recent daily returns to use; more than {COMPACT_SIZE - 1} needs the full history",
+                    "default": 60,
+                    "minimum": 2
                 },
-                "required": ["crypto_symbol"],
+                "benchmark": {
+                    "type": "string",
+                    "description": "Optional: Symbol to measure beta against, or an empty string for none",
+                    "default": "SPY"
+                },
+            },
+            "required": ["symbols"],
+        },
+        normalize=_normalize_portfolio,
+        fetch=_fetch_portfolio,
+        format=lambda analytics, args: f"Portfolio analytics for {len(analytics.symbols)} symbols:\n\n{format_portfolio_analytics(analytics)}",
+        export=lambda analytics, args: portfolio_table(analytics),
+    ),
+    ToolSpec(
+        name="get-historical-options",
+        description="get historical options chain data for a stock with sorting and filtering capabilities",
+        input_schema=_symbol_schema(
+            STOCK_SYMBOL,
+            date={
+                "type": "string",
+                "description": "Optional: Trading date in YYYY-MM-DD format (defaults to previous trading day, must be after 2008-01-01)",
+                "pattern": DATE_PATTERN,
+                "format": "date"
+            },
+            limit={
+                "type": "integer",
+                "description": "Optional: Number of contracts to return (default: 10, use -1 for all contracts)",
+                "default": 10,
+                "minimum": -1
+            },
+            sort_by={
+                "type": "string",
+                "description": "Optional: Field to sort by",
+                "enum": OPTIONS_SORT_FIELDS,
+                "default": "strike"
+            },
+            sort_order={
+                "type": "string",
+                "description": "Optional: Sort order",
+                "enum": ["asc", "desc"],
+                "default": "asc"
+            },
+            contract_type={
+                "type": "string",
+                "description": "Optional: Only return calls or puts",
+                "enum": ["call", "put"]
+            },
+            expiration_from={
+                "type": "string",
+                "description": "Optional: Earliest expiration date (YYYY-MM-DD)",
+                "pattern": DATE_PATTERN,
+                "format": "date"
+            },
+            expiration_to={
+                "type": "string",
+                "description": "Optional: Latest expiration date (YYYY-MM-DD)",
+                "pattern": DATE_PATTERN,
+                "format": "date"
+            },
+            strike_min={"type": "number", "description": "Optional: Minimum strike price"},
+            strike_max={"type": "number", "description": "Optional: Maximum strike price"},
+            min_volume={"type": "number", "description": "Optional: Minimum traded volume", "minimum": 0},
+            min_open_interest={"type": "number", "description": "Optional: Minimum open interest", "minimum": 0},
+            delta_min={
+                "type": "number",
+                "description": "Optional: Minimum delta (puts have negative delta)",
+                "minimum": -1,
+                "maximum": 1
+            },
+            delta_max={
+                "type": "number",
+                "description": "Optional: Maximum delta (puts have negative delta)",
+                "minimum": -1,
+                "maximum": 1
             },
         ),
-        types.Tool(
-            name="get-crypto-daily",
-            description="Get daily time series data for a cryptocurrency",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "symbol": {
-                        "type": "string",
-                        "description": "Cryptocurrency symbol (e.g., BTC, ETH)",
-                    },
-                    "market":{
-                        "type": "string",
-                        "description": "Market currency (e.g., USD, EUR)",
-                        "default": "USD"
-                    }
-                },
-                "requires": ["symbol"],
+        normalize=upper_case("symbol"),
+        fetch=_fetch_options,
+        format=_format_options,
+        export=_export_options,
+    ),
+    ToolSpec(
+        name="get-options-analytics",
+        description="Summarize a whole options chain: put/call ratios, max pain, ATM IV term structure, IV smile and gamma exposure by strike",
+        input_schema=_symbol_schema(
+            STOCK_SYMBOL,
+            date={
+                "type": "string",
+                "description": "Optional: Trading date in YYYY-MM-DD format (defaults to previous trading day, must be after 2008-01-01)",
+                "pattern": DATE_PATTERN,
+                "format": "date"
+            },
+            spot={
+                "type": "number",
+                "description": "Optional: Underlying price; implied from the nearest expiration by put-call parity when omitted",
+                "exclusiveMinimum": 0
+            },
+            expirations={
+                "type": "integer",
+                "description": "Optional: Number of nearest expirations to show the IV smile for",
+                "default": 3,
+                "minimum": 0
+            },
+            strikes={
+                "type": "integer",
+                "description": "Optional: Strikes on each side of the money in each IV smile",
+                "default": 5,
+                "minimum": 1
+            },
+            gamma_strikes={
+                "type": "integer",
+                "description": "Optional: Number of strikes with the largest gamma exposure to show",
+                "default": 10,
+                "minimum": 1
             },
         ),
-        types.Tool(
-            name="get-crypto-weekly",
-            description="Get weekly time series data for a cryptocurrency",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "symbol": {
-                        "type": "string",
-                        "description": "Cryptocurrency symbol (e.g., BTC, ETH)",
-                    },
-                    "market":{
-                        "type": "string",
-                        "description": "Market currency (e.g., USD, EUR)",
-                        "default": "USD"
-                    }
-                },
-                "requires": ["symbol"],
+        normalize=upper_case("symbol"),
+        fetch=_fetch_options_analytics,
+        format=_format_options_analytics,
+        export=lambda analytics, args: options_analytics_record(analytics, args["gamma_strikes"]),
+    ),
+    ToolSpec(
+        name="get-crypto-exchange-rate",
+        description="Get current cryptocurrency exchange rate",
+        input_schema={
+            "type": "object",
+            "properties": {
+                "crypto_symbol": CRYPTO_SYMBOL,
+                "market": MARKET,
             },
+            "required": ["crypto_symbol"],
+        },
+        normalize=upper_case("crypto_symbol", "market"),
+        fetch=upstream(
+            "CURRENCY_EXCHANGE_RATE",
+            symbol_arg=None,
+            params=lambda args: {"from_currency": args["crypto_symbol"], "to_currency": args["market"]}
+        ),
+        format=lambda data, args: (
+            f"Cryptocurrency exchange rate for {args['crypto_symbol']}/{args['market']}:\n\n{format_crypto_rate(data)}"
         ),
-        types.Tool(
-            name="get-crypto-monthly",
-            description="Get monthly time series data for a cryptocurrency",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "symbol": {
-                        "type": "string",
-                        "description": "Cryptocurrency symbol (e.g., BTC, ETH)",
-                    },
-                    "market":{
-                        "type": "string",
-                        "description": "Market currency (e.g., USD, EUR)",
-                        "default": "USD"
-                    }
+    ),
+    _crypto_series_tool("daily", "DIGITAL_CURRENCY_DAILY", parse_crypto_daily),
+    _crypto_series_tool("weekly", "DIGITAL_CURRENCY_WEEKLY", parse_crypto_weekly),
+    _crypto_series_tool("monthly", "DIGITAL_CURRENCY_MONTHLY", parse_crypto_monthly),
+    ToolSpec(
+        name="get-server-stats",
+        description="Get latency, traffic and error statistics for this server's tools and Alpha Vantage calls",
+        input_schema={
+            "type": "object",
+            "properties": {
+                "format": {
+                    "type": "string",
+                    "description": "Optional: text summary or Prometheus text exposition format",
+                    "enum": ["text", "prometheus"],
+                    "default": "text"
                 },
-                "requires": ["symbol"],
             },
-        ),
-    ]
+        },
+        fetch=_fetch_server_stats,
+        format=_format_server_stats,
+        cacheable=False,
+    ),
+])
+
+
+@server.list_tools()
+async def handle_list_tools() -> list[types.Tool]:
+    return registry.tools()
+
 
 @server.call_tool()
 async def handle_call_tool(
     name: str, arguments: dict | None
 ) -> list[types.TextContent | types.ImageContent | types.EmbeddedResource]:
-    
-    if not arguments:
-        return [types.TextContent(type="text", text="Missing arguments for the request")]
-
-    if name == "get-stock-quote":
-        symbol = arguments.get("symbol")
-        if not symbol:
-            return [types.TextContent(type="text", text="Missing symbol parameter")]
-
-        symbol = symbol.upper()
-
-        async with httpx.AsyncClient() as client:
-            quote_data = await make_alpha_request(
-                client,
-                "GLOBAL_QUOTE",
-                symbol
-            )
-
-            if isinstance(quote_data, str):
-                return [types.TextContent(type="text", text=f"Error: {quote_data}")]
-
-            formatted_quote = format_quote(quote_data)
-            quote_text = f"Stock quote for {symbol}:\n\n{formatted_quote}"
-
-            return [types.TextContent(type="text", text=quote_text)]
-
-    elif name == "get-company-info":
-        symbol = arguments.get("symbol")
-        if not symbol:
-            return [types.TextContent(type="text", text="Missing symbol parameter")]
-
-        symbol = symbol.upper()
-
-        async with httpx.AsyncClient() as client:
-            company_data = await make_alpha_request(
-                client,
-                "OVERVIEW",
-                symbol
-            )
-
-            if isinstance(company_data, str):
-                return [types.TextContent(type="text", text=f"Error: {company_data}")]
-
-            formatted_info = format_company_info(company_data)
-            info_text = f"Company information for {symbol}:\n\n{formatted_info}"
-
-            return [types.TextContent(type="text", text=info_text)]
-
-    elif name == "get-time-series":
-        symbol = arguments.get("symbol")
-        if not symbol:
-            return [types.TextContent(type="text", text="Missing symbol parameter")]
-
-        symbol = symbol.upper()
-        outputsize = arguments.get("outputsize", "compact")
-
-        async with httpx.AsyncClient() as client:
-            time_series_data = await make_alpha_request(
-                client,
-                "TIME_SERIES_DAILY",
-                symbol,
-                {"outputsize": outputsize}
-            )
-
-            if isinstance(time_series_data, str):
-                return [types.TextContent(type="text", text=f"Error: {time_series_data}")]
-
-            formatted_series = format_time_series(time_series_data)
-            series_text = f"Time series data for {symbol}:\n\n{formatted_series}"
-
-            return [types.TextContent(type="text", text=series_text)]
-        
-    elif name == "get-historical-options":
-        symbol = arguments.get("symbol")
-        date = arguments.get("data")
-        limit = arguments.get("limit", 10)
-        sort_by = arguments.get("sort_by", "strike")
-        sort_order = arguments.get("sort_order", "asc")
-
-        if not symbol:
-            return [type.TextContent(type="text", text="Missing symbol parameter")]
-        
-        symbol = symbol.upper()
-
-        async with httpx.AsyncClient() as client:
-            params = {}
-            if date:
-                params["date"] = date
-
-            options_data = await make_alpha_request(
-                client,
-                "HISTORICAL_OPTIONS",
-                symbol,
-                params
-            )
-
-            if isinstance(options_data, str):
-                return [types.TextContent(type="text", text=f"Error:{options_data}")]
-            
-            formatted_options = format_historical_options(options_data, limit, sort_by, sort_order)
-            options_text = f"Historical options data for {symbol}"
-            if date:
-                options_text += f" on {date}"
-            options_text += f":\n\n{formatted_options}"
-
-            return [types.TextContent(type="text", text=options_text)]
-        
-    elif name == "get-crypto-exchange-rate":
-        crypto_symbol = arguments.get("crypto_symbol")
-        if not crypto_symbol:
-            return[types.TextContent(type="text", text="missing crypto_symbol parameter")]
-        
-        market = arguments.get("market", "USD")
-        crypto_symbol = crypto_symbol.upper()
-        market = market.upper()
-
-        async with httpx.AsyncClient() as client:
-            crypto_data = await make_alpha_request(
-                client,
-                "CURRENCY_EXCHANGE_RATE",
-                None,
-                {
-                    "from_currency": crypto_symbol,
-                    "to_currency": market
-                }
-            )
-
-            if isinstance(crypto_data, str):
-                return [types.TextContent(type="text", text=f"Error: {crypto_data}")]
-            
-            formatted_rate = format_crypto_rate(crypto_data)
-            rate_text = f"Cryptocurrency exchange rate for {crypto_symbol}/{market}:\n\n{formatted_rate}"
-
-            return [types.TextContent(type="text", text=rate_text)]
-    
-    elif name == "get-crypto-daily":
-        symbol = arguments.get("symbol")
-        market = arguments.get("market", "USD")
-
-        if not symbol:
-            return [types.TextContent(type="text", text="Missing symbol parameter")]
-        
-        symbol = symbol.upper()
-        market = market.upper()
-
-        async with httpx.AsyncClient() as client:
-            crypto_data = await make_alpha_request(
-                client,
-                "DIGITAL_CURRENCY_DAILY",
-                symbol,
-                {"market": market}
-            )
-
-            if isinstance(crypto_data, str):
-                return [types.TextContent(type="text", text=f"Error: {crypto_data}")]
-            
-            formatted_data = format_crypto_time_series(crypto_data, "daily")
-            data_text = f"Daily cryptocurrency time series for {symbol} in {market}:\n\n{formatted_data}"
-
-            return [types.TextContent(type="text", text=data_text)]
-        
-    elif name == "get-crypto-weekly":
-        symbol = arguments.get("symbol")
-        market = arguments.get("market", "USD")
-
-        if not symbol:
-            return [types.TextContent(type="text", text="Missing symbol parameter")]
-        
-        symbol = symbol.upper()
-        market = market.upper()
-
-        async with httpx.AsyncClient() as client:
-            crypto_data = await make_alpha_request(
-                client,
-                "DIGITAL_CURRENCY_WEEKLY",
-                symbol,
-                {"market": market}
-            )
-
-            if isinstance(crypto_data, str):
-                return [types.TextContent(type="text", text=f"Error: {crypto_data}")]
-            
-            formatted_data = format_crypto_time_series(crypto_data, "weekly")
-            data_text = f"Weekly cryptocurrency time series for {symbol} in {market}:\n\n{formatted_data}"
-
-            return [types.TextContent(type="text", text=data_text)]
-        
-    elif name == "get-crypto-monthly":
-        symbol = arguments.get("symbol")
-        market = arguments.get("market", "USD")
-
-        if not symbol:
-            return [types.TextContent(type="text", text="Missing symbol parameter")]
-        
-        symbol = symbol.upper()
-        market = market.upper()
-
-        async with httpx.AsyncClient() as client:
-            crypto_data = await make_alpha_request(
-                client,
-                "DIGITAL_CURRENCY_MONTHLY",
-                symbol,
-                {"market": market}
-            )
-
-            if isinstance(crypto_data, str):
-                return [types.TextContent(type="text", text=f"Error: {crypto_data}")]
-            
-            formatted_data = format_crypto_time_series(crypto_data, "monthly")
-            data_text = f"Monthly cryptocurrency time series for {symbol} in {market}:\n\n{formatted_data}"
-
-            return [types.TextContent(type="text", text=data_text)]
-    
-async def main():
+    texts = await registry.call(get_http_client(), name, arguments)
+    return [types.TextContent(type="text", text=text) for text in texts]
+
+
+TRANSPORT = os.getenv('ALPHA_VANTAGE_TRANSPORT', 'stdio')
+HTTP_HOST = os.getenv('ALPHA_VANTAGE_HOST', '127.0.0.1')
+HTTP_PORT = int(os.getenv('ALPHA_VANTAGE_PORT', '8000'))
+
+
+def initialization_options() -> InitializationOptions:
+    return InitializationOptions(
+        server_name="alpha_vantage_finance",
+        server_version="0.1.0",
+        capabilities=server.get_capabilities(
+            notification_options=NotificationOptions(),
+            experimental_capabilities={},
+        ),
+    )
+
+
+async def run_stdio() -> None:
     async with mcp.server.stdio.stdio_server() as (read_stream, write_stream):
-        await server.run(
-            read_stream,
-            write_stream,
-            InitializationOptions(
-                server_name="alpha_vantage_finance",
-                server_version="0.1.0",
-                capabilities=server.get_capabilities(
-                    notification_options=NotificationOptions(),
-                    experimental_capabilities={},
-                ),
-            ),
-        )
+        await server.run(read_stream, write_stream, initialization_options())
+
+
+def create_sse_app():
+    """Starlette app serving MCP over SSE; every session shares this process's client, caches and quota.
+
+    Clients connect with GET /sse and post messages to /messages. GET /metrics
+    returns the server statistics in the Prometheus text format.
+    """
+    from mcp.server.sse import SseServerTransport
+    from starlette.applications import Starlette
+    from starlette.responses import PlainTextResponse
+    from starlette.routing import Route
+
+    sse = SseServerTransport("/messages")
+
+    class SseEndpoint:
+        # A class instance, so Starlette hands it the raw ASGI call: the SSE
+        # transport writes its own responses
+        async def __call__(self, scope, receive, send):
+            async with sse.connect_sse(scope, receive, send) as (read_stream, write_stream):
+                await server.run(read_stream, write_stream, initialization_options())
+
+    class MessagesEndpoint:
+        async def __call__(self, scope, receive, send):
+            await sse.handle_post_message(scope, receive, send)
+
+    async def handle_metrics(request):
+        return PlainTextResponse(format_prometheus_stats(collect_server_stats()), media_type="text/plain; version=0.0.4")
+
+    return Starlette(routes=[
+        Route("/sse", endpoint=SseEndpoint()),
+        Route("/messages", endpoint=MessagesEndpoint(), methods=["POST"]),
+        Route("/metrics", endpoint=handle_metrics),
+    ])
+
+
+async def run_sse(host: str, port: int) -> None:
+    try:
+        import uvicorn
+    except ImportError:
+        raise RuntimeError("The sse transport needs uvicorn: pip install alpha-vantage-mcp[http]") from None
+    config = uvicorn.Config(create_sse_app(), host=host, port=port, log_level="info")
+    await uvicorn.Server(config).serve()
+
+
+async def main(transport: str = TRANSPORT, host: str = HTTP_HOST, port: int = HTTP_PORT):
+    global http_client
+    http_client = create_http_client()
+    # Keeps the watchlist's cache entries warm for as long as the server runs
+    refresher = None
+    if len(watchlist):
+        refresher = asyncio.create_task(watchlist.run(lambda name, arguments: registry.prefetch(get_http_client(), name, arguments)))
+    try:
+        if transport == "sse":
+            await run_sse(host, port)
+        else:
+            await run_stdio()
+    finally:
+        if refresher is not None:
+            # Let an in-flight refresh unwind before the client it uses is closed
+            refresher.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await refresher
+        await http_client.aclose()
+        http_client = None
+        daily_store.close()
+        shared_cache.close()
+        if REPLAY_PATH:
+            # The store's temporary directory for this replay
+            shutil.rmtree(DATA_DIR, ignore_errors=True)
 
 if __name__ == "__main__":
     asyncio.run(main())
@@ -0,0 +1,204 @@
+from typing import Any, Dict, Optional
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+from .recording import REPLAY_PATH
+from .store import DATA_DIR
+
+# One SQLite file in WAL mode shared by every server process on the host; never
+# used while replaying, so live processes can't be served recorded responses
+SHARED_CACHE_ENABLED = (
+    os.getenv('ALPHA_VANTAGE_SHARED_CACHE', '1').lower() not in ('0', 'false', 'no') and not REPLAY_PATH
+)
+SHARED_CACHE_PATH = os.getenv('ALPHA_VANTAGE_SHARED_CACHE_PATH', os.path.join(DATA_DIR, "responses.sqlite3"))
+SHARED_CACHE_MAX_BYTES = int(os.getenv('ALPHA_VANTAGE_SHARED_CACHE_MAX_BYTES', str(512 * 1024 * 1024)))
+# Seconds a process may hold a refresh lock before others assume it died
+SHARED_LOCK_LEASE = float(os.getenv('ALPHA_VANTAGE_SHARED_LOCK_LEASE', '90'))
+# How often a process waiting on another's refresh checks for the result
+SHARED_POLL_INTERVAL = 0.2
+
+# Prune expired rows and enforce the size cap every this many writes
+_PRUNE_EVERY = 64
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    function TEXT NOT NULL,
+    body BLOB NOT NULL,
+    stored_at REAL NOT NULL,
+    expires_at REAL,
+    keep_until REAL
+);
+CREATE INDEX IF NOT EXISTS responses_stored_at ON responses (stored_at);
+CREATE TABLE IF NOT EXISTS refresh_locks (
+    key TEXT PRIMARY KEY,
+    owner TEXT NOT NULL,
+    expires_at REAL NOT NULL
+);
+"""
+
+
+class SharedEntry:
+    """A response body from the shared cache. Times are wall-clock seconds."""
+
+    __slots__ = ("body", "stored_at", "expires_at")
+
+    def __init__(self, body: bytes, stored_at: float, expires_at: Optional[float]):
+        self.body = body
+        self.stored_at = stored_at
+        self.expires_at = expires_at
+
+    @property
+    def age(self) -> float:
+        return max(0.0, time.time() - self.stored_at)
+
+    def ttl(self) -> Optional[float]:
+        """Seconds left until it expires, None if it never does."""
+        return None if self.expires_at is None else self.expires_at - time.time()
+
+    def is_fresh(self) -> bool:
+        return self.expires_at is None or self.expires_at > time.time()
+
+
+class SharedCache:
+    """Upstream response bodies shared between server processes through SQLite.
+
+    Every stdio client spawns its own server, so a host can run many; they all
+    read and write one database in WAL mode, which lets readers proceed while
+    another process writes. A refresh lock per key makes sure only one process
+    fetches a given response while the others wait for its result.
+
+    Methods are blocking; call them through asyncio.to_thread from the event loop.
+    """
+
+    def __init__(self, path: str, max_bytes: int = SHARED_CACHE_MAX_BYTES, lease: float = SHARED_LOCK_LEASE):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.lease = lease
+        # Identifies this process's refresh locks
+        self.owner = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._writes = 0
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.waits = 0
+        self.errors = 0
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            if self.path != ":memory:":
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            # The timeout covers waiting for another process's write transaction
+            conn = sqlite3.connect(self.path, timeout=10.0, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    def get(self, key: str) -> Optional[SharedEntry]:
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT body, stored_at, expires_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        entry = SharedEntry(row[0], row[1], row[2])
+        if entry.is_fresh():
+            self.hits += 1
+        else:
+            self.misses += 1
+        return entry
+
+    def set(self, key: str, function: str, body: bytes, ttl: Optional[float], keep: float) -> None:
+        """Store a response that is fresh for `ttl` seconds (None for ever) and kept `keep` seconds past that."""
+        if len(body) > self.max_bytes or (ttl is not None and ttl <= 0):
+            return
+        now = time.time()
+        expires_at = None if ttl is None else now + ttl
+        keep_until = None if expires_at is None else expires_at + keep
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?)",
+                    (key, function, body, now, expires_at, keep_until),
+                )
+            self.stores += 1
+            self._writes += 1
+            if self._writes >= _PRUNE_EVERY:
+                self._writes = 0
+                self._prune(conn)
+
+    def _prune(self, conn: sqlite3.Connection) -> None:
+        with conn:
+            conn.execute("DELETE FROM responses WHERE keep_until < ?", (time.time(),))
+            total = conn.execute("SELECT COALESCE(SUM(LENGTH(body)), 0) FROM responses").fetchone()[0]
+            if total <= self.max_bytes:
+                return
+            # Drop the oldest responses until the rest fit
+            for key, size in conn.execute("SELECT key, LENGTH(body) FROM responses ORDER BY stored_at").fetchall():
+                conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                total -= size
+                if total <= self.max_bytes:
+                    break
+
+    def try_lock(self, key: str) -> bool:
+        """Take the refresh lock for `key` unless another live process holds it."""
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                conn.execute("DELETE FROM refresh_locks WHERE key = ? AND expires_at < ?", (key, now))
+                taken = conn.execute(
+                    "INSERT OR IGNORE INTO refresh_locks VALUES (?, ?, ?)", (key, self.owner, now + self.lease)
+                ).rowcount == 1
+        return taken
+
+    def unlock(self, key: str) -> None:
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                conn.execute("DELETE FROM refresh_locks WHERE key = ? AND owner = ?", (key, self.owner))
+
+    def stats(self) -> Dict[str, Any]:
+        try:
+            with self._lock:
+                entries, size = self._connection().execute(
+                    "SELECT COUNT(*), COALESCE(SUM(LENGTH(body)), 0) FROM responses"
+                ).fetchone()
+        except sqlite3.Error:
+            entries, size = 0, 0
+        return {
+            "enabled": True,
+            "entries": entries,
+            "bytes": size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "stores": self.stores,
+            "waits": self.waits,
+            "errors": self.errors,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                # Drop locks left behind, e.g. when the server is stopped mid-request
+                with self._conn:
+                    self._conn.execute("DELETE FROM refresh_locks WHERE owner = ?", (self.owner,))
+                self._conn.close()
+                self._conn = None
+
+
+def shared_key(params: Dict[str, Any]) -> str:
+    """The query string without the API key, in a stable order."""
+    return "&".join(f"{name}={value}" for name, value in sorted(params.items()) if name != "apikey")
+
+
+shared_cache = SharedCache(SHARED_CACHE_PATH)
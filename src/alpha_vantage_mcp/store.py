@@ -0,0 +1,238 @@
+from array import array
+from bisect import bisect_left
+from collections import OrderedDict
+from datetime import date
+from typing import Dict, Hashable, Optional
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+from .recording import REPLAY_PATH
+from .series import PriceSeries
+
+DATA_DIR = os.getenv('ALPHA_VANTAGE_DATA_DIR', os.path.join(os.path.expanduser('~'), '.cache', 'alpha_vantage_mcp'))
+if REPLAY_PATH:
+    # Replayed responses are fixtures, not market data, so they are stored apart for this run only
+    DATA_DIR = tempfile.mkdtemp(prefix="alpha_vantage_replay_")
+STORE_ENABLED = os.getenv('ALPHA_VANTAGE_STORE', '1').lower() not in ('0', 'false', 'no')
+# Full histories kept in memory after loading, so repeat calls skip SQLite
+STORE_MEMORY_BYTES = int(os.getenv('ALPHA_VANTAGE_STORE_MEMORY_BYTES', str(64 * 1024 * 1024)))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS daily_bars (
+    symbol TEXT NOT NULL,
+    date TEXT NOT NULL,
+    open REAL,
+    high REAL,
+    low REAL,
+    close REAL,
+    volume INTEGER,
+    PRIMARY KEY (symbol, date)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS series_meta (
+    symbol TEXT PRIMARY KEY,
+    full_history INTEGER NOT NULL DEFAULT 0,
+    last_refreshed TEXT,
+    time_zone TEXT,
+    updated_at REAL
+);
+"""
+
+
+def _fingerprint(series: PriceSeries) -> Hashable:
+    """Tells a series apart from an updated one, which may change the newest bar in place."""
+    last = len(series) - 1
+    return (series.metadata.get("3. Last Refreshed"), len(series), series.dates[0], series.dates[last], series.close[last], series.volume[last])
+
+
+def _splice(history: PriceSeries, recent: PriceSeries) -> PriceSeries:
+    """`history` with its bars from the first one of `recent` onwards replaced by `recent`."""
+    cut = bisect_left(history.dates, recent.dates[0])
+    metadata = dict(history.metadata)
+    metadata["3. Last Refreshed"] = recent.metadata.get("3. Last Refreshed")
+    metadata["5. Time Zone"] = recent.metadata.get("5. Time Zone")
+    return PriceSeries(
+        history.symbol, metadata, history.dates[:cut] + recent.dates, history.open[:cut] + recent.open,
+        history.high[:cut] + recent.high, history.low[:cut] + recent.low, history.close[:cut] + recent.close,
+        history.volume[:cut] + recent.volume,
+    )
+
+
+class TimeSeriesStore:
+    """SQLite-backed store of daily OHLCV bars that survives restarts.
+
+    Methods are blocking; call them through asyncio.to_thread from the event loop.
+    `full_history`, `is_merged` and `loaded` only read memory and can be used
+    directly; they let repeat calls skip SQLite once nothing new has arrived.
+    Merged bars are applied to the history held in memory rather than
+    reloading it.
+    """
+
+    def __init__(self, path: str, memory_bytes: int = STORE_MEMORY_BYTES):
+        self.path = path
+        self.memory_bytes = memory_bytes
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        # What has_full_history last found per symbol
+        self.full_history: Dict[str, bool] = {}
+        self._merged: Dict[str, Hashable] = {}
+        self._loaded: "OrderedDict[str, PriceSeries]" = OrderedDict()
+        self._loaded_bytes = 0
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            if self.path != ":memory:":
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.executescript(_SCHEMA)
+        return self._conn
+
+    def has_full_history(self, symbol: str) -> bool:
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT full_history FROM series_meta WHERE symbol = ?", (symbol,)
+            ).fetchone()
+        full = self.full_history[symbol] = bool(row and row[0])
+        return full
+
+    def is_merged(self, symbol: str, series: PriceSeries) -> bool:
+        """Whether `series` is the one last merged for `symbol`, e.g. a cached response served again."""
+        return len(series) > 0 and self._merged.get(symbol) == _fingerprint(series)
+
+    def loaded(self, symbol: str) -> Optional[PriceSeries]:
+        """The stored history of `symbol` as held in memory, None if it is not."""
+        series = self._loaded.get(symbol)
+        if series is not None:
+            self._loaded.move_to_end(symbol)
+        return series
+
+    def merge(self, symbol: str, series: PriceSeries, full: bool) -> bool:
+        """Upsert the bars of a parsed TIME_SERIES_DAILY series.
+
+        A compact series is only merged into a stored full history when it
+        overlaps the newest stored bar; otherwise the history would have a gap
+        and False is returned so the caller can fetch the full series instead.
+        """
+        if not len(series):
+            return False
+
+        rows = [
+            (
+                symbol,
+                date.fromordinal(series.dates[i]).isoformat(),
+                series.open[i],
+                series.high[i],
+                series.low[i],
+                series.close[i],
+                int(series.volume[i]),
+            )
+            for i in range(len(series))
+        ]
+
+        with self._lock:
+            conn = self._connection()
+            stored_full = conn.execute(
+                "SELECT full_history FROM series_meta WHERE symbol = ?", (symbol,)
+            ).fetchone()
+            latest = conn.execute(
+                "SELECT MAX(date) FROM daily_bars WHERE symbol = ?", (symbol,)
+            ).fetchone()[0]
+            if not full and stored_full and stored_full[0]:
+                if latest is None or rows[0][1] > latest:
+                    return False
+
+            with conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO daily_bars VALUES (?, ?, ?, ?, ?, ?, ?)", rows
+                )
+                conn.execute(
+                    "INSERT INTO series_meta (symbol, full_history, last_refreshed, time_zone, updated_at) "
+                    "VALUES (?, ?, ?, ?, ?) "
+                    "ON CONFLICT(symbol) DO UPDATE SET "
+                    "full_history = MAX(full_history, excluded.full_history), "
+                    "last_refreshed = excluded.last_refreshed, "
+                    "time_zone = excluded.time_zone, "
+                    "updated_at = excluded.updated_at",
+                    (
+                        symbol,
+                        int(full),
+                        series.metadata.get("3. Last Refreshed"),
+                        series.metadata.get("5. Time Zone"),
+                        time.time(),
+                    ),
+                )
+            self._merged[symbol] = _fingerprint(series)
+            history = self._loaded.get(symbol)
+            if full:
+                self.full_history[symbol] = True
+                # Unless the store already holds newer bars, the full series is the whole history
+                self._unload(symbol)
+                if latest is None or latest <= rows[-1][1]:
+                    self._remember(symbol, series)
+            elif history is not None:
+                self._remember(symbol, _splice(history, series))
+        return True
+
+    def load(self, symbol: str) -> Optional[PriceSeries]:
+        """Return the stored history as a PriceSeries, oldest bar first."""
+        with self._lock:
+            conn = self._connection()
+            meta = conn.execute(
+                "SELECT last_refreshed, time_zone FROM series_meta WHERE symbol = ?", (symbol,)
+            ).fetchone()
+            if meta is None:
+                return None
+            rows = conn.execute(
+                "SELECT date, open, high, low, close, volume FROM daily_bars "
+                "WHERE symbol = ? ORDER BY date",
+                (symbol,),
+            ).fetchall()
+            merged = self._merged.get(symbol)
+
+        dates = array("l", (date.fromisoformat(row[0]).toordinal() for row in rows))
+        series = PriceSeries(
+            symbol,
+            {
+                "1. Information": "Daily Prices (open, high, low, close) and Volumes",
+                "2. Symbol": symbol,
+                "3. Last Refreshed": meta[0],
+                "4. Output Size": "Full size",
+                "5. Time Zone": meta[1],
+            },
+            dates,
+            array("d", (row[1] for row in rows)),
+            array("d", (row[2] for row in rows)),
+            array("d", (row[3] for row in rows)),
+            array("d", (row[4] for row in rows)),
+            array("q", (row[5] for row in rows)),
+        )
+        with self._lock:
+            # Unless bars were merged while this one was being built
+            if self._merged.get(symbol) == merged:
+                self._remember(symbol, series)
+        return series
+
+    def _remember(self, symbol: str, series: PriceSeries) -> None:
+        self._unload(symbol)
+        if series.nbytes > self.memory_bytes:
+            return
+        self._loaded[symbol] = series
+        self._loaded_bytes += series.nbytes
+        while self._loaded_bytes > self.memory_bytes:
+            self._unload(next(iter(self._loaded)))
+
+    def _unload(self, symbol: str) -> None:
+        series = self._loaded.pop(symbol, None)
+        if series is not None:
+            self._loaded_bytes -= series.nbytes
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+daily_store = TimeSeriesStore(os.path.join(DATA_DIR, "timeseries.sqlite3"))
@@ -0,0 +1,81 @@
+from typing import Any, AsyncIterator, Callable, Dict
+import codecs
+import json
+import re
+
+_WHITESPACE_AND_COMMAS = re.compile(r'[\s,]*')
+
+
+class IncompleteResponse(ValueError):
+    """The stream ended before the array being decoded was closed."""
+
+
+async def decode_json_array(
+    byte_chunks: AsyncIterator[bytes],
+    array_key: str,
+    on_item: Callable[[Any, int], None],
+) -> Dict[str, Any]:
+    """Incrementally decode the array under `array_key` of a streamed JSON object.
+
+    Each array element is passed to on_item(element, size_in_chars) as soon as
+    it has been received, so the full array is never held in memory. Returns
+    the object's other top-level fields that precede the array. If the array
+    key never appears (error payloads, quota notes) the whole body is decoded
+    and returned instead. Raises IncompleteResponse if the stream ends inside
+    the array, e.g. because the connection dropped.
+    """
+    decoder = json.JSONDecoder()
+    text_decoder = codecs.getincrementaldecoder("utf-8")()
+    marker = re.compile(r'"' + re.escape(array_key) + r'"\s*:\s*\[')
+    buffer = ""
+    header: Dict[str, Any] = {}
+    in_array = False
+    finished = False
+
+    async for chunk in byte_chunks:
+        if finished:
+            continue
+        buffer += text_decoder.decode(chunk)
+
+        if not in_array:
+            match = marker.search(buffer)
+            if match is None:
+                continue
+            header = _decode_header(buffer[:match.start()])
+            buffer = buffer[match.end():]
+            in_array = True
+
+        pos = 0
+        while True:
+            pos = _WHITESPACE_AND_COMMAS.match(buffer, pos).end()
+            if pos >= len(buffer):
+                break
+            if buffer[pos] == "]":
+                finished = True
+                break
+            try:
+                item, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                # The element is incomplete; wait for the next chunk
+                break
+            on_item(item, end - pos)
+            pos = end
+        buffer = buffer[pos:]
+
+    if not in_array:
+        buffer += text_decoder.decode(b"", final=True)
+        return json.loads(buffer)
+    if not finished:
+        raise IncompleteResponse(f'the response ended before the end of the "{array_key}" array')
+    return header
+
+
+def _decode_header(text: str) -> Dict[str, Any]:
+    # '{"endpoint": "...", "message": "success", ' -> {"endpoint": ..., "message": ...}
+    text = text.strip().rstrip(",")
+    if text in ("", "{"):
+        return {}
+    try:
+        return json.loads(text + "}")
+    except json.JSONDecodeError:
+        return {}
@@ -1,55 +1,687 @@
-from typing import Any, Dict, Optional
+from datetime import date
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Set, Tuple
+import asyncio
 import httpx
+import json
 import os
+import sqlite3
+import time
 from dotenv import load_dotenv
 load_dotenv()
 
-API_KEY = os.getenv('ALPHA_VANTAGE_API_KEY')
+from .cache import (
+    CACHE_ENABLED,
+    ResponseCache,
+    Stale,
+    allow_stale,
+    make_cache_key,
+    max_staleness_for,
+    options_chain_cache,
+    refreshing_keys,
+    response_cache,
+    stale_notes,
+    ttl_for,
+)
+from .keys import key_pool
+from .metrics import error_class, metrics
+from .options import ContractFilter, OptionsChain, OptionsSelection
+from .chainstats import ChainAnalytics, ratio
+from .portfolio import PortfolioAnalytics
+from .ratelimit import PRIORITY_INTERACTIVE, RateLimitExceeded, rate_scheduler, request_priority
+from .recording import RECORD_PATH, REPLAY_PATH, recording_transport
+from .resilience import (
+    HEDGE_ENABLED,
+    HEDGE_MIN_DELAY,
+    HEDGE_MIN_SAMPLES,
+    HEDGE_PERCENTILE,
+    MAX_RETRIES,
+    RETRY_DEADLINE,
+    RETRYABLE_STATUS_CODES,
+    SERVE_STALE,
+    backoff_delay,
+    is_retryable_error,
+    upstream_breaker,
+)
+from .sharedcache import SHARED_CACHE_ENABLED, SHARED_POLL_INTERVAL, SharedEntry, shared_cache, shared_key
+from .singleflight import request_coalescer
+from .series import PriceSeries, parse_crypto_series, parse_daily_series
+from .store import STORE_ENABLED, daily_store
+from .streaming import IncompleteResponse, decode_json_array
+from .watchlist import watchlist
+
 ALPHA_VANTAGE_BASE = "https://www.alphavantage.co/query"
 
-async def make_alpha_request(client: httpx.AsyncClient, function: str, symbol: Optional[str], additional_params: Optional[Dict[str, Any]] = None) -> Dict[str, Any] | str:
+REQUEST_TIMEOUT = float(os.getenv('ALPHA_VANTAGE_TIMEOUT', '30'))
+MAX_CONNECTIONS = int(os.getenv('ALPHA_VANTAGE_MAX_CONNECTIONS', '20'))
+MAX_KEEPALIVE_CONNECTIONS = int(os.getenv('ALPHA_VANTAGE_MAX_KEEPALIVE_CONNECTIONS', '10'))
+KEEPALIVE_EXPIRY = float(os.getenv('ALPHA_VANTAGE_KEEPALIVE_EXPIRY', '60'))
+HTTP2_ENABLED = os.getenv('ALPHA_VANTAGE_HTTP2', '').lower() in ('1', 'true', 'yes')
+
+BATCH_CONCURRENCY = int(os.getenv('ALPHA_VANTAGE_BATCH_CONCURRENCY', '5'))
+# REALTIME_BULK_QUOTES is only available on premium plans
+BULK_QUOTES_ENABLED = os.getenv('ALPHA_VANTAGE_BULK_QUOTES', '').lower() in ('1', 'true', 'yes')
+BULK_QUOTES_MAX_SYMBOLS = 100
+# Bars returned by TIME_SERIES_DAILY with outputsize=compact
+COMPACT_SIZE = 100
+STREAM_OPTIONS = os.getenv('ALPHA_VANTAGE_STREAM_OPTIONS', '1').lower() not in ('0', 'false', 'no')
+
+# Background refreshes started by stale-while-revalidate
+_revalidations: Set[asyncio.Task] = set()
+
+
+def create_http_client(
+    max_connections: int = MAX_CONNECTIONS,
+    max_keepalive_connections: int = MAX_KEEPALIVE_CONNECTIONS,
+    keepalive_expiry: float = KEEPALIVE_EXPIRY,
+    http2: bool = HTTP2_ENABLED,
+    timeout: float = REQUEST_TIMEOUT,
+    transport: Optional[httpx.AsyncBaseTransport] = None,
+) -> httpx.AsyncClient:
+    """Build the long-lived, connection-pooling client shared by all tool calls.
+
+    With ALPHA_VANTAGE_RECORD or ALPHA_VANTAGE_REPLAY set and no explicit
+    transport, exchanges are recorded to or replayed from an archive.
+    """
+    if http2:
+        try:
+            import h2  # noqa: F401
+        except ImportError:
+            # httpx needs the optional h2 package for HTTP/2; fall back to HTTP/1.1
+            http2 = False
+
+    limits = httpx.Limits(
+        max_connections=max_connections,
+        max_keepalive_connections=max_keepalive_connections,
+        keepalive_expiry=keepalive_expiry,
+    )
+    if transport is None and (RECORD_PATH or REPLAY_PATH):
+        # The client ignores limits and http2 when given a transport, so they go on the inner one
+        transport = recording_transport(httpx.AsyncHTTPTransport(limits=limits, http2=http2))
+
+    return httpx.AsyncClient(
+        limits=limits,
+        http2=http2,
+        timeout=timeout,
+        transport=transport,
+    )
+
+
+async def make_alpha_request(client: httpx.AsyncClient, function: str, symbol: Optional[str], additional_params: Optional[Dict[str, Any]] = None, timeout: Optional[float] = None, bypass_cache: bool = False, parse: Optional[Callable[[Dict[str, Any]], Any]] = None) -> Dict[str, Any] | Any | str:
+    """Query Alpha Vantage, returning the decoded payload or an error string.
+
+    When `parse` is given, successful payloads are converted with it and the
+    parsed object is what gets cached and returned. A parser returns None when
+    the payload does not hold the expected data; the raw payload is returned then.
+
+    An expired response that is within the function's max staleness is
+    returned at once while a refresh runs in the background, and stands in
+    for the answer when the upstream request fails, unless the tool call
+    asked for fresh data.
+    """
+
+    if timeout is None:
+        timeout = REQUEST_TIMEOUT
+
+    params = _build_params(function, symbol, additional_params)
+
+    cache_key = make_cache_key(params)
+    if parse is not None:
+        cache_key += (("parse", parse.__qualname__),)
+    refreshing = refreshing_keys.get()
+    if refreshing is not None:
+        # Pinned before the fetch, so the new entry cannot be evicted as soon as it is stored
+        refreshing.add(cache_key)
+        response_cache.pin(cache_key)
+        bypass_cache = True
+    def fetch() -> Awaitable[Any]:
+        return _fetch_upstream(client, function, params, cache_key, timeout, parse)
+
+    if CACHE_ENABLED and not bypass_cache:
+        cached = response_cache.get(cache_key)
+        if cached is not None:
+            metrics.count_upstream(function, "cache_hits")
+            return cached
+        stale = _stale_while_revalidate(response_cache, cache_key, function, cache_key, fetch)
+        if stale is not None:
+            return stale
+
+    # Concurrent callers asking for the same data share one upstream request
+    return _settle(function, await request_coalescer.run(cache_key, fetch))
+
+
+async def _fetch_upstream(client: httpx.AsyncClient, function: str, params: Dict[str, Any], cache_key: Any, timeout: float, parse: Optional[Callable[[Dict[str, Any]], Any]] = None) -> Dict[str, Any] | Any | str:
+    """Answer from the cache shared with other server processes, or fetch and share the response."""
+    if not (SHARED_CACHE_ENABLED and CACHE_ENABLED):
+        return await _fetch_response(client, function, params, cache_key, timeout, parse)
+
+    key = shared_key(params)
+    entry, locked = await _claim_shared(key)
+    if entry is not None and entry.is_fresh():
+        metrics.count_upstream(function, "shared_hits")
+        return _load_shared(function, params, cache_key, entry, parse)
+    try:
+        result = await _fetch_response(client, function, params, cache_key, timeout, parse, key)
+    finally:
+        if locked:
+            await _shared_call(shared_cache.unlock, key)
+
+    # Another process's copy can stand in for a failure as well as our own
+    if isinstance(result, str) and SERVE_STALE and entry is not None and entry.age <= max_staleness_for(function):
+        return Stale(_load_shared(function, params, cache_key, entry, parse), entry.age, result)
+    return result
+
 
+async def _claim_shared(key: str) -> Tuple[Optional[SharedEntry], bool]:
+    """The shared entry for `key`, waiting while another process refreshes it.
+
+    Returns the entry, if any, and whether this process took the refresh lock.
+    Without a fresh entry after the lock's lease, the caller fetches anyway.
+    """
+    deadline = time.monotonic() + shared_cache.lease
+    waited = False
+    while True:
+        entry = await _shared_call(shared_cache.get, key)
+        if entry is not None and entry.is_fresh():
+            return entry, False
+        locked = await _shared_call(shared_cache.try_lock, key)
+        if locked or locked is None or time.monotonic() >= deadline:
+            return entry, bool(locked)
+        if not waited:
+            waited = True
+            shared_cache.waits += 1
+        await asyncio.sleep(SHARED_POLL_INTERVAL)
+
+
+async def _shared_call(method: Callable[..., Any], *args: Any) -> Any:
+    # A broken or busy shared database only costs the sharing, never the request
+    try:
+        return await asyncio.to_thread(method, *args)
+    except sqlite3.Error:
+        shared_cache.errors += 1
+        return None
+
+
+def _load_shared(function: str, params: Dict[str, Any], cache_key: Any, entry: SharedEntry, parse: Optional[Callable[[Dict[str, Any]], Any]]) -> Any:
+    started = time.perf_counter()
+    data, size = _decode(json.loads(entry.body), len(entry.body), parse)
+    metrics.observe_upstream(function, "decode", time.perf_counter() - started)
+    ttl = entry.ttl()
+    if ttl is None or ttl > 0:
+        response_cache.set(cache_key, data, ttl, size)
+    return data
+
+
+def _decode(data: Any, size: int, parse: Optional[Callable[[Dict[str, Any]], Any]]) -> Tuple[Any, int]:
+    if parse is not None:
+        parsed = parse(data)
+        if parsed is not None:
+            return parsed, getattr(parsed, "nbytes", size)
+    return data, size
+
+
+async def _fetch_response(client: httpx.AsyncClient, function: str, params: Dict[str, Any], cache_key: Any, timeout: float, parse: Optional[Callable[[Dict[str, Any]], Any]] = None, share_as: Optional[str] = None) -> Dict[str, Any] | Any | str:
+    try:
+        response = await _send(
+            function,
+            params,
+            lambda apikey: client.get(ALPHA_VANTAGE_BASE, params={**params, "apikey": apikey}, timeout=timeout),
+            hedge=HEDGE_ENABLED and request_priority(function, params) == PRIORITY_INTERACTIVE
+        )
+        if isinstance(response, str):
+            return _stale_fallback(response_cache, cache_key, function, response)
+        metrics.count_upstream(function, "bytes", len(response.content))
+
+        status_error = _status_error(function, response)
+        if status_error:
+            return _stale_fallback(response_cache, cache_key, function, status_error)
+
+        response.raise_for_status()
+
+        started = time.perf_counter()
+        data = response.json()
+
+        error = _payload_error(function, data, _request_key(response))
+        if error:
+            return _stale_fallback(response_cache, cache_key, function, error)
+
+        data, size = _decode(data, len(response.content), parse)
+        metrics.observe_upstream(function, "decode", time.perf_counter() - started)
+
+        # Throttle notices and other informational payloads are not real answers
+        if CACHE_ENABLED and not (isinstance(data, dict) and ("Note" in data or "Information" in data)):
+            ttl = ttl_for(function, params)
+            response_cache.set(cache_key, data, ttl, size)
+            if share_as is not None:
+                await _shared_call(shared_cache.set, share_as, function, response.content, ttl, max_staleness_for(function))
+
+        return data
+    except Exception as e:
+        metrics.count_upstream(function, f"error_{error_class(e)}")
+        return _stale_fallback(response_cache, cache_key, function, _describe_request_error(e, timeout))
+
+
+async def _send(function: str, params: Dict[str, Any], send: Callable[[Optional[str]], Awaitable[httpx.Response]], hedge: bool = False) -> httpx.Response | str:
+    """Send one logical request with retries, optional hedging and the circuit breaker.
+
+    Transport errors and 5xx responses are retried with jittered exponential
+    backoff; every attempt goes through the rate scheduler and is sent with
+    the least-loaded API key, which `send` receives. Returns the response, or
+    an error string when nothing could be sent. The last attempt's transport
+    error is raised.
+    """
+    first_started = time.monotonic()
+    attempt = 0
+    while True:
+        if not upstream_breaker.allow():
+            metrics.count_upstream(function, "error_circuit_open")
+            return (
+                f"Alpha Vantage is failing repeatedly; requests are paused for another "
+                f"{upstream_breaker.retry_after():.0f} seconds."
+            )
+        queue_wait = await _acquire_quota(function, params)
+        if isinstance(queue_wait, str):
+            upstream_breaker.abandon()
+            return queue_wait
+
+        started = time.perf_counter()
+        try:
+            response = await (_hedged(function, send) if hedge else send(_next_key()))
+        except asyncio.CancelledError:
+            upstream_breaker.abandon()
+            raise
+        except Exception as e:
+            if not is_retryable_error(e):
+                upstream_breaker.abandon()
+                raise
+            upstream_breaker.record_failure()
+            if not _should_retry(attempt, first_started):
+                raise
+        else:
+            metrics.observe_upstream(function, "upstream", time.perf_counter() - started)
+            if response.status_code not in RETRYABLE_STATUS_CODES:
+                # Any other answer, even a 429 or an API error, means the upstream is up
+                upstream_breaker.record_success()
+                return response
+            upstream_breaker.record_failure()
+            if not _should_retry(attempt, first_started):
+                return response
+            await response.aclose()
+
+        attempt += 1
+        metrics.count_upstream(function, "retries")
+        await asyncio.sleep(backoff_delay(attempt))
+
+
+def _should_retry(attempt: int, first_started: float) -> bool:
+    return (
+        attempt < MAX_RETRIES
+        and not upstream_breaker.is_open
+        and time.monotonic() - first_started < RETRY_DEADLINE
+    )
+
+
+async def _hedged(function: str, send: Callable[[Optional[str]], Awaitable[httpx.Response]]) -> httpx.Response:
+    """Send a second copy of the request if the first is slower than usual; the first good answer wins."""
+    tasks = {asyncio.ensure_future(send(_next_key()))}
+    try:
+        delay = metrics.upstream_quantile(function, HEDGE_PERCENTILE, HEDGE_MIN_SAMPLES)
+        if delay is not None:
+            done, _ = await asyncio.wait(tasks, timeout=max(delay, HEDGE_MIN_DELAY))
+            # A hedge is only sent if it doesn't have to queue for quota
+            if not done and (REPLAY_PATH or rate_scheduler.try_acquire()):
+                metrics.count_upstream(function, "hedged")
+                tasks.add(asyncio.ensure_future(send(_next_key())))
+
+        error: Optional[BaseException] = None
+        fallback: Optional[httpx.Response] = None
+        while tasks:
+            done, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is not None:
+                    error = task.exception()
+                elif task.result().status_code in RETRYABLE_STATUS_CODES:
+                    fallback = task.result()
+                else:
+                    return task.result()
+        if fallback is not None:
+            return fallback
+        raise error
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+def _stale_fallback(cache: ResponseCache, cache_key: Hashable, function: str, error: str) -> Stale | str:
+    """The last good answer, if it is not too old, to stand in for a failed request."""
+    if not (SERVE_STALE and CACHE_ENABLED):
+        return error
+    stale = cache.get_stale(cache_key, max_staleness_for(function))
+    if stale is None:
+        return error
+    return Stale(stale[0], stale[1], error)
+
+
+def _settle(function: str, result: Any) -> Any:
+    """Unwrap a stale stand-in for this caller, or give its error to a caller that wants fresh data."""
+    if not isinstance(result, Stale):
+        return result
+    if not allow_stale.get():
+        return result.error
+    metrics.count_upstream(function, "stale_served")
+    _note_stale(function, result.age, f"the request to Alpha Vantage failed: {result.error}")
+    return result.value
+
+
+def _stale_while_revalidate(cache: ResponseCache, cache_key: Hashable, function: str, flight_key: Hashable, refresh: Callable[[], Awaitable[Any]]) -> Any:
+    """An expired entry, if it is not too old, served right away while `refresh` runs in the background."""
+    if not (SERVE_STALE and allow_stale.get()):
+        return None
+    stale = cache.get_stale(cache_key, max_staleness_for(function))
+    if stale is None:
+        return None
+    task = asyncio.ensure_future(request_coalescer.run(flight_key, refresh))
+    # Keep a reference so the refresh isn't garbage-collected mid-flight
+    _revalidations.add(task)
+    task.add_done_callback(_revalidations.discard)
+    metrics.count_upstream(function, "stale_served")
+    metrics.count_upstream(function, "revalidations")
+    _note_stale(function, stale[1], "a fresh copy is being fetched in the background")
+    return stale[0]
+
+
+def _note_stale(function: str, age: float, reason: str) -> None:
+    notes = stale_notes.get()
+    if notes is not None:
+        notes.append(f"Note: served cached {function} data that is {_describe_age(age)} old, because {reason}.")
+
+
+def _describe_age(seconds: float) -> str:
+    for unit, size in (("day", 86400), ("hour", 3600), ("minute", 60)):
+        if seconds >= 2 * size:
+            return f"{seconds // size:.0f} {unit}s"
+    return "1 second" if round(seconds) == 1 else f"{seconds:.0f} seconds"
+
+
+async def _acquire_quota(function: str, params: Dict[str, Any]) -> float | str:
+    """Wait for the rate scheduler, returning the time queued or an error string."""
+    if REPLAY_PATH:
+        # Replayed responses cost no quota
+        metrics.count_upstream(function, "requests")
+        return 0.0
+    try:
+        queue_wait = await rate_scheduler.acquire(request_priority(function, params))
+    except RateLimitExceeded as e:
+        metrics.count_upstream(function, "error_quota_rejected")
+        return f"Request not sent to avoid exceeding the API quota: {e}"
+    metrics.observe_upstream(function, "queue_wait", queue_wait)
+    metrics.count_upstream(function, "requests")
+    return queue_wait
+
+
+def _next_key() -> Optional[str]:
+    if REPLAY_PATH:
+        return None
+    api_key = key_pool.acquire()
+    return api_key.key if api_key else None
+
+
+def _request_key(response: httpx.Response) -> Optional[str]:
+    return response.request.url.params.get("apikey")
+
+
+def _over_quota(api_key: Optional[str]) -> None:
+    """Rest the key that was told it is over quota and give up its share of the bucket."""
+    if REPLAY_PATH:
+        return
+    key_pool.cool_down(api_key)
+    if key_pool.available():
+        rate_scheduler.penalize(key_pool.per_minute)
+    else:
+        rate_scheduler.penalize()
+
+
+def _status_error(function: str, response: httpx.Response) -> Optional[str]:
+    if response.status_code == 429:
+        metrics.count_upstream(function, "error_rate_limited")
+        _over_quota(_request_key(response))
+        return f"Rate limit exceeded. Error details: {response.text}"
+    elif response.status_code == 403:
+        metrics.count_upstream(function, "error_auth")
+        return f"API key invalid or expired. Error details: {response.text}"
+    return None
+
+
+def _build_params(function: str, symbol: Optional[str], additional_params: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    # The API key is added per attempt by _send
     params = {
         "function": function,
-        "apikey": API_KEY
     }
-    
+
     if symbol:
         params["symbol"] = symbol
-        
+
     if additional_params:
         params.update(additional_params)
 
-    try:
-        response = await client.get(
-            ALPHA_VANTAGE_BASE,
-            params=params,
-            timeout=30.0
-        )
+    return params
 
-        if response.status_code == 429:
-            return f"Rate limit exceeded. Error details: {response.text}"
-        elif response.status_code == 403:
-            return f"API key invalid or expired. Error details: {response.text}"
-
-        response.raise_for_status()
 
-        data = response.json()
+def _payload_error(function: str, data: Dict[str, Any], api_key: Optional[str] = None) -> Optional[str]:
+    if "Error Message" in data:
+        metrics.count_upstream(function, "error_api")
+        return f"Alpha Vantage API error: {data['Error Message']}"
+    if "Note" in data and "API call frequency" in data["Note"]:
+        metrics.count_upstream(function, "error_quota_note")
+        _over_quota(api_key)
+        return f"Rate limit warning: {data['Note']}"
+    return None
 
-        if "Error Message" in data:
-            return f"Alpha Vantage API error: {data['Error Message']}"
-        if "Note" in data and "API call frequency" in data["Note"]:
-            return f"Rate limit warning: {data['Note']}"
 
-        return data
-    except httpx.TimeoutException:
-        return "Request timed out after 30 seconds. The Alpha Vantage API may be experiencing delays."
-    except httpx.ConnectError:
+def _describe_request_error(e: Exception, timeout: float) -> str:
+    if isinstance(e, httpx.TimeoutException):
+        return f"Request timed out after {timeout:g} seconds. The Alpha Vantage API may be experiencing delays."
+    if isinstance(e, httpx.ConnectError):
         return "Failed to connect to Alpha Vantage API. Please check your internet connection."
-    except httpx.HTTPStatusError as e:
+    if isinstance(e, httpx.HTTPStatusError):
         return f"HTTP error occurred: {str(e)} - Response: {e.response.text}"
+    if isinstance(e, IncompleteResponse):
+        return f"Incomplete response from Alpha Vantage: {str(e)}. Nothing was cached; please try again."
+    return f"Unexpected error occurred: {str(e)}"
+
+
+async def stream_alpha_request(client: httpx.AsyncClient, function: str, symbol: Optional[str], additional_params: Optional[Dict[str, Any]], array_key: str, on_item: Callable[[Any, int], None], timeout: Optional[float] = None) -> Dict[str, Any] | str:
+    """Like make_alpha_request, but decodes the array under `array_key` as it streams in.
+
+    Array elements are handed to on_item instead of being kept; the other
+    top-level fields are returned. Results are neither cached nor coalesced here.
+    """
+    if timeout is None:
+        timeout = REQUEST_TIMEOUT
+
+    params = _build_params(function, symbol, additional_params)
+
+    try:
+        response = await _send(
+            function,
+            params,
+            lambda apikey: client.send(client.build_request("GET", ALPHA_VANTAGE_BASE, params={**params, "apikey": apikey}, timeout=timeout), stream=True)
+        )
+        if isinstance(response, str):
+            return response
+        try:
+            if response.is_error:
+                await response.aread()
+                metrics.count_upstream(function, "bytes", len(response.content))
+                status_error = _status_error(function, response)
+                if status_error:
+                    return status_error
+                response.raise_for_status()
+
+            received = 0
+
+            async def counted_chunks():
+                nonlocal received
+                async for chunk in response.aiter_bytes():
+                    received += len(chunk)
+                    yield chunk
+
+            # Decoding overlaps with receiving the body, so this stage includes transfer time
+            started = time.perf_counter()
+            data = await decode_json_array(counted_chunks(), array_key, on_item)
+            metrics.observe_upstream(function, "decode", time.perf_counter() - started)
+            metrics.count_upstream(function, "bytes", received)
+        finally:
+            await response.aclose()
+
+        return _payload_error(function, data, _request_key(response)) or data
     except Exception as e:
-        return f"Unexpected error occurred: {str(e)}"
+        metrics.count_upstream(function, f"error_{error_class(e)}")
+        return _describe_request_error(e, timeout)
+
+
+async def fetch_options_chain(client: httpx.AsyncClient, symbol: str, date: Optional[str] = None) -> OptionsChain | Dict[str, Any] | str:
+    """HISTORICAL_OPTIONS parsed into an OptionsChain and kept in the chain cache.
+
+    The chain is decoded as it streams in, so the raw contract dicts are never
+    all held at once. Chains for past dates never expire; they are only evicted
+    by the chain cache's memory cap.
+    """
+    additional_params = {"date": date} if date else {}
+    params = _build_params("HISTORICAL_OPTIONS", symbol, additional_params)
+    cache_key = make_cache_key(params)
+    flight_key = cache_key + (("chain", ""),)
+
+    async def load_chain() -> OptionsChain | Dict[str, Any] | str:
+        if STREAM_OPTIONS:
+            chain = OptionsChain()
+            header = await stream_alpha_request(client, "HISTORICAL_OPTIONS", symbol, additional_params, "data", chain.add)
+        else:
+            header = await make_alpha_request(client, "HISTORICAL_OPTIONS", symbol, additional_params, bypass_cache=True)
+            if isinstance(header, dict):
+                chain = OptionsChain.from_contracts(header.get("data", []))
+        if isinstance(header, str):
+            return _stale_fallback(options_chain_cache, cache_key, "HISTORICAL_OPTIONS", header)
+        if not len(chain):
+            return header
+        chain.message = header.get("message", "N/A")
+        if CACHE_ENABLED:
+            options_chain_cache.set(cache_key, chain, ttl_for("HISTORICAL_OPTIONS", params), chain.nbytes)
+        return chain
+
+    if CACHE_ENABLED:
+        cached = options_chain_cache.get(cache_key)
+        if cached is not None:
+            metrics.count_upstream("HISTORICAL_OPTIONS", "cache_hits")
+            return cached
+        stale = _stale_while_revalidate(options_chain_cache, cache_key, "HISTORICAL_OPTIONS", flight_key, load_chain)
+        if stale is not None:
+            return stale
+
+    return _settle("HISTORICAL_OPTIONS", await request_coalescer.run(flight_key, load_chain))
+
+
+async def fetch_historical_options(client: httpx.AsyncClient, symbol: str, date: Optional[str] = None, limit: int = 10, sort_by: str = "strike", sort_order: str = "asc", contract_filter: Optional[ContractFilter] = None) -> OptionsSelection | Dict[str, Any] | str:
+    """HISTORICAL_OPTIONS with filters, sorting and the limit applied to the cached chain."""
+    chain = await fetch_options_chain(client, symbol, date)
+    if not isinstance(chain, OptionsChain):
+        return chain
+    return chain.select(limit, sort_by, sort_order, contract_filter)
+
+
+async def fetch_daily_series(client: httpx.AsyncClient, symbol: str, outputsize: str = "compact") -> PriceSeries | Dict[str, Any] | str:
+    """TIME_SERIES_DAILY as a PriceSeries, backed by the on-disk store.
+
+    Once a symbol's full history is stored, only the compact series is fetched
+    and merged in; outputsize=full is then answered from the store. A compact
+    series already merged, such as a cached response, is not written again,
+    and the loaded history is kept in memory until new bars arrive. A raw
+    payload is returned when the response holds no series.
+    """
+    if not STORE_ENABLED:
+        return await make_alpha_request(client, "TIME_SERIES_DAILY", symbol, {"outputsize": outputsize}, parse=parse_daily_series)
+
+    full_history = daily_store.full_history.get(symbol)
+    if full_history is None:
+        full_history = await asyncio.to_thread(daily_store.has_full_history, symbol)
+    if full_history:
+        compact_series = await make_alpha_request(client, "TIME_SERIES_DAILY", symbol, {"outputsize": "compact"}, parse=parse_daily_series)
+        if not isinstance(compact_series, PriceSeries):
+            return compact_series
+        if daily_store.is_merged(symbol, compact_series) or await asyncio.to_thread(daily_store.merge, symbol, compact_series, False):
+            if outputsize == "compact":
+                return compact_series
+            history = daily_store.loaded(symbol)
+            if history is None:
+                history = await asyncio.to_thread(daily_store.load, symbol)
+            return history
+        # The stored history is too old to be bridged by a compact refresh
+    elif outputsize == "compact":
+        compact_series = await make_alpha_request(client, "TIME_SERIES_DAILY", symbol, {"outputsize": "compact"}, parse=parse_daily_series)
+        if isinstance(compact_series, PriceSeries) and not daily_store.is_merged(symbol, compact_series):
+            await asyncio.to_thread(daily_store.merge, symbol, compact_series, False)
+        return compact_series
+
+    full_series = await make_alpha_request(client, "TIME_SERIES_DAILY", symbol, {"outputsize": "full"}, parse=parse_daily_series)
+    if isinstance(full_series, PriceSeries):
+        await asyncio.to_thread(daily_store.merge, symbol, full_series, True)
+    return full_series
+
+
+async def fetch_quotes(client: httpx.AsyncClient, symbols: List[str], concurrency: int = BATCH_CONCURRENCY) -> Dict[str, Dict[str, Any] | str]:
+    """Fetch GLOBAL_QUOTE for many symbols with at most `concurrency` requests in flight.
+
+    Returns a result per symbol in input order; failures are reported as error
+    strings for the affected symbols only.
+    """
+    results: Dict[str, Dict[str, Any] | str] = {}
+
+    if BULK_QUOTES_ENABLED:
+        for start in range(0, len(symbols), BULK_QUOTES_MAX_SYMBOLS):
+            chunk = symbols[start:start + BULK_QUOTES_MAX_SYMBOLS]
+            bulk_data = await make_alpha_request(client, "REALTIME_BULK_QUOTES", ",".join(chunk))
+            if isinstance(bulk_data, str):
+                continue
+            for quote in bulk_data.get("data", []):
+                symbol = quote.get("symbol")
+                if symbol in chunk:
+                    results[symbol] = _bulk_to_global_quote(quote)
+
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def fetch_one(symbol: str) -> None:
+        async with semaphore:
+            results[symbol] = await make_alpha_request(client, "GLOBAL_QUOTE", symbol)
+
+    await asyncio.gather(*(fetch_one(symbol) for symbol in symbols if symbol not in results))
+    return {symbol: results[symbol] for symbol in symbols}
+
+
+async def fetch_daily_series_many(client: httpx.AsyncClient, symbols: List[str], outputsize: str = "compact", concurrency: int = BATCH_CONCURRENCY) -> Dict[str, PriceSeries | Dict[str, Any] | str]:
+    """fetch_daily_series for many symbols with at most `concurrency` in flight, in input order."""
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def fetch_one(symbol: str) -> PriceSeries | Dict[str, Any] | str:
+        async with semaphore:
+            return await fetch_daily_series(client, symbol, outputsize)
+
+    return dict(zip(symbols, await asyncio.gather(*(fetch_one(symbol) for symbol in symbols))))
+
+
+def _bulk_to_global_quote(quote: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "Global Quote": {
+            "01. symbol": quote.get("symbol"),
+            "02. open": quote.get("open"),
+            "03. high": quote.get("high"),
+            "04. low": quote.get("low"),
+            "05. price": quote.get("close"),
+            "06. volume": quote.get("volume"),
+            "07. latest trading day": quote.get("timestamp"),
+            "08. previous close": quote.get("previous_close"),
+            "09. change": quote.get("change"),
+            "10. change percent": quote.get("change_percent"),
+        }
+    }
 
 
 def format_quote(quote_data: Dict[str, Any]) -> str:
@@ -92,29 +724,34 @@ def format_company_info(overview_data: Dict[str, Any]) -> str:
         return f"Error formatting company data: {str(e)}"
 
 
-def format_time_series(time_series_data: Dict[str, Any]) -> str:
+def format_time_series(time_series_data: PriceSeries | Dict[str, Any], rows: Optional[int] = 5, interval: str = "daily") -> str:
 
     try:
-        time_series = time_series_data.get("Time Series (Daily)", {})
-        if not time_series:
+        series = time_series_data
+        if isinstance(series, dict):
+            series = parse_daily_series(series)
+        # An empty series is a date range with no bars, reported below
+        if series is None:
             return "No time series data available in the response"
 
-        metadata = time_series_data.get("Meta Data", {})
-        symbol = metadata.get("2. Symbol", "Unknown")
-        last_refreshed = metadata.get("3. Last Refreshed", "Unknown")
+        symbol = series.metadata.get("2. Symbol", series.symbol)
+        last_refreshed = series.metadata.get("3. Last Refreshed", "Unknown")
 
+        title = "Time Series Data" if interval == "daily" else f"{interval.capitalize()} Time Series Data"
         formatted_data = [
-            f"Time Series Data for {symbol} (Last Refreshed: {last_refreshed})\n\n"
+            f"{title} for {symbol} (Last Refreshed: {last_refreshed})\n\n"
         ]
+        if not len(series):
+            formatted_data.append("No bars in the requested date range")
 
-        for date, values in list(time_series.items())[:5]:
+        for i in series.newest_first(rows):
             formatted_data.append(
-                f"Date: {date}\n"
-                f"Open: ${values.get('1. open', 'N/A')}\n"
-                f"High: ${values.get('2. high', 'N/A')}\n"
-                f"Low: ${values.get('3. low', 'N/A')}\n"
-                f"Close: ${values.get('4. close', 'N/A')}\n"
-                f"Volume: {values.get('5. volume', 'N/A')}\n"
+                f"Date: {series.date_at(i)}\n"
+                f"Open: ${series.open[i]:.4f}\n"
+                f"High: ${series.high[i]:.4f}\n"
+                f"Low: ${series.low[i]:.4f}\n"
+                f"Close: ${series.close[i]:.4f}\n"
+                f"Volume: {series.volume[i]}\n"
                 "---\n"
             )
 
@@ -123,40 +760,125 @@ def format_time_series(time_series_data: Dict[str, Any]) -> str:
         return f"Error formatting time series data: {str(e)}"
 
 
-def format_historical_options(options_data: Dict[str,Any], limit: int = 10, sort_by: str = "strike", sort_order: str = "asc") -> str:
+def format_indicators(series: PriceSeries, indicator_values: Dict[str, Any], rows: int = 5) -> str:
+
     try:
-        if "Error Message" in options_data:
-            return f"Error: {options_data['Error Message']}"
-        
-        options_chain = options_data.get("data",[])
-
-        if not options_chain:
-            return "No options data available in the response"
-        
+        if not len(series):
+            return "No time series data available in the response"
+
         formatted = [
-            f"Historical Options Data:\n",
-            f"Status: {options_data.get('message', 'N/A')}\n"
-            f"Sorted by: {sort_by} ({sort_order})\n\n"
+            f"Technical indicators for {series.symbol} from {len(series)} daily bars "
+            f"(Last Refreshed: {series.metadata.get('3. Last Refreshed', 'Unknown')})\n\n"
         ]
 
-        def get_sort_key(Contract):
-            value = Contract.get(sort_by, 0)
-            try:
-                if isinstance(value, str):
-                    value = value.replace('$', '').replace('%', '')
-                return float(value)
-            except (ValueError, TypeError):
-                return value
-            
-        sorted_chain = sorted(
-            options_chain,
-            key=get_sort_key,
-            reverse=(sort_order == "desc")
+        for i in series.newest_first(rows):
+            lines = [f"Date: {series.date_at(i)}", f"Close: ${series.close[i]:.4f}"]
+            for label, values in indicator_values.items():
+                value = values[i]
+                lines.append(f"{label}: {'N/A' if value != value else f'{value:.4f}'}")
+            lines.append("---")
+            formatted.append("\n".join(lines) + "\n")
+
+        return "\n".join(formatted)
+    except Exception as e:
+        return f"Error formatting technical indicators: {str(e)}"
+
+
+def _percent(value: float, sign: str = "+") -> str:
+    return "N/A" if value != value else f"{value * 100:{sign}.2f}%"
+
+
+def format_portfolio_analytics(analytics: PortfolioAnalytics) -> str:
+    symbols = analytics.symbols
+    width = max(6, max(len(symbol) for symbol in symbols) + 1)
+    benchmark = f", beta against {analytics.benchmark}" if analytics.benchmark else ""
+    lines = [
+        f"{analytics.bars - 1} daily returns from {date.fromordinal(analytics.dates[0]).isoformat()} "
+        f"to {date.fromordinal(analytics.dates[-1]).isoformat()}{benchmark}",
+        "",
+        f"{'Symbol':<{width}} {'Return':>9} {'Ann. ret':>9} {'Ann. vol':>9} {'Max DD':>9} {'DD now':>9} {'Beta':>6}",
+    ]
+    for symbol in symbols:
+        beta = analytics.beta[symbol]
+        lines.append(
+            f"{symbol:<{width}} {_percent(analytics.total_return[symbol]):>9} {_percent(analytics.annualized_return[symbol]):>9} "
+            f"{_percent(analytics.volatility[symbol], ''):>9} {_percent(analytics.max_drawdown[symbol]):>9} "
+            f"{_percent(analytics.current_drawdown[symbol]):>9} {'N/A' if beta != beta else f'{beta:.2f}':>6}"
+        )
+    if len(symbols) > 1:
+        lines.extend(["", "Correlation of daily returns:", " " * width + "".join(f" {symbol:>{width}}" for symbol in symbols)])
+        for symbol, row in zip(symbols, analytics.correlation):
+            lines.append(f"{symbol:<{width}}" + "".join(f" {'N/A' if value != value else f'{value:.2f}':>{width}}" for value in row))
+    if analytics.errors:
+        lines.extend(["", "Left out:"] + [f"{symbol}: {error}" for symbol, error in analytics.errors.items()])
+    return "\n".join(lines)
+
+
+def _number(value: float, spec: str = ".2f") -> str:
+    return "N/A" if value != value else format(value, spec)
+
+
+def _dollars(value: float) -> str:
+    for suffix, size in (("B", 1e9), ("M", 1e6), ("K", 1e3)):
+        if abs(value) >= size:
+            return f"{'-' if value < 0 else ''}${abs(value) / size:.2f}{suffix}"
+    return f"{'-' if value < 0 else ''}${abs(value):.0f}"
+
+
+def format_options_analytics(analytics: ChainAnalytics, gamma_strikes: int = 10) -> str:
+    lines = [
+        f"{analytics.contracts} contracts on {analytics.date or 'N/A'} across {len(analytics.expirations)} expirations",
+        f"Underlying: ${analytics.spot:.2f} ({analytics.spot_source})",
+        f"Put/call ratio: {_number(ratio(analytics.put_volume, analytics.call_volume))} by volume "
+        f"({analytics.put_volume:.0f} puts, {analytics.call_volume:.0f} calls), "
+        f"{_number(ratio(analytics.put_oi, analytics.call_oi))} by open interest "
+        f"({analytics.put_oi:.0f} puts, {analytics.call_oi:.0f} calls)",
+        f"Net gamma exposure: {_dollars(analytics.total_gamma_exposure)} per 1% move",
+        "",
+        "Term structure:",
+        f"{'Expiration':<11} {'Days':>5} {'ATM strike':>10} {'ATM IV':>8} {'Max pain':>9} {'PCR vol':>8} {'PCR OI':>8}",
+    ]
+    for stats in analytics.expirations:
+        lines.append(
+            f"{stats.expiration:<11} {'N/A' if stats.days is None else stats.days:>5} {_number(stats.atm_strike):>10} "
+            f"{_number(stats.atm_iv * 100, '.1f') + '%' if stats.atm_iv == stats.atm_iv else 'N/A':>8} {_number(stats.max_pain):>9} "
+            f"{_number(ratio(stats.put_volume, stats.call_volume)):>8} {_number(ratio(stats.put_oi, stats.call_oi)):>8}"
         )
+    for expiration, smile in analytics.smiles.items():
+        lines.extend(["", f"IV smile for {expiration}:", f"{'Strike':>10} {'Call IV':>8} {'Put IV':>8}"])
+        for strike, call_iv, put_iv in smile:
+            lines.append(f"{strike:>10.2f} {_number(call_iv, '.4f'):>8} {_number(put_iv, '.4f'):>8}")
+    lines.extend(["", "Largest gamma exposure by strike:"])
+    for strike, exposure in analytics.top_gamma_strikes(gamma_strikes):
+        lines.append(f"{strike:>10.2f} {_dollars(exposure):>10}")
+    return "\n".join(lines)
+
+
+def format_historical_options(options_data: OptionsSelection | Dict[str,Any], limit: int = 10, sort_by: str = "strike", sort_order: str = "asc", contract_filter: Optional[ContractFilter] = None) -> str:
+    try:
+        if isinstance(options_data, OptionsSelection):
+            selection = options_data
+        else:
+            if "Error Message" in options_data:
+                return f"Error: {options_data['Error Message']}"
 
-        display_contracts = sorted_chain if limit == -1 else sorted_chain[:limit]
+            options_chain = options_data.get("data",[])
+
+            if not options_chain:
+                return "No options data available in the response"
+
+            chain = OptionsChain.from_contracts(options_chain, options_data.get('message', 'N/A'))
+            selection = chain.select(limit, sort_by, sort_order, contract_filter)
+
+        formatted = [
+            f"Historical Options Data:\n",
+            f"Status: {selection.message}\n"
+        ]
+        if contract_filter is not None and contract_filter.active:
+            formatted.append(f"Filters: {contract_filter.describe()} ({selection.total} matching contracts)\n")
+        formatted.append(f"Sorted by: {sort_by} ({sort_order})\n\n")
 
-        for contract in display_contracts:
+        for contract in selection.contracts:
             formatted.append(f"Contract Details:\n")
             formatted.append(f"Contract ID: {contract.get('contractID', 'N/A')}\n")
             formatted.append(f"Expiration: {contract.get('expiration', 'N/A')}\n")
@@ -176,8 +898,8 @@ def format_historical_options(options_data: Dict[str,Any], limit: int = 10, sort
             formatted.append(f"Rho: {contract.get('rho', 'N/A')}\n")
             formatted.append("---\n")
 
-        if limit != -1 and len(sorted_chain) > limit:
-            formatted.append(f"\n... and {len(sorted_chain) - limit} more contracts")
+        if limit != -1 and selection.total > limit:
+            formatted.append(f"\n... and {selection.total - limit} more contracts")
 
         return "".join(formatted)
     except Exception as e:
@@ -199,25 +921,21 @@ def format_crypto_rate(crypto_data: Dict[str, Any]) -> str:
     except Exception as e:
         return f"Error formatting cryptocurrency data: {str(e)}"
     
-def format_crypto_time_series(time_series_data: Dict[str, Any], series_type: str) -> str:
+def format_crypto_time_series(time_series_data: PriceSeries | Dict[str, Any], series_type: str) -> str:
     try:
-        time_series_key = ""
-        if series_type == "daily":
-            time_series_key = "Time Series (Digital Currency Daily)"
-        elif series_type == "weekly":
-            time_series_key = "Time Series (Digital Currency Weekly)"
-        elif series_type == "monthly":
-            time_series_key = "Time Series (Digital Currency Monthly)"
-        else:
+        if series_type not in ("daily", "weekly", "monthly"):
             return f"Unknown series type: {series_type}"
-        
-        time_series = time_series_data.get(time_series_key, {})
-        if not time_series:
-            all_keys = ", ".join(time_series_data.keys())
-            return f"No cryptocurrency time series data found with key: '{time_series_key}'. \nAvailable keys: {all_keys}"
-        
-        metadata = time_series_data.get("Meta Data", {})
-        crypto_symbol = metadata.get("2, Digital Currency Code", "Unknown")
+
+        series = time_series_data
+        if isinstance(series, dict):
+            series = parse_crypto_series(time_series_data, series_type)
+            if not series:
+                time_series_key = f"Time Series (Digital Currency {series_type.capitalize()})"
+                all_keys = ", ".join(time_series_data.keys())
+                return f"No cryptocurrency time series data found with key: '{time_series_key}'. \nAvailable keys: {all_keys}"
+
+        metadata = series.metadata
+        crypto_symbol = metadata.get("2. Digital Currency Code", "Unknown")
         crypto_name = metadata.get("3. Digital Currency Name", "Unknown")
         market = metadata.get("4. Market Code", "Unknown")
         market_name = metadata.get("5. Market Name", "Unknown")
@@ -231,21 +949,131 @@ def format_crypto_time_series(time_series_data: Dict[str, Any], series_type: str
             ""
         ]
 
-        for date, values in list(time_series.items())[:5]:
-            open_price = values.get("1. open", "N/A")
-            high_price = values.get("2. high", "N/A")
-            low_price = values.get("3. low", "N/A")
-            close_price = values.get("4. close", "N/A")
-            volume = values.get("5. volume", "N/A")
-
-            formatted_data.append(f"Date: {date}")
-            formatted_data.append(f"Open: {open_price} {market}")
-            formatted_data.append(f"High: {high_price} {market}")
-            formatted_data.append(f"Low: {low_price} {market}")
-            formatted_data.append(f"Close: {close_price} {market}")
-            formatted_data.append(f"Volume: {volume}")
+        for i in series.newest_first(5):
+            formatted_data.append(f"Date: {series.date_at(i)}")
+            formatted_data.append(f"Open: {series.open[i]:.8f} {market}")
+            formatted_data.append(f"High: {series.high[i]:.8f} {market}")
+            formatted_data.append(f"Low: {series.low[i]:.8f} {market}")
+            formatted_data.append(f"Close: {series.close[i]:.8f} {market}")
+            formatted_data.append(f"Volume: {series.volume[i]:.8f}")
             formatted_data.append("---")
 
         return "\n".join(formatted_data)
     except Exception as e:
-        return f"Error formatting cryptocurrency time series data: {str(e)}"
\ No newline at end of file
+        return f"Error formatting cryptocurrency time series data: {str(e)}"
+
+
+def collect_server_stats() -> Dict[str, Any]:
+    """Current metrics plus the state of the caches, the coalescer and the rate scheduler."""
+    return {
+        "metrics": metrics.snapshot(),
+        "response_cache": response_cache.stats(),
+        "options_chain_cache": options_chain_cache.stats(),
+        "coalescer": request_coalescer.stats(),
+        "rate_limiter": rate_scheduler.stats(),
+        "circuit_breaker": upstream_breaker.stats(),
+        "watchlist": watchlist.stats(),
+        "api_keys": key_pool.stats(),
+        "shared_cache": shared_cache.stats() if SHARED_CACHE_ENABLED and CACHE_ENABLED else {"enabled": False},
+    }
+
+
+def format_prometheus_stats(stats: Dict[str, Any]) -> str:
+    return metrics.prometheus(gauges={key: value for key, value in stats.items() if key != "metrics"})
+
+
+def _format_stages(summaries: Dict[str, Any], stages: Tuple[str, ...]) -> str:
+    return " | ".join(
+        f"{stage} p50 {summaries[stage]['p50_ms']:.2f} ms, p99 {summaries[stage]['p99_ms']:.2f} ms"
+        for stage in stages if stage in summaries
+    )
+
+
+def format_server_stats(stats: Dict[str, Any]) -> str:
+    snapshot = stats["metrics"]
+    lines = [f"Uptime: {snapshot['uptime_seconds']:.0f} seconds", "", "Tools:"]
+    for name, tool in snapshot["tools"].items():
+        counters = tool["counters"]
+        lines.append(
+            f"{name}: {counters.get('calls', 0)} calls, {counters.get('errors', 0)} errors, "
+            f"{counters.get('invalid', 0)} invalid"
+        )
+        stages = _format_stages(tool, ('total', 'fetch', 'format'))
+        if stages:
+            lines.append(f"  {stages}")
+
+    lines.extend(["", "Upstream functions:"])
+    for function, upstream in snapshot["functions"].items():
+        counters = upstream["counters"]
+        line = (
+            f"{function}: {counters.get('requests', 0)} requests, {counters.get('cache_hits', 0)} cache hits, "
+            f"{counters.get('bytes', 0) / 1024:.1f} KB received"
+        )
+        for counter, label in (("shared_hits", "shared cache hits"), ("retries", "retries"), ("hedged", "hedged"), ("stale_served", "served stale"), ("revalidations", "revalidated in the background")):
+            if counters.get(counter):
+                line += f", {counters[counter]} {label}"
+        lines.append(line)
+        stages = _format_stages(upstream, ('queue_wait', 'upstream', 'decode'))
+        if stages:
+            lines.append(f"  {stages}")
+        errors = {key[len("error_"):]: value for key, value in counters.items() if key.startswith("error_")}
+        if errors:
+            lines.append("  errors: " + ", ".join(f"{key}={value}" for key, value in sorted(errors.items())))
+
+    lines.append("")
+    for label, key in (("Response cache", "response_cache"), ("Options chain cache", "options_chain_cache")):
+        cache = stats[key]
+        lines.append(
+            f"{label}: {cache['entries']} entries, {cache['bytes'] / 1024 / 1024:.1f} MB, {cache['hits']} hits, "
+            f"{cache['misses']} misses, {cache['evictions']} evictions, {cache['expirations']} expirations, "
+            f"{cache['stale_hits']} stale hits, {cache['pinned']} pinned"
+        )
+    shared = stats["shared_cache"]
+    if shared.get("enabled", True):
+        lines.append(
+            f"Shared cache: {shared['entries']} entries, {shared['bytes'] / 1024 / 1024:.1f} MB, {shared['hits']} hits, "
+            f"{shared['misses']} misses, {shared['stores']} stored, {shared['waits']} waits for another process, "
+            f"{shared['errors']} errors"
+        )
+    coalescer = stats["coalescer"]
+    lines.append(
+        f"Request coalescing: {coalescer['executions']} executions, {coalescer['coalesced']} coalesced, "
+        f"{coalescer['in_flight']} in flight"
+    )
+    limiter = stats["rate_limiter"]
+    if limiter["enabled"]:
+        lines.append(
+            f"Rate limiter: {limiter['tokens']:.1f} tokens, {limiter['used_today']} of {limiter['per_day'] or 'unlimited'} "
+            f"daily calls used, {limiter['queue_depth']} queued, {limiter['granted']} granted, {limiter['rejected']} rejected, "
+            f"{limiter['total_wait']:.1f} seconds waited"
+        )
+        if limiter["reserved"]:
+            lines.append(f"  {limiter['background_used_today']} of {limiter['reserved']} calls reserved for the watchlist used")
+    else:
+        lines.append("Rate limiter: disabled")
+    breaker = stats["circuit_breaker"]
+    breaker_line = f"Circuit breaker: {breaker['state']}"
+    if breaker["state"] == "open":
+        breaker_line += f" (retrying in {breaker['retry_after']:.0f} seconds)"
+    lines.append(
+        f"{breaker_line}, {breaker['consecutive_failures']} consecutive failures, {breaker['trips']} trips, "
+        f"{breaker['short_circuited']} requests failed fast"
+    )
+    keys = stats["api_keys"]
+    lines.append(f"API keys: {keys['available']} of {keys['keys']} available, {keys['rate_limited']} rate-limited responses")
+    if keys["keys"] > 1 or keys["rate_limited"]:
+        for key in keys["details"]:
+            state = key["state"]
+            if state == "cooling":
+                state += f" for {key['cooldown_remaining']:.0f} seconds"
+            lines.append(
+                f"  {key['label']}: {state}, {key['calls_last_minute']} calls in the last minute, "
+                f"{key['used_today']} used today, {key['rate_limited']} rate limited"
+            )
+    refresher = stats["watchlist"]
+    if refresher["jobs"]:
+        lines.append(
+            f"Watchlist: {refresher['jobs']} jobs, {refresher['refreshes']} refreshes, {refresher['failures']} failures, "
+            f"{refresher['failing']} failing now, next refresh in {refresher['next_refresh']:.0f} seconds"
+        )
+    return "\n".join(lines)
@@ -0,0 +1,169 @@
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Set
+import asyncio
+import os
+import time
+
+from .cache import (
+    MARKET_TZ,
+    allow_stale,
+    market_is_open,
+    refreshing_keys,
+    response_cache,
+    seconds_until_market_close,
+    seconds_until_market_open,
+)
+from .ratelimit import background_requests, rate_scheduler
+
+# e.g. ALPHA_VANTAGE_WATCHLIST="AAPL,MSFT" and ALPHA_VANTAGE_WATCHLIST_CRYPTO="BTC/USD,ETH/EUR"
+WATCHLIST_SYMBOLS = os.getenv('ALPHA_VANTAGE_WATCHLIST', '')
+WATCHLIST_CRYPTO = os.getenv('ALPHA_VANTAGE_WATCHLIST_CRYPTO', '')
+WATCHLIST_FUNCTIONS = os.getenv('ALPHA_VANTAGE_WATCHLIST_FUNCTIONS', 'quote,overview,daily')
+WATCHLIST_INTERVAL = float(os.getenv('ALPHA_VANTAGE_WATCHLIST_INTERVAL', '900'))
+# Share of the daily API budget reserved for watchlist refreshes
+WATCHLIST_QUOTA_SHARE = float(os.getenv('ALPHA_VANTAGE_WATCHLIST_QUOTA_SHARE', '0.5'))
+
+# Alpha Vantage publishes the day's bar a little after the close
+DAILY_SETTLE_DELAY = 15 * 60.0
+
+# Refresh schedules: every interval while the market is open, every interval
+# around the clock, or once after each market close
+SCHEDULE_MARKET = "market"
+SCHEDULE_CONTINUOUS = "continuous"
+SCHEDULE_DAILY = "daily"
+
+Prefetch = Callable[[str, Dict[str, Any]], Awaitable[Any]]
+
+
+class WatchJob:
+    """One tool call the watchlist keeps warm."""
+
+    __slots__ = ("tool", "arguments", "schedule", "due", "keys", "refreshed_at", "error")
+
+    def __init__(self, tool: str, arguments: Dict[str, Any], schedule: str):
+        self.tool = tool
+        self.arguments = arguments
+        self.schedule = schedule
+        self.due = 0.0
+        self.keys: Set[Hashable] = set()
+        self.refreshed_at: Optional[float] = None
+        self.error: Optional[str] = None
+
+
+def build_jobs(symbols: List[str], crypto_pairs: List[str], functions: List[str]) -> List[WatchJob]:
+    """Jobs for the watched stock symbols and crypto pairs ("BTC/USD").
+
+    `functions` selects from quote, overview and daily; overview has no crypto
+    counterpart.
+    """
+    jobs = []
+    for symbol in symbols:
+        if "quote" in functions:
+            jobs.append(WatchJob("get-stock-quote", {"symbol": symbol}, SCHEDULE_MARKET))
+        if "overview" in functions:
+            jobs.append(WatchJob("get-company-info", {"symbol": symbol}, SCHEDULE_DAILY))
+        if "daily" in functions:
+            jobs.append(WatchJob("get-time-series", {"symbol": symbol}, SCHEDULE_DAILY))
+    for pair in crypto_pairs:
+        crypto_symbol, _, market = pair.replace(":", "/").partition("/")
+        market = market or "USD"
+        if "quote" in functions:
+            jobs.append(WatchJob("get-crypto-exchange-rate", {"crypto_symbol": crypto_symbol, "market": market}, SCHEDULE_CONTINUOUS))
+        if "daily" in functions:
+            jobs.append(WatchJob("get-crypto-daily", {"symbol": crypto_symbol, "market": market}, SCHEDULE_DAILY))
+    return jobs
+
+
+def _split(value: str) -> List[str]:
+    return [item.strip().upper() for item in value.split(",") if item.strip()]
+
+
+def seconds_until_refresh(schedule: str, interval: float, now: Optional[datetime] = None) -> float:
+    now = now or datetime.now(MARKET_TZ)
+    if schedule == SCHEDULE_CONTINUOUS:
+        return interval
+    if schedule == SCHEDULE_MARKET:
+        # The first refresh after the close picks up the closing price
+        return interval if market_is_open(now) else seconds_until_market_open(now)
+    return seconds_until_market_close(now) + DAILY_SETTLE_DELAY
+
+
+class Watchlist:
+    """Prefetches watched symbols at startup and keeps them fresh in the background.
+
+    Refreshes skip the cache, queue behind interactive requests and are paid
+    for from a reserved share of the daily quota. The cache entries they
+    write are pinned, so they are never evicted; between refreshes an expired
+    one is served stale, within the function's max staleness, while it is
+    fetched again.
+    """
+
+    def __init__(self, jobs: List[WatchJob], interval: float = WATCHLIST_INTERVAL, quota_share: float = WATCHLIST_QUOTA_SHARE):
+        self.jobs = jobs
+        self.interval = interval
+        self.quota_share = quota_share
+        self.refreshes = 0
+        self.failures = 0
+
+    def __len__(self) -> int:
+        return len(self.jobs)
+
+    def reserve_quota(self) -> None:
+        if self.jobs:
+            rate_scheduler.reserve(round(rate_scheduler.per_day * self.quota_share))
+
+    async def run(self, prefetch: Prefetch) -> None:
+        """Refresh jobs as they fall due, forever. Every job is due at startup."""
+        self.reserve_quota()
+        while self.jobs:
+            for job in self.jobs:
+                if job.due <= time.monotonic():
+                    await self.refresh(job, prefetch)
+            wake = min(job.due for job in self.jobs)
+            await asyncio.sleep(max(1.0, wake - time.monotonic()))
+
+    async def refresh(self, job: WatchJob, prefetch: Prefetch) -> None:
+        keys: Set[Hashable] = set()
+        keys_token = refreshing_keys.set(keys)
+        priority_token = background_requests.set(True)
+        # An expired answer standing in for a failed refresh is still a failure
+        stale_token = allow_stale.set(False)
+        try:
+            result = await prefetch(job.tool, dict(job.arguments))
+        except Exception as e:
+            result = f"Unexpected error occurred: {str(e)}"
+        finally:
+            refreshing_keys.reset(keys_token)
+            background_requests.reset(priority_token)
+            allow_stale.reset(stale_token)
+
+        # make_alpha_request pinned the keys fetched; release the ones this job no longer uses
+        for key in job.keys - keys:
+            response_cache.unpin(key)
+        job.keys = keys
+
+        if isinstance(result, str):
+            # The previous answer, if any, stays pinned until a refresh succeeds
+            self.failures += 1
+            job.error = result
+            job.due = time.monotonic() + self.interval
+        else:
+            self.refreshes += 1
+            job.error = None
+            job.refreshed_at = time.time()
+            job.due = time.monotonic() + seconds_until_refresh(job.schedule, self.interval)
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        return {
+            "jobs": len(self.jobs),
+            "refreshes": self.refreshes,
+            "failures": self.failures,
+            "failing": sum(1 for job in self.jobs if job.error),
+            "next_refresh": round(max(0.0, min(job.due for job in self.jobs) - now), 1) if self.jobs else 0.0,
+        }
+
+
+watchlist = Watchlist(build_jobs(_split(WATCHLIST_SYMBOLS), _split(WATCHLIST_CRYPTO), [
+    function.strip().lower() for function in WATCHLIST_FUNCTIONS.split(",")
+]))
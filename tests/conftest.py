@@ -0,0 +1,46 @@
+import os
+import tempfile
+
+# The package reads its configuration at import time, so this runs before any test imports it
+for name in [name for name in os.environ if name.startswith("ALPHA_VANTAGE_")]:
+    del os.environ[name]
+os.environ.update({
+    "ALPHA_VANTAGE_API_KEY": "test-key",
+    "ALPHA_VANTAGE_DATA_DIR": tempfile.mkdtemp(prefix="alpha_vantage_tests_"),
+    "ALPHA_VANTAGE_SHARED_CACHE": "0",
+    "ALPHA_VANTAGE_CALLS_PER_MINUTE": "0",
+    "ALPHA_VANTAGE_CALLS_PER_DAY": "0",
+    "ALPHA_VANTAGE_RETRY_BASE_DELAY": "0",
+})
+
+import pytest
+
+from alpha_vantage_mcp import cache, server, tools, watchlist
+from alpha_vantage_mcp.resilience import CircuitBreaker
+from alpha_vantage_mcp.singleflight import SingleFlight
+from alpha_vantage_mcp.store import TimeSeriesStore
+
+from fakes import FakeUpstream
+
+
+@pytest.fixture(autouse=True)
+def fresh_state(monkeypatch, tmp_path):
+    """Fresh caches, store, coalescer and breaker for every test, so tests cannot leak into each other."""
+    response_cache = cache.ResponseCache()
+    for module in (cache, tools, watchlist):
+        monkeypatch.setattr(module, "response_cache", response_cache)
+    monkeypatch.setattr(tools, "options_chain_cache", cache.ResponseCache())
+    monkeypatch.setattr(tools, "request_coalescer", SingleFlight())
+    monkeypatch.setattr(tools, "upstream_breaker", CircuitBreaker())
+    store = TimeSeriesStore(str(tmp_path / "timeseries.sqlite3"))
+    monkeypatch.setattr(tools, "daily_store", store)
+    yield response_cache
+    store.close()
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+    fake = FakeUpstream()
+    monkeypatch.setattr(server, "http_client", fake.client())
+    return fake
+
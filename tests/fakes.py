@@ -0,0 +1,75 @@
+from typing import Any, Callable, Dict, List, Optional
+
+import httpx
+
+Handler = Callable[[Dict[str, str]], Any]
+
+
+def quote_payload(symbol: str, price: float) -> Dict[str, Any]:
+    return {"Global Quote": {"01. symbol": symbol, "05. price": f"{price:.4f}", "09. change": "0", "10. change percent": "0%"}}
+
+
+def daily_bar(close: float) -> Dict[str, str]:
+    return {"1. open": f"{close - 1:.4f}", "2. high": f"{close + 1:.4f}", "3. low": f"{close - 2:.4f}", "4. close": f"{close:.4f}", "5. volume": "1000"}
+
+
+def daily_payload(symbol: str, days: List[str], first_close: float = 100.0) -> Dict[str, Any]:
+    """TIME_SERIES_DAILY payload with one bar per ISO day, closes rising by one per bar."""
+    return {
+        "Meta Data": {"2. Symbol": symbol, "3. Last Refreshed": days[-1] if days else ""},
+        "Time Series (Daily)": {day: daily_bar(first_close + i) for i, day in enumerate(days)},
+    }
+
+
+def options_payload(contracts: int, trading_date: str = "2024-02-20") -> Dict[str, Any]:
+    data = []
+    for i in range(contracts):
+        strike = 100 + i // 2
+        kind = "call" if i % 2 == 0 else "put"
+        data.append({
+            "contractID": f"AAPL240315{kind[0].upper()}{strike * 1000:08d}",
+            "symbol": "AAPL",
+            "expiration": "2024-03-15",
+            "strike": f"{strike:.2f}",
+            "type": kind,
+            "mark": "1.50",
+            "volume": str(10 * i),
+            "open_interest": str(100 + i),
+            "date": trading_date,
+            "implied_volatility": "0.25000",
+            "delta": "0.50000" if kind == "call" else "-0.50000",
+            "gamma": "0.01000",
+        })
+    return {"endpoint": "Historical Options", "message": "success", "data": data}
+
+
+class FakeUpstream:
+    """Alpha Vantage stand-in: answers each function with a handler and records every request."""
+
+    def __init__(self):
+        self.handlers: Dict[str, Handler] = {}
+        self.requests: List[Dict[str, str]] = []
+
+    def count(self, function: str, symbol: Optional[str] = None) -> int:
+        return sum(
+            1 for params in self.requests
+            if params["function"] == function and (symbol is None or params.get("symbol") == symbol)
+        )
+
+    def handle(self, request: httpx.Request) -> httpx.Response:
+        params = dict(request.url.params)
+        self.requests.append(params)
+        answer = self.handlers[params["function"]](params)
+        if isinstance(answer, httpx.Response):
+            return answer
+        return httpx.Response(200, json=answer)
+
+    def client(self) -> httpx.AsyncClient:
+        return httpx.AsyncClient(transport=httpx.MockTransport(self.handle))
+
+
+async def call_tool(name: str, arguments: Dict[str, Any]) -> List[str]:
+    """The texts a tool call answers with: the output, then any notes."""
+    from alpha_vantage_mcp import server
+
+    return [content.text for content in await server.handle_call_tool(name, arguments)]
@@ -0,0 +1,54 @@
+import time
+
+from alpha_vantage_mcp.cache import ResponseCache
+
+
+def test_least_recently_used_entry_is_evicted_first():
+    cache = ResponseCache(max_entries=2, max_bytes=1000)
+    cache.set("a", 1, None, 10)
+    cache.set("b", 2, None, 10)
+    cache.get("a")
+
+    cache.set("c", 3, None, 10)
+
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == (1, 3)
+    assert cache.stats()["evictions"] == 1
+
+
+def test_byte_cap_evicts_until_the_new_entry_fits():
+    cache = ResponseCache(max_entries=10, max_bytes=100)
+    cache.set("a", 1, None, 40)
+    cache.set("b", 2, None, 40)
+
+    cache.set("c", 3, None, 50)
+    cache.set("huge", 4, None, 101)
+
+    assert cache.stats()["bytes"] == 90
+    assert cache.get("a") is None
+    assert cache.get("huge") is None
+
+
+def test_entries_without_a_positive_ttl_are_not_stored():
+    cache = ResponseCache(max_entries=10, max_bytes=100)
+    cache.set("a", 1, 0, 10)
+
+    assert len(cache) == 0
+
+
+def test_pinned_entries_are_never_evicted_but_still_expire():
+    cache = ResponseCache(max_entries=1, max_bytes=1000)
+    cache.set("watched", 1, 0.01, 10)
+    cache.pin("watched")
+
+    cache.set("other", 2, None, 10)
+    time.sleep(0.02)
+
+    assert cache.get("watched") is None
+    value, age = cache.get_stale("watched")
+    assert value == 1 and age >= 0.01
+    assert cache.get_stale("watched", max_age=0.001) is None
+
+    cache.unpin("watched")
+    cache.set("third", 3, None, 10)
+    assert cache.get_stale("watched") is None
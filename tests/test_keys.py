@@ -0,0 +1,30 @@
+from alpha_vantage_mcp import tools
+from alpha_vantage_mcp.keys import KeyPool
+
+KEYS = ["ALPHAKEY1111AAAA", "BRAVOKEY2222BBBB"]
+
+
+def test_stats_label_keys_without_revealing_them(monkeypatch):
+    monkeypatch.setattr(tools, "key_pool", KeyPool(KEYS, per_minute=5, per_day=25))
+    tools.key_pool.acquire()
+
+    stats = tools.collect_server_stats()
+    outputs = [tools.format_server_stats(stats), tools.format_prometheus_stats(stats)]
+
+    assert [key["label"] for key in stats["api_keys"]["details"]] == ["key-1", "key-2"]
+    assert "key-1: healthy" in outputs[0]
+    for output in outputs:
+        for key in KEYS:
+            assert key[-4:] not in output
+
+
+def test_least_loaded_key_is_picked_and_cooling_keys_are_skipped():
+    pool = KeyPool(KEYS, per_minute=5, per_day=25, cooldown=60)
+
+    first = pool.acquire()
+    second = pool.acquire()
+    pool.cool_down(second.key)
+
+    assert {first.key, second.key} == set(KEYS)
+    assert pool.available() == 1
+    assert pool.acquire() is first
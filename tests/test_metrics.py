@@ -0,0 +1,35 @@
+from alpha_vantage_mcp.metrics import Histogram, Metrics
+
+
+def test_quantiles_interpolate_within_buckets_and_never_exceed_the_max():
+    histogram = Histogram()
+    for _ in range(99):
+        histogram.observe(0.002)
+    histogram.observe(0.3)
+
+    assert 0.001 < histogram.quantile(0.5) <= 0.0025
+    assert histogram.quantile(1.0) == 0.3
+    assert Histogram().quantile(0.5) == 0.0
+
+
+def test_prometheus_output_has_histograms_counters_and_failure_classes():
+    metrics = Metrics(enabled=True)
+    metrics.observe_upstream("GLOBAL_QUOTE", "upstream", 0.004)
+    metrics.count_upstream("GLOBAL_QUOTE", "requests")
+    metrics.count_upstream("GLOBAL_QUOTE", "error_timeout", 2)
+
+    text = metrics.prometheus(gauges={"cache": {"entries": 3, "enabled": True, "name": "x"}})
+
+    assert 'alpha_vantage_upstream_seconds_bucket{function="GLOBAL_QUOTE",stage="upstream",le="0.005"} 1' in text
+    assert 'alpha_vantage_upstream_requests_total{function="GLOBAL_QUOTE"} 1' in text
+    assert 'alpha_vantage_upstream_failures_total{function="GLOBAL_QUOTE",error="timeout"} 2' in text
+    assert "alpha_vantage_cache_entries 3" in text
+    assert "alpha_vantage_cache_enabled" not in text
+
+
+def test_disabled_metrics_record_nothing():
+    metrics = Metrics(enabled=False)
+    metrics.observe_tool("get-stock-quote", "total", 0.1)
+    metrics.count_tool("get-stock-quote", "calls")
+
+    assert metrics.tools == {}
@@ -0,0 +1,46 @@
+import asyncio
+
+import pytest
+
+from alpha_vantage_mcp.ratelimit import PRIORITY_BACKGROUND, RateLimitExceeded, RateScheduler
+
+
+def test_zero_limits_grant_every_request_at_once():
+    scheduler = RateScheduler(per_minute=0, per_day=0)
+
+    async def burst():
+        return [await scheduler.acquire() for _ in range(500)]
+
+    assert asyncio.run(burst()) == [0.0] * 500
+    assert scheduler.try_acquire()
+    scheduler.reserve(10)
+    assert scheduler.reserved == 0
+
+
+def test_spent_daily_budget_is_rejected_up_front():
+    scheduler = RateScheduler(per_minute=600, per_day=2)
+
+    async def scenario():
+        await scheduler.acquire()
+        await scheduler.acquire()
+        await scheduler.acquire()
+
+    with pytest.raises(RateLimitExceeded, match="Daily budget of 2"):
+        asyncio.run(scenario())
+    assert scheduler.rejected == 1
+
+
+def test_background_requests_only_spend_the_reserved_calls():
+    scheduler = RateScheduler(per_minute=600, per_day=4)
+    scheduler.reserve(1)
+
+    async def scenario():
+        await scheduler.acquire(PRIORITY_BACKGROUND)
+        with pytest.raises(RateLimitExceeded, match="Daily budget of 1"):
+            await scheduler.acquire(PRIORITY_BACKGROUND)
+        for _ in range(3):
+            await scheduler.acquire()
+        with pytest.raises(RateLimitExceeded, match="Daily budget of 4"):
+            await scheduler.acquire()
+
+    asyncio.run(scenario())
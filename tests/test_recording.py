@@ -0,0 +1,77 @@
+import asyncio
+import json
+
+import httpx
+
+from alpha_vantage_mcp.recording import RecordingTransport, ReplayTransport
+
+BASE = "https://www.alphavantage.co/query"
+
+
+def upstream_transport():
+    calls = {"count": 0}
+
+    def handle(request):
+        calls["count"] += 1
+        params = dict(request.url.params)
+        return httpx.Response(200, json={"symbol": params["symbol"], "call": calls["count"], "echo": params["apikey"]})
+
+    return httpx.MockTransport(handle)
+
+
+async def record(path, symbols, close=True):
+    transport = RecordingTransport(upstream_transport(), str(path))
+    client = httpx.AsyncClient(transport=transport)
+    for symbol in symbols:
+        await client.get(BASE, params={"function": "GLOBAL_QUOTE", "symbol": symbol, "apikey": "SECRET"})
+    if close:
+        await client.aclose()
+    return transport
+
+
+async def replay(path, symbols):
+    client = httpx.AsyncClient(transport=ReplayTransport(str(path), timing=False))
+    try:
+        return [
+            await client.get(BASE, params={"function": "GLOBAL_QUOTE", "symbol": symbol, "apikey": "OTHER"})
+            for symbol in symbols
+        ]
+    finally:
+        await client.aclose()
+
+
+def test_round_trip_replays_responses_in_order_without_the_key(tmp_path):
+    path = tmp_path / "session.rec"
+    asyncio.run(record(path, ["IBM", "IBM", "AAPL"]))
+
+    responses = asyncio.run(replay(path, ["IBM", "IBM", "IBM", "AAPL", "MSFT"]))
+
+    assert [r.json()["call"] for r in responses[:4]] == [1, 2, 2, 3]
+    assert responses[0].json()["echo"] == "REDACTED"
+    assert responses[4].status_code == 404
+    assert b"SECRET" not in path.read_bytes()
+
+
+def test_archive_is_usable_when_the_recorder_was_never_closed(tmp_path):
+    path = tmp_path / "killed.rec"
+
+    async def scenario():
+        # Stands in for a server killed mid-session: the transport is never closed
+        await record(path, ["IBM", "AAPL"], close=False)
+        return await replay(path, ["IBM", "AAPL"])
+
+    responses = asyncio.run(scenario())
+
+    assert [r.json()["symbol"] for r in responses] == ["IBM", "AAPL"]
+
+
+def test_record_cut_off_mid_write_is_ignored(tmp_path):
+    path = tmp_path / "cut.rec"
+    asyncio.run(record(path, ["IBM"]))
+    with open(path, "ab") as archive:
+        archive.write(json.dumps({"id": 2, "key": "function=GLOBAL_QUOTE&symbol=AAPL", "size": 500}).encode() + b"\nxx")
+
+    responses = asyncio.run(replay(path, ["IBM", "AAPL"]))
+
+    assert responses[0].json()["symbol"] == "IBM"
+    assert responses[1].status_code == 404
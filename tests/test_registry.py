@@ -0,0 +1,56 @@
+import asyncio
+
+from alpha_vantage_mcp.registry import compile_schema
+
+from fakes import call_tool
+
+SCHEMA = {
+    "type": "object",
+    "properties": {
+        "symbol": {"type": "string"},
+        "day": {"type": "string", "pattern": "^20[0-9]{2}-[0-9]{2}-[0-9]{2}$", "format": "date"},
+        "rows": {"type": "integer", "minimum": 1, "maximum": 10, "default": 5},
+        "kind": {"type": "string", "enum": ["call", "put"]},
+        "symbols": {"type": "array", "items": {"type": "string"}, "minItems": 1, "maxItems": 2},
+    },
+    "required": ["symbol"],
+}
+
+
+def test_valid_arguments_get_their_defaults():
+    validate = compile_schema(SCHEMA)
+    arguments = {"symbol": "IBM", "day": "2024-02-29"}
+
+    assert validate(arguments) is None
+    assert arguments["rows"] == 5
+
+
+def test_each_constraint_reports_the_argument_it_rejects():
+    validate = compile_schema(SCHEMA)
+    cases = [
+        ({}, "Missing symbol parameter"),
+        ({"symbol": ""}, "Missing symbol parameter"),
+        ({"symbol": "IBM", "rows": True}, "Invalid rows parameter: expected integer"),
+        ({"symbol": "IBM", "rows": 0}, "Invalid rows parameter: must be at least 1"),
+        ({"symbol": "IBM", "rows": 11}, "Invalid rows parameter: must be at most 10"),
+        ({"symbol": "IBM", "kind": "straddle"}, "Invalid kind parameter: must be one of call, put"),
+        ({"symbol": "IBM", "day": "29-02-2024"}, "Invalid day parameter: does not match ^20[0-9]{2}-[0-9]{2}-[0-9]{2}$"),
+        ({"symbol": "IBM", "day": "2023-02-29"}, "Invalid day parameter: 2023-02-29 is not a calendar date"),
+        ({"symbol": "IBM", "symbols": []}, "Invalid symbols parameter: needs at least 1 items"),
+        ({"symbol": "IBM", "symbols": ["A", "B", "C"]}, "Invalid symbols parameter: allows at most 2 items"),
+        ({"symbol": "IBM", "symbols": ["A", 1]}, "Invalid symbols item parameter: expected string"),
+    ]
+
+    assert [validate(arguments) for arguments, _ in cases] == [message for _, message in cases]
+
+
+def test_symbol_lists_that_normalize_to_nothing_are_rejected(upstream):
+    texts = asyncio.run(call_tool("get-stock-quotes", {"symbols": [" ", ""]}))
+
+    assert texts == ["Missing symbols parameter"]
+    assert upstream.requests == []
+
+
+def test_unknown_tools_and_missing_arguments_are_reported():
+    assert asyncio.run(call_tool("no-such-tool", {"symbol": "IBM"})) == ["Unknown tool: no-such-tool"]
+    assert asyncio.run(call_tool("get-stock-quote", {})) == ["Missing arguments for the request"]
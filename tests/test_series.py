@@ -0,0 +1,81 @@
+from datetime import date
+
+from alpha_vantage_mcp.series import parse_crypto_daily, parse_daily_series, resample
+
+from fakes import daily_payload
+
+DAYS = ["2024-01-29", "2024-01-30", "2024-01-31", "2024-02-01", "2024-02-02"]
+
+
+def test_parse_orders_bars_oldest_first():
+    series = parse_daily_series(daily_payload("IBM", list(reversed(DAYS))))
+
+    assert [series.date_at(i) for i in range(len(series))] == DAYS
+    assert series.volume.typecode == "q"
+
+
+def test_bars_with_missing_or_malformed_fields_are_skipped():
+    payload = daily_payload("IBM", DAYS)
+    bars = payload["Time Series (Daily)"]
+    del bars["2024-01-30"]["1. open"]
+    bars["2024-01-31"]["5. volume"] = "None"
+    bars["2024-02-01"]["4. close"] = "NaN"
+
+    series = parse_daily_series(payload)
+
+    assert [series.date_at(i) for i in range(len(series))] == ["2024-01-29", "2024-02-02"]
+
+
+def test_series_without_a_usable_bar_parses_as_none():
+    payload = daily_payload("IBM", DAYS)
+    for values in payload["Time Series (Daily)"].values():
+        values["1a. open (USD)"] = values.pop("1. open")
+
+    assert parse_daily_series(payload) is None
+
+
+def test_crypto_volumes_keep_fractions():
+    payload = {
+        "Meta Data": {"2. Digital Currency Code": "BTC"},
+        "Time Series (Digital Currency Daily)": {
+            "2024-01-29": {"1. open": "1", "2. high": "2", "3. low": "0.5", "4. close": "1.5", "5. volume": "12.25"},
+        },
+    }
+
+    series = parse_crypto_daily(payload)
+
+    assert series.symbol == "BTC"
+    assert series.volume.tolist() == [12.25]
+
+
+def test_between_is_inclusive_and_returns_self_when_unbounded():
+    series = parse_daily_series(daily_payload("IBM", DAYS))
+
+    window = series.between(date(2024, 1, 30), date(2024, 2, 1))
+
+    assert [window.date_at(i) for i in range(len(window))] == DAYS[1:4]
+    assert series.between() is series
+    assert len(series.between(date(2025, 1, 1))) == 0
+
+
+def test_weekly_resample_aggregates_each_week():
+    series = parse_daily_series(daily_payload("IBM", DAYS))
+
+    weekly = resample(series, "weekly")
+
+    # 2024-01-29 is a Monday, so all five bars fall in one week
+    assert len(weekly) == 1
+    assert weekly.date_at(0) == "2024-02-02"
+    assert weekly.open[0] == series.open[0]
+    assert weekly.close[0] == series.close[-1]
+    assert weekly.high[0] == max(series.high)
+    assert weekly.low[0] == min(series.low)
+    assert weekly.volume[0] == sum(series.volume)
+
+
+def test_monthly_resample_splits_at_month_end():
+    series = parse_daily_series(daily_payload("IBM", DAYS))
+
+    monthly = resample(series, "monthly")
+
+    assert [monthly.date_at(i) for i in range(len(monthly))] == ["2024-01-31", "2024-02-02"]
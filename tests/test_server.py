@@ -0,0 +1,31 @@
+import asyncio
+
+from alpha_vantage_mcp import server, tools
+from alpha_vantage_mcp.watchlist import SCHEDULE_MARKET, Watchlist, WatchJob
+
+
+def test_shutdown_waits_for_the_refresher_before_closing_the_client(monkeypatch):
+    events = []
+
+    async def run(prefetch):
+        try:
+            await asyncio.sleep(60)
+        except asyncio.CancelledError:
+            # An in-flight refresh still holds the client while it unwinds
+            await asyncio.sleep(0)
+            events.append(("refresher unwound", server.http_client is not None))
+            raise
+
+    async def serve():
+        await asyncio.sleep(0)
+
+    watched = Watchlist([WatchJob("get-stock-quote", {"symbol": "AAPL"}, SCHEDULE_MARKET)])
+    monkeypatch.setattr(watched, "run", run)
+    monkeypatch.setattr(server, "watchlist", watched)
+    monkeypatch.setattr(server, "run_stdio", serve)
+    monkeypatch.setattr(server, "daily_store", tools.daily_store)
+
+    asyncio.run(server.main(transport="stdio"))
+
+    assert events == [("refresher unwound", True)]
+    assert server.http_client is None
@@ -0,0 +1,79 @@
+import asyncio
+
+from alpha_vantage_mcp.singleflight import SingleFlight
+
+from fakes import call_tool, quote_payload
+
+
+def test_concurrent_callers_share_one_execution():
+    flight = SingleFlight()
+    calls = []
+
+    async def work():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "done"
+
+    async def scenario():
+        return await asyncio.gather(*(flight.run("key", work) for _ in range(5)))
+
+    assert asyncio.run(scenario()) == ["done"] * 5
+    assert calls == [1]
+    assert flight.stats() == {"in_flight": 0, "executions": 1, "coalesced": 4}
+
+
+def test_cancelling_one_caller_does_not_cancel_the_shared_work():
+    flight = SingleFlight()
+
+    async def scenario():
+        release = asyncio.Event()
+
+        async def work():
+            await release.wait()
+            return 42
+
+        first = asyncio.ensure_future(flight.run("key", work))
+        second = asyncio.ensure_future(flight.run("key", work))
+        await asyncio.sleep(0)
+        first.cancel()
+        await asyncio.sleep(0)
+        release.set()
+        return first, await second
+
+    first, result = asyncio.run(scenario())
+
+    assert first.cancelled()
+    assert result == 42
+
+
+def test_a_failure_reaches_every_caller_and_the_next_call_runs_again():
+    flight = SingleFlight()
+    attempts = []
+
+    async def work():
+        attempts.append(1)
+        await asyncio.sleep(0)
+        if len(attempts) == 1:
+            raise RuntimeError("upstream down")
+        return "ok"
+
+    async def scenario():
+        failures = await asyncio.gather(flight.run("key", work), flight.run("key", work), return_exceptions=True)
+        return failures, await flight.run("key", work)
+
+    failures, result = asyncio.run(scenario())
+
+    assert [str(failure) for failure in failures] == ["upstream down"] * 2
+    assert result == "ok"
+
+
+def test_identical_tool_calls_spend_one_upstream_request(upstream):
+    upstream.handlers["GLOBAL_QUOTE"] = lambda params: quote_payload(params["symbol"], 100)
+
+    async def scenario():
+        return await asyncio.gather(*(call_tool("get-stock-quote", {"symbol": "IBM"}) for _ in range(3)))
+
+    results = asyncio.run(scenario())
+
+    assert all("Price: $100.0000" in texts[0] for texts in results)
+    assert upstream.count("GLOBAL_QUOTE", "IBM") == 1
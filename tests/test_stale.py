@@ -0,0 +1,52 @@
+import asyncio
+import itertools
+
+from alpha_vantage_mcp import cache
+
+from fakes import call_tool, quote_payload
+
+
+def expire_quotes_quickly(monkeypatch):
+    monkeypatch.setitem(cache.FUNCTION_TTLS, "GLOBAL_QUOTE", 0.05)
+    monkeypatch.setitem(cache.FUNCTION_MAX_STALENESS, "GLOBAL_QUOTE", 60)
+
+
+def test_expired_entry_is_served_while_a_refresh_runs_in_the_background(upstream, monkeypatch):
+    expire_quotes_quickly(monkeypatch)
+    prices = itertools.count(100)
+    upstream.handlers["GLOBAL_QUOTE"] = lambda params: quote_payload(params["symbol"], next(prices))
+
+    async def scenario():
+        await call_tool("get-stock-quote", {"symbol": "IBM"})
+        await asyncio.sleep(0.1)
+        stale = await call_tool("get-stock-quote", {"symbol": "IBM"})
+        await asyncio.sleep(0.01)
+        return stale, await call_tool("get-stock-quote", {"symbol": "IBM"})
+
+    stale, refreshed = asyncio.run(scenario())
+
+    assert "Price: $100.0000" in stale[0]
+    assert "a fresh copy is being fetched in the background" in stale[1]
+    assert "Price: $101.0000" in refreshed[0]
+    assert len(refreshed) == 1
+    assert upstream.count("GLOBAL_QUOTE") == 2
+
+
+def test_failed_request_falls_back_to_the_expired_entry_unless_fresh_data_is_asked_for(upstream, monkeypatch):
+    expire_quotes_quickly(monkeypatch)
+    answers = iter([quote_payload("IBM", 100)])
+    upstream.handlers["GLOBAL_QUOTE"] = lambda params: next(answers, {"Error Message": "Invalid API call."})
+
+    async def scenario():
+        await call_tool("get-stock-quote", {"symbol": "IBM"})
+        await asyncio.sleep(0.1)
+        fresh = await call_tool("get-stock-quote", {"symbol": "IBM", "fresh": True})
+        await asyncio.sleep(0.01)
+        stale = await call_tool("get-stock-quote", {"symbol": "IBM"})
+        return fresh, stale
+
+    fresh, stale = asyncio.run(scenario())
+
+    assert fresh[0].startswith("Error:")
+    assert "Price: $100.0000" in stale[0]
+    assert stale[1].startswith("Note: served cached GLOBAL_QUOTE data")
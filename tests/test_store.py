@@ -0,0 +1,100 @@
+import asyncio
+from datetime import date, timedelta
+
+from alpha_vantage_mcp.series import parse_daily_series
+from alpha_vantage_mcp.store import TimeSeriesStore
+
+from fakes import call_tool, daily_payload
+
+
+def weekdays(first, count):
+    day = date.fromisoformat(first)
+    days = []
+    while len(days) < count:
+        if day.weekday() < 5:
+            days.append(day.isoformat())
+        day += timedelta(days=1)
+    return days
+
+
+def series(days, first_close=100.0):
+    return parse_daily_series(daily_payload("IBM", days, first_close))
+
+
+def columns(history):
+    return [list(column) for column in (history.dates, history.open, history.high, history.low, history.close, history.volume)]
+
+
+def test_compact_merge_splices_the_history_held_in_memory(tmp_path):
+    store = TimeSeriesStore(str(tmp_path / "bars.sqlite3"))
+    days = weekdays("2024-01-01", 300)
+    store.merge("IBM", series(days[:250]), True)
+    store.load("IBM")
+
+    # The compact series restates the last 50 stored bars with new prices and adds 50 more
+    assert store.merge("IBM", series(days[200:], first_close=500.0), False)
+
+    spliced = store.loaded("IBM")
+    assert len(spliced) == 300
+    assert spliced.close[199] == 100.0 + 199
+    assert spliced.close[200] == 500.0
+    reopened = TimeSeriesStore(store.path)
+    assert columns(spliced) == columns(reopened.load("IBM"))
+    reopened.close()
+    store.close()
+
+
+def test_compact_series_that_leaves_a_gap_is_not_merged(tmp_path):
+    store = TimeSeriesStore(str(tmp_path / "bars.sqlite3"))
+    days = weekdays("2024-01-01", 300)
+    store.merge("IBM", series(days[:100]), True)
+
+    assert not store.merge("IBM", series(days[150:]), False)
+    assert len(store.load("IBM")) == 100
+    store.close()
+
+
+def test_updated_newest_bar_is_not_taken_for_the_merged_series(tmp_path):
+    store = TimeSeriesStore(str(tmp_path / "bars.sqlite3"))
+    days = weekdays("2024-01-01", 100)
+    merged = series(days)
+    store.merge("IBM", merged, False)
+
+    updated = series(days)
+    updated.close[-1] += 1
+
+    assert store.is_merged("IBM", series(days))
+    assert not store.is_merged("IBM", updated)
+    store.close()
+
+
+def test_histories_over_the_memory_cap_are_read_from_sqlite(tmp_path):
+    store = TimeSeriesStore(str(tmp_path / "bars.sqlite3"), memory_bytes=1024)
+    store.merge("IBM", series(weekdays("2024-01-01", 100)), True)
+
+    assert store.loaded("IBM") is None
+    assert len(store.load("IBM")) == 100
+    assert store.loaded("IBM") is None
+    store.close()
+
+
+def test_full_history_is_refreshed_with_compact_requests(upstream):
+    days = weekdays((date.today() - timedelta(days=500)).isoformat(), 400)
+    days = [day for day in days if day <= date.today().isoformat()]
+
+    def answer(params):
+        if params["outputsize"] == "full":
+            return daily_payload(params["symbol"], days)
+        return daily_payload(params["symbol"], days[-100:], first_close=100.0 + len(days) - 100)
+
+    upstream.handlers["TIME_SERIES_DAILY"] = answer
+
+    async def scenario():
+        first = await call_tool("get-time-series", {"symbol": "IBM", "outputsize": "full", "last_n": 3})
+        second = await call_tool("get-time-series", {"symbol": "IBM", "outputsize": "full", "last_n": 3, "fresh": True})
+        return first, second
+
+    first, second = asyncio.run(scenario())
+
+    assert first == second
+    assert [params["outputsize"] for params in upstream.requests] == ["full", "compact"]
@@ -0,0 +1,69 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from alpha_vantage_mcp.streaming import IncompleteResponse, decode_json_array
+
+from fakes import call_tool, options_payload
+
+
+async def chunked(body: bytes, size: int):
+    for start in range(0, len(body), size):
+        yield body[start:start + size]
+
+
+def decode(body: bytes, size: int):
+    items = []
+    header = asyncio.run(decode_json_array(chunked(body, size), "data", lambda item, _: items.append(item)))
+    return header, items
+
+
+@pytest.mark.parametrize("size", [1, 7, 64, 1 << 20])
+def test_elements_are_decoded_across_any_chunk_boundary(size):
+    payload = options_payload(5)
+
+    header, items = decode(json.dumps(payload).encode(), size)
+
+    assert header == {"endpoint": "Historical Options", "message": "success"}
+    assert items == payload["data"]
+
+
+def test_multibyte_characters_split_between_chunks():
+    body = json.dumps({"message": "é", "data": [{"name": "日本"}]}, ensure_ascii=False).encode()
+
+    header, items = decode(body, 1)
+
+    assert header == {"message": "é"}
+    assert items == [{"name": "日本"}]
+
+
+def test_payload_without_the_array_is_returned_whole():
+    header, items = decode(json.dumps({"Information": "premium only"}).encode(), 3)
+
+    assert header == {"Information": "premium only"}
+    assert items == []
+
+
+def test_stream_ending_inside_the_array_raises():
+    body = json.dumps(options_payload(5)).encode()
+
+    with pytest.raises(IncompleteResponse):
+        decode(body[:len(body) // 2], 64)
+
+
+def test_truncated_options_chain_is_an_error_and_is_not_cached(upstream):
+    body = json.dumps(options_payload(40)).encode()
+    responses = iter([body[:len(body) - 300], body])
+    upstream.handlers["HISTORICAL_OPTIONS"] = lambda params: httpx.Response(200, content=next(responses))
+    arguments = {"symbol": "AAPL", "date": "2024-02-20", "limit": -1}
+
+    async def scenario():
+        return await call_tool("get-historical-options", arguments), await call_tool("get-historical-options", arguments)
+
+    truncated, complete = asyncio.run(scenario())
+
+    assert truncated[0].startswith("Error: Incomplete response from Alpha Vantage")
+    assert upstream.count("HISTORICAL_OPTIONS") == 2
+    assert complete[0].count("Contract ID:") == 40
@@ -0,0 +1,64 @@
+import asyncio
+import json
+from datetime import date, timedelta
+
+from fakes import call_tool, daily_payload
+
+
+def trading_days(count):
+    day = date.today()
+    days = []
+    while len(days) < count:
+        if day.weekday() < 5:
+            days.append(day.isoformat())
+        day -= timedelta(days=1)
+    return days[::-1]
+
+
+def serve_history(upstream, days):
+    upstream.handlers["TIME_SERIES_DAILY"] = lambda params: daily_payload(params["symbol"], days)
+
+
+def test_date_range_shows_a_bounded_number_of_bars(upstream):
+    days = trading_days(150)
+    serve_history(upstream, days)
+
+    text = asyncio.run(call_tool("get-time-series", {"symbol": "IBM", "start": days[0]}))[0]
+
+    assert text.count("Date: ") == 100
+    assert f"Date: {days[-1]}" in text
+    assert "Showing the latest 100 of 150 bars in the range; pass last_n to see more." in text
+
+
+def test_last_n_raises_the_bound_for_a_date_range(upstream):
+    days = trading_days(150)
+    serve_history(upstream, days)
+
+    text = asyncio.run(call_tool("get-time-series", {"symbol": "IBM", "start": days[0], "last_n": 150}))[0]
+
+    assert text.count("Date: ") == 150
+    assert "Showing the latest" not in text
+
+
+def test_export_reports_the_bars_in_the_range(upstream):
+    days = trading_days(150)
+    serve_history(upstream, days)
+
+    text = asyncio.run(call_tool("get-time-series", {"symbol": "IBM", "end": days[-1], "output_format": "json"}))[0]
+    table = json.loads(text)
+
+    assert len(table["rows"]) == 100
+    assert table["bars"] == 150
+
+
+def test_impossible_dates_are_rejected_before_any_request(upstream):
+    texts = asyncio.run(call_tool("get-time-series", {"symbol": "IBM", "start": "2024-02-30"}))
+
+    assert texts[0] == "Invalid start parameter: 2024-02-30 is not a calendar date"
+    assert upstream.requests == []
+
+
+def test_start_after_end_is_an_error(upstream):
+    texts = asyncio.run(call_tool("get-time-series", {"symbol": "IBM", "start": "2024-03-01", "end": "2024-02-01"}))
+
+    assert texts[0] == "Error: start must not be after end"
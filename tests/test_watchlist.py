@@ -0,0 +1,86 @@
+import asyncio
+import itertools
+
+from alpha_vantage_mcp import cache, server
+from alpha_vantage_mcp.watchlist import SCHEDULE_MARKET, Watchlist, WatchJob
+
+from fakes import call_tool, quote_payload
+
+
+def serve_rising_quotes(upstream):
+    prices = itertools.count(100)
+    upstream.handlers["GLOBAL_QUOTE"] = lambda params: quote_payload(params["symbol"], next(prices))
+
+
+async def prefetch(name, arguments):
+    return await server.registry.prefetch(server.get_http_client(), name, arguments)
+
+
+def watch(*symbols):
+    return Watchlist([WatchJob("get-stock-quote", {"symbol": symbol}, SCHEDULE_MARKET) for symbol in symbols])
+
+
+def test_refresh_pins_the_keys_it_fetches(upstream, fresh_state):
+    serve_rising_quotes(upstream)
+    watched = watch("AAPL")
+
+    asyncio.run(watched.refresh(watched.jobs[0], prefetch))
+
+    assert watched.refreshes == 1
+    assert fresh_state.stats()["pinned"] == 1
+    assert upstream.count("GLOBAL_QUOTE", "AAPL") == 1
+
+
+def test_fresh_call_refetches_an_expired_watched_entry(upstream, monkeypatch):
+    serve_rising_quotes(upstream)
+    monkeypatch.setitem(cache.FUNCTION_TTLS, "GLOBAL_QUOTE", 0.05)
+    monkeypatch.setitem(cache.FUNCTION_MAX_STALENESS, "GLOBAL_QUOTE", 0.1)
+    watched = watch("AAPL")
+
+    async def scenario():
+        await watched.refresh(watched.jobs[0], prefetch)
+        await asyncio.sleep(0.2)
+        return await call_tool("get-stock-quote", {"symbol": "AAPL", "fresh": True})
+
+    texts = asyncio.run(scenario())
+
+    assert upstream.count("GLOBAL_QUOTE", "AAPL") == 2
+    assert "Price: $101.0000" in texts[0]
+    assert len(texts) == 1
+
+
+def test_expired_watched_entry_is_served_stale_with_a_note(upstream, monkeypatch):
+    serve_rising_quotes(upstream)
+    monkeypatch.setitem(cache.FUNCTION_TTLS, "GLOBAL_QUOTE", 0.05)
+    watched = watch("AAPL")
+
+    async def scenario():
+        await watched.refresh(watched.jobs[0], prefetch)
+        await asyncio.sleep(0.1)
+        texts = await call_tool("get-stock-quote", {"symbol": "AAPL"})
+        # Let the background refresh finish
+        await asyncio.sleep(0.05)
+        return texts
+
+    texts = asyncio.run(scenario())
+
+    assert "Price: $100.0000" in texts[0]
+    assert texts[1].startswith("Note: served cached GLOBAL_QUOTE data")
+    assert upstream.count("GLOBAL_QUOTE", "AAPL") == 2
+
+
+def test_watched_entry_past_max_staleness_is_refetched(upstream, monkeypatch):
+    serve_rising_quotes(upstream)
+    monkeypatch.setitem(cache.FUNCTION_TTLS, "GLOBAL_QUOTE", 0.05)
+    monkeypatch.setitem(cache.FUNCTION_MAX_STALENESS, "GLOBAL_QUOTE", 0.1)
+    watched = watch("AAPL")
+
+    async def scenario():
+        await watched.refresh(watched.jobs[0], prefetch)
+        await asyncio.sleep(0.2)
+        return await call_tool("get-stock-quote", {"symbol": "AAPL"})
+
+    texts = asyncio.run(scenario())
+
+    assert "Price: $101.0000" in texts[0]
+    assert len(texts) == 1